@@ -0,0 +1,291 @@
+# backfill.py  (re-run the filters over archived raw API responses, offline)
+#
+# After changing should_drop / LOCAL_BRANDS / the hawker rules there was no way
+# to see the effect without spending quota again. This streams saved raw
+# responses through the same normalize -> filter -> dedupe code the pipelines
+# use, one file per task across a process pool, and writes the results plus
+# per-rule drop counts. It makes no API calls: og:image lookups and image
+# probing are skipped, so events whose only image would have come from the
+# event page show up under "no_image". Place photo URLs are written without
+# the API key.
+#
+# Accepted inputs (files or directories, searched recursively):
+#   *.json / *.jsonl (optionally .gz), each document or line being one of
+#   - a SerpAPI google_events response          {"search_parameters", "events_results"}
+#   - a Places searchNearby / searchText reply  {"places": [...]}
+#   - a checkpoint request file                 {"parts": [...], "value": <response>}
+#     (.cache/checkpoints/*/requests/*.json — keep a copy to archive a run)
+#   - a bare list of raw events or places
+#
+#   python backfill.py archive/2025-*/
+#   python backfill.py archive/ --workers 8 --out .cache/backfill --future-only
+import os
+import re
+import gzip
+import json
+import argparse
+from pathlib import Path
+from datetime import datetime
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import get_serpapi_events as ge
+import get_places as gp
+import event_windows
+from event_locales import PROFILES, DEFAULT_CITY
+
+OUT_DIR = Path(os.getenv("BACKFILL_OUT", ".cache/backfill"))
+SUFFIXES = (".json", ".jsonl", ".json.gz", ".jsonl.gz")
+
+CITY_BY_GL = {p["serp"]["gl"]: code for code, p in PROFILES.items()}
+
+# ---------------- Inputs ----------------
+def archive_files(paths) -> list[Path]:
+    files = []
+    for p in map(Path, paths):
+        if p.is_dir():
+            files.extend(f for f in p.rglob("*") if f.is_file() and f.name.endswith(SUFFIXES))
+        elif p.is_file():
+            files.append(p)
+        else:
+            print(f"⚠️ Skipping {p}: not found")
+    return sorted(set(files))
+
+def _documents(path: Path):
+    """Yield the JSON documents in one archive file (one per line for .jsonl)."""
+    opener = gzip.open if path.name.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        if ".jsonl" in path.name:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        else:
+            yield json.load(f)
+
+# ---------------- Request context ----------------
+def _template_re(template: str, city: str) -> re.Pattern:
+    rx = re.escape(template).replace(re.escape("{city}"), re.escape(city))
+    return re.compile(rx.replace(re.escape("{month_year}"), ".+") + r"$", re.I)
+
+# query templates -> bucket, per city (month_year matches any month)
+QUERY_TAGS = {
+    code: [(_template_re(t, p["city"]), tag) for tag, ts in p["queries_by_bucket"].items() for t in ts]
+    for code, p in PROFILES.items()
+}
+
+def event_tag(query: str | None, city: str, default: str = "general") -> str:
+    for rx, tag in QUERY_TAGS[city]:
+        if query and rx.match(query.strip()):
+            return tag
+    return default    # unknown query: general is the stricter rule set
+
+def _event_context(doc: dict, parts, default_city: str):
+    """(city, query) of a SerpAPI response, from its search_parameters or checkpoint parts."""
+    params = doc.get("search_parameters") or {}
+    if parts and len(parts) > 1 and parts[0] == "serpapi" and isinstance(parts[1], dict):
+        params = {**parts[1], **params}
+    city = CITY_BY_GL.get((params.get("gl") or "").lower(), default_city)
+    return city, params.get("q")
+
+BUCKET_BY_TYPE = {t: b for b, types in gp.BUCKETS.items() for t in types}
+BUCKET_BY_QUERY = {q: b for b, qs in gp.TEXT_QUERIES.items() for q in qs}
+
+def places_reject(parts):
+    """The admission rule collect_raw() applied to the request these places came
+    from, as place -> rejection reason (None = admitted)."""
+    body = parts[1] if parts and len(parts) > 1 and isinstance(parts[1], dict) else {}
+    types, q = body.get("includedTypes") or [], body.get("textQuery")
+    if (types and set(types) <= set(gp.HAWKER_TYPES)) or q in gp.HAWKER_TEXT_QUERIES:
+        return lambda p: None if gp.CLASSIFIER.is_hawker(p) else "not_hawker"
+    bucket = BUCKET_BY_QUERY.get(q) or next((BUCKET_BY_TYPE[t] for t in types if t in BUCKET_BY_TYPE), None)
+    if bucket:
+        return lambda p: gp.CLASSIFIER.reject_reason(p, bucket)
+    # request unknown (plain dump): admitted by some bucket, or a hawker centre
+    return lambda p: (None if gp.CLASSIFIER.is_allowed_primary(p.get("primaryType"))
+                      or gp.CLASSIFIER.is_hawker(p) else "excluded_primary")
+
+# ---------------- Worker (one file) ----------------
+def _is_raw_event(x) -> bool:
+    return isinstance(x, dict) and "title" in x and ("date" in x or "venue" in x or "address" in x)
+
+def _is_raw_place(x) -> bool:
+    return isinstance(x, dict) and "id" in x and ("displayName" in x or "primaryType" in x)
+
+def process_file(path, default_city: str = DEFAULT_CITY, tag_override: str | None = None) -> dict:
+    """Normalize + filter every event and admit every place in one archive file."""
+    events, places = [], {}
+    stats = {"file": str(path), "docs": 0, "raw_events": 0, "raw_places": 0,
+             "drops": Counter(), "place_drops": Counter(), "errors": []}
+
+    def take_events(raws, city, query):
+        tag = tag_override or event_tag(query, city)
+        for raw in raws:
+            if not isinstance(raw, dict):
+                continue
+            stats["raw_events"] += 1
+            e = ge.normalize_event(raw, tag, fetch_og=False)
+            reason = ge.drop_reason(e, tag, city)
+            if reason:
+                stats["drops"][reason] += 1
+                continue
+            e.pop("image_candidates", None)
+            tz = event_windows.ZoneInfo(PROFILES[city]["timezone"])
+            event_windows.annotate([e], datetime.now(tz), tz)
+            e["city"] = city
+            events.append(e)
+
+    def take_places(raws, reject):
+        for p in raws:
+            if not _is_raw_place(p):
+                continue
+            stats["raw_places"] += 1
+            reason = reject(p)
+            if reason:
+                stats["place_drops"][reason] += 1
+                continue
+            places[p["id"]] = gp.better(places.get(p["id"], p), p)
+
+    try:
+        for doc in _documents(Path(path)):
+            stats["docs"] += 1
+            parts = None
+            if isinstance(doc, dict) and "parts" in doc and "value" in doc:
+                parts, doc = doc["parts"], doc["value"]
+            if isinstance(doc, dict) and "events_results" in doc:
+                take_events(doc.get("events_results") or [], *_event_context(doc, parts, default_city))
+            elif isinstance(doc, dict) and "places" in doc:
+                take_places(doc.get("places") or [], places_reject(parts))
+            elif _is_raw_event(doc):
+                take_events([doc], default_city, None)
+            elif _is_raw_place(doc):
+                take_places([doc], places_reject(None))
+            elif isinstance(doc, list) and doc:
+                if _is_raw_event(doc[0]):
+                    take_events(doc, default_city, None)
+                elif _is_raw_place(doc[0]):
+                    take_places(doc, places_reject(None))
+    except (OSError, ValueError, EOFError) as e:
+        stats["errors"].append(f"{type(e).__name__}: {e}")
+
+    return {"events": events, "places": places, "stats": stats}
+
+def _run_file(args):
+    return process_file(*args)
+
+# ---------------- Merge ----------------
+def merge(results, future_only: bool = False) -> dict:
+    """Combine per-file results in input order, then dedupe like the live run."""
+    drops, place_drops, per_city = Counter(), Counter(), {}
+    places, totals = {}, Counter()
+    errors = []
+    for r in results:
+        s = r["stats"]
+        drops.update(s["drops"])
+        place_drops.update(s["place_drops"])
+        totals.update({k: s[k] for k in ("docs", "raw_events", "raw_places")})
+        errors.extend(f"{s['file']}: {err}" for err in s["errors"])
+        for e in r["events"]:
+            per_city.setdefault(e["city"], []).append(e)
+        for pid, p in r["places"].items():
+            places[pid] = gp.better(places.get(pid, p), p)
+
+    events_by_city = {}
+    for city, evs in per_city.items():
+        kept = ge.deduplicate(evs)
+        drops["duplicate"] += len(evs) - len(kept)
+        if future_only:
+            future = ge.filter_future(kept)
+            drops["past"] += len(kept) - len(future)
+            kept = future
+        events_by_city[city] = ge.sort_by_start(kept)
+
+    place_drops.update(r for r in map(gp.drop_reason, places.values()) if r)
+    # no key: archived output must neither leak it nor carry "key=None"
+    transformed = gp.transform(places, api_key=None)
+    return {
+        "events": events_by_city,
+        "places": transformed,
+        "stats": {
+            **totals,
+            "events_kept": {c: len(v) for c, v in events_by_city.items()},
+            "event_drops": dict(drops.most_common()),
+            "places_unique": len(places),
+            "places_kept": len(transformed),
+            "place_drops": dict(place_drops.most_common()),
+            "errors": errors,
+        },
+    }
+
+# ---------------- Output ----------------
+def _strip(e: dict) -> dict:
+    return {k: v for k, v in e.items() if k not in ge.UNPUBLISHED_FIELDS}
+
+def write_outputs(merged: dict, out_dir: Path, meta: dict):
+    out_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+    def dump(name, payload):
+        path = out_dir / name
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, path)
+        written.append(path)
+
+    for city, evs in merged["events"].items():
+        dump(Path(PROFILES[city]["out_path"]).name, {**meta, "city": PROFILES[city]["city"],
+                                                     "events": [_strip(e) for e in evs]})
+    if merged["places"] or merged["stats"]["raw_places"]:
+        dump("places.json", {**meta, "places": merged["places"]})
+    dump("stats.json", {**meta, **merged["stats"]})
+    return written
+
+def print_stats(stats: dict):
+    print(f"📦 {stats.get('docs', 0)} documents: {stats.get('raw_events', 0)} raw events, "
+          f"{stats.get('raw_places', 0)} raw places")
+    for city, n in stats["events_kept"].items():
+        print(f"  ✅ [{city}] {n} events kept")
+    for rule, n in stats["event_drops"].items():
+        print(f"  🚫 {rule:<16} {n:>7}")
+    if stats.get("raw_places"):
+        print(f"  🏪 places: {stats['places_unique']} unique, {stats['places_kept']} kept")
+        for rule, n in stats["place_drops"].items():
+            print(f"  🚫 {rule:<16} {n:>7}")
+    for err in stats["errors"]:
+        print(f"  ⚠️ {err}")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Re-run normalize/filter/dedupe over archived raw API responses (no API calls)")
+    ap.add_argument("paths", nargs="+", help="archive files or directories (*.json, *.jsonl, optionally .gz)")
+    ap.add_argument("--out", default=str(OUT_DIR), help="output directory")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--city", default=DEFAULT_CITY, choices=sorted(PROFILES),
+                    help="city for responses that don't say (no search_parameters)")
+    ap.add_argument("--tag", choices=("music", "general"), default=None,
+                    help="filter every event as this bucket instead of inferring it from the query")
+    ap.add_argument("--future-only", action="store_true", help="also drop events that have already ended")
+    args = ap.parse_args(argv)
+
+    files = archive_files(args.paths)
+    if not files:
+        ap.error("no archive files found")
+    print(f"🗂️ Backfilling {len(files)} file(s) on {args.workers} worker(s)")
+
+    started = datetime.now()
+    jobs = [(f, args.city, args.tag) for f in files]
+    if args.workers <= 1:
+        results = list(map(_run_file, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=args.workers) as ex:
+            # ordered results keep dedupe ("first seen wins") independent of scheduling
+            results = list(ex.map(_run_file, jobs, chunksize=max(1, len(jobs) // (args.workers * 8))))
+
+    merged = merge(results, future_only=args.future_only)
+    meta = {"source": "backfill", "generated_at": datetime.utcnow().isoformat() + "Z",
+            "inputs": [str(p) for p in args.paths], "files": len(files)}
+    written = write_outputs(merged, Path(args.out), meta)
+    print_stats(merged["stats"])
+    took = (datetime.now() - started).total_seconds()
+    print(f"✅ Wrote {', '.join(str(p) for p in written)} in {took:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+# benchmarks/bench_hot_paths.py  (per-record cost of the pipeline hot helpers)
+#
+# Times the helpers that run once per candidate record in get_serpapi_events.py
+# and get_places.py against synthetic and recorded fixtures at several sizes,
+# and compares against benchmarks/baseline.json.
+#
+#   python benchmarks/bench_hot_paths.py                     # compare to baseline
+#   python benchmarks/bench_hot_paths.py --update-baseline   # after an intended change
+#   python benchmarks/bench_hot_paths.py --only extract --sizes 1000 --threshold 0.15
+#
+# Every case is timed next to a fixed pure-Python calibration loop and stored
+# as a multiple of it, so a baseline recorded on one machine (or under a
+# different load) still means something on another. A case regresses when
+# its median ratio to baseline across fixtures and sizes exceeds 1 +
+# --threshold (single rows are too noisy on shared CI boxes); exits 1 then.
+import os
+import sys
+import json
+import timeit
+import argparse
+import platform
+import statistics
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("HISTORY_ENABLED", "0")
+
+import fixtures                      # noqa: E402
+import get_places as gp              # noqa: E402
+import get_serpapi_events as ge      # noqa: E402
+import event_extract                 # noqa: E402
+import event_windows                 # noqa: E402
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+DEFAULT_SIZES = (100, 1000, 10000)
+DEFAULT_THRESHOLD = 0.3
+REPEAT = 7
+MIN_RUN_S = 0.01    # grow `number` until one repeat takes at least this long
+
+def calibrate() -> float:
+    """ns for a fixed pure-Python workload (dict/str/loop mix like the helpers)."""
+    def work():
+        d = {}
+        for i in range(2000):
+            k = "k%d" % (i % 97)
+            d[k] = d.get(k, 0) + len(k.lower())
+        return d
+    return _best_ns(work, 1)
+
+def _best_ns(fn, per_call: int, setup=None) -> float:
+    """Best-of-REPEAT ns per item, `fn` processing `per_call` items per call."""
+    timer = timeit.Timer(fn, setup=setup or (lambda: None))
+    number = 1
+    while timer.timeit(number) < MIN_RUN_S and number < 1 << 16:
+        number *= 2
+    return min(timer.repeat(repeat=REPEAT, number=number)) / number / per_call * 1e9
+
+# ---------------- Cases ----------------
+# name -> (fixture kind, per-record function, setup run before each repeat)
+def _hawker_cold(p):
+    # is_hawker memoizes per place; a run sees each place about once
+    gp.CLASSIFIER._hawker_by_id.pop(gp.CLASSIFIER._hawker_key(p), None)
+    return gp.is_hawker_centre_place(p)
+
+def _parse_when(r):
+    f = event_extract.extract(r)
+    return event_windows.parse_when(f["start"] or "", f["end"] or "")
+
+HOTEL_LAT, HOTEL_LNG = gp.LAT, gp.LNG
+
+CASES = {
+    "event_extract.extract": ("raw_events", event_extract.extract, None),
+    "coerce_address": ("raw_events", lambda r: event_extract.coerce_address(r.get("address")), None),
+    "parse_when": ("raw_events", _parse_when, None),
+    "upgrade_googleusercontent": ("raw_events", lambda r: ge.upgrade_googleusercontent(r.get("thumbnail")), None),
+    "is_low_res_proxy": ("raw_events", lambda r: ge.is_low_res_proxy(r.get("thumbnail")), None),
+    "domain_of": ("raw_events", lambda r: ge.domain_of(r.get("link")), None),
+    "should_drop": ("events", lambda e: ge.should_drop(e, "general"), None),
+    "haversine_m": ("places", lambda p: gp.haversine_m(
+        HOTEL_LAT, HOTEL_LNG, p["location"]["latitude"], p["location"]["longitude"]), None),
+    "better": ("place_pairs", lambda ab: gp.better(*ab), None),
+    "is_hawker_centre_place": ("places", _hawker_cold, None),
+}
+
+def build_fixtures(sizes):
+    """{(kind, source, n): records}"""
+    synth_raw = fixtures.synthetic_raw_events(max(sizes))
+    synth_events = fixtures.synthetic_events(max(sizes))
+    synth_places = fixtures.synthetic_places(max(sizes) + 1)
+    rec_raw = fixtures.recorded_raw_events()
+    rec_events = fixtures.recorded_events()
+    rec_places = fixtures.recorded_places()
+
+    out = {}
+    for n in sizes:
+        out[("raw_events", "synthetic", n)] = synth_raw[:n]
+        out[("events", "synthetic", n)] = synth_events[:n]
+        out[("places", "synthetic", n)] = synth_places[:n]
+        out[("place_pairs", "synthetic", n)] = list(zip(synth_places[:n], synth_places[1:n + 1]))
+        if rec_raw:
+            out[("raw_events", "recorded", n)] = fixtures.scale(rec_raw, n)
+        if rec_events:
+            out[("events", "recorded", n)] = fixtures.scale(rec_events, n)
+        if len(rec_places) > 1:
+            places = fixtures.scale(rec_places, n + 1)
+            out[("places", "recorded", n)] = places[:n]
+            out[("place_pairs", "recorded", n)] = list(zip(places[:n], places[1:n + 1]))
+    return out
+
+def time_case(fn, records, setup=None) -> float:
+    """Best-of-REPEAT ns per record."""
+    def run():
+        for r in records:
+            fn(r)
+    return _best_ns(run, len(records), setup)
+
+def run(sizes, only=None) -> dict:
+    """{case key: (ns per record, cost relative to the calibration loop)}"""
+    data = build_fixtures(sizes)
+    results = {}
+    for name, (kind, fn, setup) in CASES.items():
+        if only and only not in name:
+            continue
+        for (k, source, n), records in data.items():
+            if k != kind or not records:
+                continue
+            ns = time_case(fn, records, setup)
+            results[f"{name}|{source}|{n}"] = (ns, ns / calibrate())
+    return results
+
+# ---------------- Baseline ----------------
+def load_baseline(path: Path = BASELINE_PATH):
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+def save_baseline(relative: dict, calib: float, path: Path = BASELINE_PATH):
+    payload = {
+        "python": platform.python_version(),
+        "calibration_ns": round(calib, 1),
+        "relative_cost": {k: round(v, 5) for k, v in sorted(relative.items())},
+    }
+    path.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+
+def compare(results: dict, calib: float, baseline: dict | None):
+    """Rows of (key, ns, baseline in this machine's ns, ratio)."""
+    base = (baseline or {}).get("relative_cost", {})
+    rows = []
+    for key, (ns, rel) in results.items():
+        b = base.get(key)
+        rows.append((key, ns, b * calib, rel / b) if b else (key, ns, None, None))
+    return rows
+
+def regressions(rows, threshold: float) -> dict:
+    """{case: median ratio} for cases over threshold."""
+    by_case = {}
+    for key, _, _, ratio in rows:
+        if ratio is not None:
+            by_case.setdefault(key.split("|")[0], []).append(ratio)
+    medians = {case: statistics.median(r) for case, r in by_case.items()}
+    return {case: m for case, m in medians.items() if m > 1 + threshold}
+
+def print_rows(rows):
+    head = f"{'case':<28} {'fixture':<10} {'n':>6} {'ns/rec':>10} {'baseline':>10} {'Δ':>8}"
+    print(head)
+    print("-" * len(head))
+    for key, ns, base, ratio in rows:
+        name, source, n = key.split("|")
+        delta = "new" if ratio is None else f"{(ratio - 1) * 100:+.0f}%"
+        print(f"{name:<28} {source:<10} {n:>6} {ns:>10.0f} {'-' if base is None else f'{base:.0f}':>10} {delta:>8}")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Micro-benchmarks for per-record pipeline helpers")
+    ap.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                    help="comma-separated fixture sizes")
+    ap.add_argument("--only", help="substring filter on case names")
+    ap.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                    help="flag cases slower than baseline by more than this fraction")
+    ap.add_argument("--update-baseline", action="store_true")
+    ap.add_argument("--json", help="also write raw results to this file")
+    args = ap.parse_args(argv)
+
+    sizes = sorted({int(s) for s in args.sizes.split(",") if s.strip()})
+    calib = calibrate()
+    results = run(sizes, args.only)
+    baseline = load_baseline()
+    rows = compare(results, calib, baseline)
+    print(f"🧪 Python {platform.python_version()}, calibration {calib:.0f} ns"
+          + (f" (baseline {baseline['calibration_ns']:.0f} ns)" if baseline else " (no baseline yet)"))
+    print_rows(rows)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            "calibration_ns": calib,
+            "results": {k: {"ns_per_record": ns, "relative_cost": rel} for k, (ns, rel) in results.items()},
+        }, indent=2), encoding="utf-8")
+
+    if args.update_baseline:
+        merged = dict((baseline or {}).get("relative_cost", {}))
+        merged.update({k: rel for k, (_, rel) in results.items()})
+        save_baseline(merged, calib)
+        print(f"✅ Baseline updated: {BASELINE_PATH}")
+        return 0
+
+    slow = regressions(rows, args.threshold)
+    if slow:
+        for case, m in sorted(slow.items(), key=lambda kv: -kv[1]):
+            print(f"  ⚠️ {case}: median {(m - 1) * 100:+.0f}% vs baseline")
+        print(f"❌ {len(slow)} case(s) regressed by more than {args.threshold:.0%}")
+        return 1
+    print("✅ No regressions")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
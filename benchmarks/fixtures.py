@@ -0,0 +1,190 @@
+# benchmarks/fixtures.py  (synthetic + recorded inputs for bench_hot_paths.py)
+#
+# Synthetic raw events cycle through the payload shapes SerpAPI actually
+# returns (venue as str / dict / list, event_location instead of venue,
+# address as list / dict / str, date as dict / list / str). Recorded events
+# are rebuilt into raw SerpAPI form from public/data/events.json.
+import json
+import random
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+EVENTS_JSON = ROOT / "public" / "data" / "events.json"
+PLACES_JSON = ROOT / "public" / "data" / "places.json"
+
+HOTEL = (1.2764, 103.8446)
+
+VENUES = [
+    "Esplanade Concert Hall", "Singapore Indoor Stadium", "Gardens by the Bay",
+    "Marina Bay Sands Expo", "The Projector", "Capitol Theatre", "Zouk Singapore",
+    "Sentosa Palawan Green", "National Gallery Singapore", "Jewel Changi Airport",
+]
+STREETS = ["1 Esplanade Dr", "2 Stadium Walk", "18 Marina Gardens Dr", "10 Bayfront Ave", "6001 Beach Rd"]
+TITLES = [
+    "Jazz by the Bay", "Night Festival", "Lantern Walk", "Indie Live Sessions", "Food Truck Carnival",
+    "Community Club Karaoke", "HIIT bootcamp", "CISO Summit Asia", "Light to Night", "Interval walk 10k",
+]
+IMAGE_URLS = [
+    "https://lh3.googleusercontent.com/p/AF1QipN{n}=w160-h120-k-no",
+    "https://lh5.googleusercontent.com/p/AF1QipM{n}?s=200",
+    "https://encrypted-tbn0.gstatic.com/images?q=tbn:ANd9Gc{n}",
+    "https://media.example-tickets.com/events/{n}/hero.jpg",
+    "https://www.sistic.com.sg/images/{n}=s120",
+]
+LINKS = [
+    "https://www.sistic.com.sg/events/{n}",
+    "https://www.eventbrite.sg/e/{n}",
+    "https://onepa.gov.sg/events/{n}",
+    "https://www.stubhub.com/event/{n}/",
+]
+
+def _venue_shape(i, venue, street):
+    return [
+        lambda: {"venue": venue},
+        lambda: {"venue": {"name": venue, "rating": 4.5, "reviews": 120}},
+        lambda: {"venue": [{"name": "", "address": [street, "Singapore"]}, venue]},
+        lambda: {"event_location": {"name": venue, "address": street}},
+        lambda: {"event_location": [{"address": [{"name": venue}, street]}]},
+        lambda: {"venue": {"address": {"name": venue}}},
+    ][i % 6]()
+
+def _address_shape(i, venue, street):
+    return [
+        [f"{venue}, {street}", "Singapore"],
+        street,
+        {"address": street},
+        [{"name": venue}, street],
+        None,
+    ][i % 5]
+
+def _date_shape(i, start, when):
+    return [
+        {"start_date": start, "when": when},
+        [{"when": when}, {"start_date": start}],
+        when,
+        {"when": when},
+        [start],
+    ][i % 5]
+
+def synthetic_raw_events(n: int, seed: int = 7) -> list[dict]:
+    rnd = random.Random(seed)
+    out = []
+    for i in range(n):
+        venue, street = rnd.choice(VENUES), rnd.choice(STREETS)
+        day = rnd.randint(1, 28)
+        start = f"Oct {day}"
+        when = f"Sat, {day} Oct, {rnd.randint(1, 11)}:00 – {rnd.randint(1, 11)}:30 pm"
+        raw = {
+            "title": f"{rnd.choice(TITLES)} #{i}",
+            "date": _date_shape(i, start, when),
+            "link": rnd.choice(LINKS).format(n=i),
+            "thumbnail": rnd.choice(IMAGE_URLS).format(n=i),
+            **_venue_shape(i, venue, street),
+        }
+        addr = _address_shape(i, venue, street)
+        if addr is not None:
+            raw["address"] = addr
+        if i % 3 == 0:
+            raw["image"] = rnd.choice(IMAGE_URLS).format(n=i + 1)
+        if i % 2 == 0:
+            raw["ticket_info"] = [{"source": "Tickets", "link": raw["link"], "link_type": "tickets"}]
+        out.append(raw)
+    return out
+
+def _load(path: Path, key: str) -> list[dict]:
+    if not path.exists():
+        return []
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return data.get(key, []) if isinstance(data, dict) else data
+
+def recorded_events() -> list[dict]:
+    """Published events (normalized form) from public/data/events.json."""
+    return _load(EVENTS_JSON, "events")
+
+def recorded_raw_events() -> list[dict]:
+    out = []
+    for e in recorded_events():
+        out.append({
+            "title": e.get("title"),
+            "date": {"start_date": e.get("start"), "when": e.get("end")},
+            "venue": {"name": e.get("venue")},
+            "address": [a for a in (e.get("venue"), e.get("address")) if a],
+            "link": e.get("url"),
+            "thumbnail": e.get("image"),
+            "ticket_info": [{"link": e.get("url")}],
+        })
+    return out
+
+def synthetic_events(n: int, seed: int = 11) -> list[dict]:
+    """Normalized-event dicts as should_drop() sees them."""
+    rnd = random.Random(seed)
+    out = []
+    for i in range(n):
+        venue = rnd.choice(VENUES)
+        out.append({
+            "title": f"{rnd.choice(TITLES)} #{i}",
+            "venue": venue if i % 7 else "Tampines Hub",
+            "address": f"{rnd.choice(STREETS)}, Singapore" if i % 5 else "",
+            "url": rnd.choice(LINKS).format(n=i),
+            "image": rnd.choice(IMAGE_URLS).format(n=i) if i % 9 else "",
+        })
+    return out
+
+PRIMARY_TYPES = [
+    "restaurant", "cafe", "bar", "book_store", "food_court", "chinese_restaurant",
+    "coffee_shop", "japanese_restaurant", "pub", "lodging", "bakery", "wine_bar",
+]
+PLACE_NAMES = [
+    "Maxwell Food Centre", "Tanjong Pagar Plaza Market & Food Centre", "Lau Pa Sat",
+    "Common Man Coffee Roasters", "Atlas Bar", "Books Actually", "Burnt Ends",
+    "Chinatown Complex Hawker", "Amoy Street Food Centre", "The Library", "Kopitiam @ Duo",
+]
+
+def synthetic_places(n: int, seed: int = 13) -> list[dict]:
+    rnd = random.Random(seed)
+    out = []
+    for i in range(n):
+        primary = rnd.choice(PRIMARY_TYPES)
+        out.append({
+            "id": f"ChIJsynthetic{i:06d}",
+            "displayName": {"text": f"{rnd.choice(PLACE_NAMES)} {i}"},
+            "primaryType": primary,
+            "types": [primary, "food", "point_of_interest", "establishment"],
+            "location": {
+                "latitude": HOTEL[0] + rnd.uniform(-0.008, 0.008),
+                "longitude": HOTEL[1] + rnd.uniform(-0.008, 0.008),
+            },
+            "rating": round(rnd.uniform(3.0, 5.0), 1),
+            "userRatingCount": rnd.randint(0, 5000),
+        })
+    return out
+
+def recorded_places() -> list[dict]:
+    """places.json records mapped back to the Places API shape."""
+    out = []
+    for p in _load(PLACES_JSON, "places"):
+        out.append({
+            "id": p.get("place_id"),
+            "displayName": {"text": p.get("name")},
+            "primaryType": p.get("primary_type"),
+            "types": p.get("types") or [],
+            "location": {"latitude": p.get("lat"), "longitude": p.get("lng")},
+            "rating": p.get("rating"),
+            "userRatingCount": p.get("rating_count"),
+        })
+    return out
+
+def scale(records: list[dict], n: int) -> list[dict]:
+    """Cycle `records` up to n items (distinct ids/titles so caches don't collapse them)."""
+    if not records:
+        return []
+    out = []
+    for i in range(n):
+        r = dict(records[i % len(records)])
+        if i >= len(records):
+            if "id" in r:
+                r["id"] = f"{r['id']}~{i}"
+            if "title" in r:
+                r["title"] = f"{r['title']} ~{i}"
+        out.append(r)
+    return out
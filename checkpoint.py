@@ -0,0 +1,106 @@
+# checkpoint.py  (durable per-request / per-stage results for resumable runs)
+#
+# Each pipeline gets a work directory under .cache/checkpoints/<pipeline>/.
+# Successful API responses and finished stage outputs are written there as
+# they complete; a run started with --resume replays them instead of paying
+# for the same calls again. A clean finish removes the directory.
+import os
+import json
+import shutil
+import hashlib
+import threading
+from pathlib import Path
+
+CHECKPOINT_DIR = Path(os.getenv("CHECKPOINT_DIR", ".cache/checkpoints"))
+
+_MISSING = object()
+
+def _key(parts) -> str:
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+def _write_atomic(path: Path, value):
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(value, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+class Checkpoint:
+    """
+    ck = Checkpoint("places", resume=args.resume)
+    data = ck.request(["nearby", body], lambda: post(body))   # cached API call
+    raw  = ck.stage("raw_by_id", collect_raw)                 # cached stage output
+    ck.done()
+    """
+
+    def __init__(self, pipeline: str, resume: bool = False, root: Path = CHECKPOINT_DIR):
+        self.pipeline = pipeline
+        self.dir = Path(root) / pipeline
+        self.resume = resume
+        self.hits = 0
+        self.saved = 0
+        self._lock = threading.Lock()   # events harvests cities on threads
+        if not resume and self.dir.exists():
+            shutil.rmtree(self.dir)
+        (self.dir / "requests").mkdir(parents=True, exist_ok=True)
+        (self.dir / "stages").mkdir(parents=True, exist_ok=True)
+        if resume:
+            n_req = len(list((self.dir / "requests").glob("*.json")))
+            n_stage = len(list((self.dir / "stages").glob("*.json")))
+            print(f"↻ Resuming {pipeline}: {n_req} request(s), {n_stage} stage(s) checkpointed in {self.dir}")
+
+    # ---- low level ----
+    def _load(self, path: Path):
+        if not self.resume or not path.exists():
+            return _MISSING
+        try:
+            with path.open(encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return _MISSING   # torn/corrupt file → redo the work
+
+    def has_request(self, parts) -> bool:
+        return self.resume and (self.dir / "requests" / f"{_key(parts)}.json").exists()
+
+    # ---- public ----
+    def request(self, parts, fn):
+        """Return the checkpointed result for `parts`, or call fn() and persist it.
+        Exceptions from fn() propagate and nothing is saved."""
+        path = self.dir / "requests" / f"{_key(parts)}.json"
+        cached = self._load(path)
+        if cached is not _MISSING:
+            with self._lock:
+                self.hits += 1
+            return cached["value"]
+        value = fn()
+        _write_atomic(path, {"parts": parts, "value": value})
+        with self._lock:
+            self.saved += 1
+        return value
+
+    def stage(self, name: str, fn, encode=None, decode=None):
+        """Like request(), for a whole pipeline stage. encode/decode map the
+        stage output to/from JSON-able data (e.g. datetimes)."""
+        path = self.dir / "stages" / f"{name.replace('/', '_')}.json"
+        cached = self._load(path)
+        if cached is not _MISSING:
+            print(f"↻ Stage '{name}' restored from checkpoint")
+            return decode(cached) if decode else cached
+        value = fn()
+        _write_atomic(path, encode(value) if encode else value)
+        return value
+
+    def done(self):
+        """Run finished and outputs are written: drop the work directory."""
+        shutil.rmtree(self.dir, ignore_errors=True)
+        if self.hits or self.saved:
+            print(f"Checkpoint: {self.hits} request(s) replayed, {self.saved} new request(s) saved")
+
+def add_resume_flag(ap):
+    ap.add_argument(
+        "--resume", action="store_true",
+        help="reuse checkpointed API responses/stages from an interrupted run",
+    )
+    return ap
@@ -0,0 +1,94 @@
+# coverage_planner.py  (adaptive quadtree tiling for capped Places searches)
+#
+# A Places search returns at most N results per circle. In dense areas the
+# single 800 m circle saturates and results silently drop off. The planner
+# queries the full circle first and only splits tiles that come back full
+# into four overlapping sub-circles, recursing until results thin out (or the
+# tile gets too small / the tile budget runs out). Overlaps are merged by
+# place id and anything outside the original circle is discarded.
+import math
+from collections import deque
+
+EARTH_R = 6371000.0
+
+def offset(lat: float, lng: float, north_m: float, east_m: float):
+    dlat = north_m / EARTH_R
+    dlng = east_m / (EARTH_R * math.cos(math.radians(lat)))
+    return lat + math.degrees(dlat), lng + math.degrees(dlng)
+
+def distance_m(lat1, lng1, lat2, lng2) -> float:
+    ph1, ph2 = math.radians(lat1), math.radians(lat2)
+    dph = math.radians(lat2 - lat1)
+    dl = math.radians(lng2 - lng1)
+    a = math.sin(dph/2)**2 + math.cos(ph1)*math.cos(ph2)*math.sin(dl/2)**2
+    return 2 * EARTH_R * math.atan2(math.sqrt(a), math.sqrt(1-a))
+
+def split(lat: float, lng: float, radius: float):
+    """Four circles whose union covers the bounding square of (lat, lng, radius)."""
+    h = radius / 2
+    r = radius * math.sqrt(2) / 2    # circumscribes each quadrant square
+    return [(*offset(lat, lng, dn, de), r) for dn in (h, -h) for de in (h, -h)]
+
+def bounding_rectangle(lat: float, lng: float, radius: float) -> dict:
+    """Places API 'rectangle' viewport enclosing the circle (Text Search restriction)."""
+    lo_lat, lo_lng = offset(lat, lng, -radius, -radius)
+    hi_lat, hi_lng = offset(lat, lng, radius, radius)
+    return {
+        "low": {"latitude": lo_lat, "longitude": lo_lng},
+        "high": {"latitude": hi_lat, "longitude": hi_lng},
+    }
+
+def _place_latlng(p: dict):
+    loc = p.get("location") or {}
+    return loc.get("latitude"), loc.get("longitude")
+
+def plan_coverage(fetch, lat: float, lng: float, radius: float,
+                  min_radius: float = 100.0, max_tiles: int = 25, label: str = "", merge=None):
+    """
+    fetch(lat, lng, radius) -> (places, saturated)
+    merge(a, b) -> the copy to keep when tiles overlap (default: first seen)
+
+    max_tiles caps fetch() calls; a paginating fetch makes several HTTP
+    requests per tile. Returns (places merged by id and clipped to the root
+    circle, stats).
+    """
+    by_id = {}
+    stats = {"tiles": 0, "saturated": 0, "depth": 0, "clipped": 0}
+    queue = deque([(lat, lng, float(radius), 0)])
+
+    while queue and stats["tiles"] < max_tiles:
+        tlat, tlng, tr, depth = queue.popleft()
+        items, saturated = fetch(tlat, tlng, tr)
+        stats["tiles"] += 1
+        stats["depth"] = max(stats["depth"], depth)
+
+        for p in items:
+            pid = p.get("id")
+            if not pid:
+                continue
+            if pid in by_id:
+                if merge:
+                    by_id[pid] = merge(by_id[pid], p)
+                continue
+            plat, plng = _place_latlng(p)
+            if plat is not None and plng is not None and distance_m(lat, lng, plat, plng) > radius:
+                stats["clipped"] += 1
+                continue
+            by_id[pid] = p
+
+        if not saturated:
+            continue
+        stats["saturated"] += 1
+        for clat, clng, cr in split(tlat, tlng, tr):
+            if cr < min_radius:
+                continue
+            # skip sub-tiles that don't touch the root circle at all
+            if distance_m(lat, lng, clat, clng) > radius + cr:
+                continue
+            queue.append((clat, clng, cr, depth + 1))
+
+    stats["unexplored"] = len(queue)
+    stats["places"] = len(by_id)
+    if label:
+        print(f"  tiles[{label}]: {stats}")
+    return list(by_id.values()), stats
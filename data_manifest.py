@@ -0,0 +1,97 @@
+# data_manifest.py  (content hashes of public/data/*.json for the service worker)
+#
+# The service worker (public/sw.js) serves data files from its cache and
+# only re-downloads one when its hash in data/manifest.json has changed.
+# Every pipeline calls update() right after writing its output file:
+#
+#   data_manifest.update("public/data/places.json")
+#
+#   python data_manifest.py            # rebuild from whatever is on disk
+import os
+import json
+import hashlib
+import threading
+from pathlib import Path
+from datetime import datetime, timezone
+
+DATA_DIR = Path("public/data")
+MANIFEST_PATH = DATA_DIR / "manifest.json"
+
+_lock = threading.Lock()   # events harvests several cities on threads
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def file_hash(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()[:16]
+
+def _entry(path: Path) -> dict:
+    return {
+        "hash": file_hash(path),
+        "bytes": path.stat().st_size,
+        "updated_at": _now(),
+    }
+
+def load(manifest_path: Path = MANIFEST_PATH) -> dict:
+    try:
+        data = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if isinstance(data.get("files"), dict):
+            return data
+    except (OSError, ValueError):
+        pass
+    return {"files": {}}
+
+def _write(data: dict, manifest_path: Path):
+    data["generated_at"] = _now()
+    data["files"] = dict(sorted(data["files"].items()))
+    tmp = manifest_path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+    os.replace(tmp, manifest_path)
+
+def update(path, manifest_path: Path = MANIFEST_PATH) -> dict:
+    """Record the current hash of one data file (named relative to the manifest's dir)."""
+    path = Path(path)
+    name = path.resolve().relative_to(manifest_path.parent.resolve()).as_posix()
+    with _lock:
+        data = load(manifest_path)
+        old = data["files"].get(name, {})
+        entry = _entry(path)
+        if old.get("hash") == entry["hash"]:
+            return old      # unchanged: keep updated_at so clients see no churn
+        data["files"][name] = entry
+        _write(data, manifest_path)
+    return entry
+
+def safe_update(path, manifest_path: Path = MANIFEST_PATH):
+    """Pipeline hook: a manifest problem must not fail a data refresh."""
+    try:
+        entry = update(path, manifest_path)
+        print(f"🧾 Manifest: {Path(path).name} → {entry['hash']}")
+        return entry
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Manifest update failed for {path}: {e}")
+        return None
+
+def rebuild(data_dir: Path = DATA_DIR, manifest_path: Path = MANIFEST_PATH) -> dict:
+    with _lock:
+        old = load(manifest_path)["files"]
+        files = {}
+        for p in sorted(data_dir.glob("*.json")):
+            if p.resolve() == manifest_path.resolve():
+                continue
+            name = p.relative_to(data_dir).as_posix()
+            entry = _entry(p)
+            files[name] = old[name] if old.get(name, {}).get("hash") == entry["hash"] else entry
+        data = {"files": files}
+        _write(data, manifest_path)
+    return data
+
+if __name__ == "__main__":
+    out = rebuild()
+    for name, e in out["files"].items():
+        print(f"{name:<32} {e['hash']}  {e['bytes']:>8} B")
+    print(f"✅ Wrote {MANIFEST_PATH}")
@@ -0,0 +1,212 @@
+# event_extract.py  (single-pass field extraction for SerpAPI event payloads)
+#
+# SerpAPI's google_events results are polymorphic: venue may be a string, a
+# dict or a list, event_location may stand in for it, address/date come as
+# str / dict / list, and image/ticket fields nest URLs in dicts or lists.
+# extract() reads every top-level field once, and dispatches on the
+# payload's *shape* (the type of each field) to a plan compiled the first
+# time that shape is seen. A run only ever sees a handful of shapes.
+
+_MISS = object()
+
+def coerce_address(addr):
+    if not addr:
+        return ""
+    if isinstance(addr, str):
+        return addr
+    if isinstance(addr, (list, tuple)):
+        parts = []
+        for x in addr:
+            if isinstance(x, dict):
+                parts.append(coerce_address(x.get("address") or x.get("name") or ""))
+            else:
+                parts.append(str(x))
+        return ", ".join([p for p in parts if p])
+    if isinstance(addr, dict):
+        return str(addr.get("address") or addr.get("name") or "")
+    return str(addr)
+
+def first_string_url(value):
+    if not value:
+        return None
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        for k in ("link", "url", "image", "src"):
+            v = value.get(k)
+            if isinstance(v, str) and v:
+                return v
+    if isinstance(value, (list, tuple)):
+        for item in value:
+            u = first_string_url(item)
+            if u:
+                return u
+    return None
+
+# ---------------- Shapes ----------------
+FIELDS = ("venue", "event_location", "address", "date", "ticket_info", "link", "image", "thumbnail")
+
+def _kind(v) -> str:
+    if v is None:
+        return "none"
+    if isinstance(v, str):
+        return "str"
+    if isinstance(v, dict):
+        return "dict"
+    if isinstance(v, (list, tuple)):
+        return "list"
+    return "other"
+
+# ---- URL fields (ticket_info, link, image, thumbnail) ----
+def _url_str(v):
+    return v or None
+
+def _url_dict(v):
+    for k in ("link", "url", "image", "src"):
+        s = v.get(k)
+        if isinstance(s, str) and s:
+            return s
+    return None
+
+def _url_none(v):
+    return None
+
+URL_BY_KIND = {"str": _url_str, "dict": _url_dict, "list": first_string_url, "none": _url_none, "other": _url_none}
+
+# ---- venue (falls through to event_location when it yields nothing) ----
+def _named_item(items):
+    for item in items:
+        if isinstance(item, dict):
+            name = item.get("name") or coerce_address(item.get("address"))
+            if name:
+                return name
+        elif isinstance(item, str) and item.strip():
+            return item.strip()
+    return _MISS
+
+def _venue_str(v):
+    s = v.strip()
+    return s if s else _MISS
+
+def _venue_dict(v):
+    name = v.get("name") or v.get("address")
+    if isinstance(name, dict):
+        name = name.get("name") or name.get("address")
+    return str(name) if name else _MISS
+
+def _venue_miss(v):
+    return _MISS
+
+VENUE_BY_KIND = {"str": _venue_str, "dict": _venue_dict, "list": _named_item, "none": _venue_miss, "other": _venue_miss}
+
+def _el_str(el):
+    return el
+
+def _el_dict(el):
+    return el.get("name") or coerce_address(el.get("address"))
+
+def _el_list(el):
+    name = _named_item(el)
+    return "" if name is _MISS else name
+
+def _el_empty(el):
+    return ""
+
+EL_VENUE_BY_KIND = {"str": _el_str, "dict": _el_dict, "list": _el_list, "none": _el_empty, "other": _el_empty}
+
+# ---- address (event_location only when address is empty) ----
+def _el_addr_dict(el):
+    return coerce_address(el.get("address") or el.get("name"))
+
+def _el_addr_list(el):
+    for item in el:
+        if isinstance(item, dict):
+            s = coerce_address(item.get("address") or item.get("name"))
+            if s:
+                return s
+        elif isinstance(item, str) and item.strip():
+            return item.strip()
+    return ""
+
+EL_ADDR_BY_KIND = {"str": _el_empty, "dict": _el_addr_dict, "list": _el_addr_list, "none": _el_empty, "other": _el_empty}
+
+# ---- date -> (start, end) ----
+def _dates_dict(d):
+    when = d.get("when")
+    return d.get("start_date") or when, d.get("end_date") or when
+
+def _dates_list(d):
+    start = end = _MISS
+    for item in d:
+        if isinstance(item, dict):
+            when = item.get("when")
+            if start is _MISS and (item.get("start_date") or when):
+                start = item.get("start_date") or when
+            if end is _MISS and (item.get("end_date") or when):
+                end = item.get("end_date") or when
+        elif isinstance(item, str):
+            if start is _MISS:
+                start = item
+            if end is _MISS:
+                end = item
+        if start is not _MISS and end is not _MISS:
+            break
+    return (None if start is _MISS else start), (None if end is _MISS else end)
+
+def _dates_str(d):
+    return d, d
+
+def _dates_none(d):
+    return None, None
+
+DATES_BY_KIND = {"str": _dates_str, "dict": _dates_dict, "list": _dates_list, "none": _dates_none, "other": _dates_none}
+
+# ---------------- Compiled plans ----------------
+# Plans are keyed by the exact type of each field (cheap to compute in C);
+# _kind() only runs once per new shape, when the plan is compiled.
+_PLANS = {}
+MAX_PLANS = 256     # real payloads use a handful; don't grow without bound on junk
+
+def _compile(shape):
+    venue_k, el_k, addr_k, date_k, ti_k, link_k, image_k, thumb_k = shape
+    venue_fn = VENUE_BY_KIND[venue_k]
+    el_venue_fn = EL_VENUE_BY_KIND[el_k]
+    el_addr_fn = EL_ADDR_BY_KIND[el_k]
+    dates_fn = DATES_BY_KIND[date_k]
+    ticket_fn, link_fn = URL_BY_KIND[ti_k], URL_BY_KIND[link_k]
+    image_fn, thumb_fn = URL_BY_KIND[image_k], URL_BY_KIND[thumb_k]
+
+    def plan(venue, el, addr, date, ticket_info, link, image, thumb):
+        v = venue_fn(venue)
+        if v is _MISS:
+            v = el_venue_fn(el)
+        start, end = dates_fn(date)
+        return {
+            "start": start,
+            "end": end,
+            "venue": v,
+            "address": coerce_address(addr) if addr else el_addr_fn(el),
+            "ticket": ticket_fn(ticket_info) or link_fn(link),
+            "image_url": image_fn(image),
+            "thumbnail_url": thumb_fn(thumb),
+        }
+    return plan
+
+def extract(raw: dict) -> dict:
+    """
+    All normalized source fields of one raw SerpAPI event in one visit:
+    start, end, venue, address, ticket, image_url, thumbnail_url.
+    """
+    g = raw.get
+    values = (g("venue"), g("event_location"), g("address"), g("date") or {},
+              g("ticket_info"), g("link"), g("image"), g("thumbnail"))
+    key = tuple(map(type, values))
+    plan = _PLANS.get(key)
+    if plan is None:
+        plan = _compile(tuple(map(_kind, values)))
+        if len(_PLANS) < MAX_PLANS:
+            _PLANS[key] = plan
+    return plan(*values)
+
+def shapes_seen() -> int:
+    return len(_PLANS)
@@ -0,0 +1,136 @@
+# event_locales.py  (per-city profiles for the SerpAPI events harvester)
+#
+# One profile per property city: SerpAPI locale, query templates, locality
+# brands, quota share and output file. get_serpapi_events.py harvests any set
+# of these concurrently in one process:
+#
+#   python get_serpapi_events.py --cities sg,bkk,sha
+#   EVENTS_CITIES=sg,bkk python get_serpapi_events.py
+#
+# Query templates may use {city} and {month_year}.
+
+PROFILES = {
+    "sg": {
+        "city": "Singapore",
+        "serp": {"hl": "en", "gl": "sg", "location": "Singapore"},
+        "timezone": "Asia/Singapore",
+        "origin": {"lat": 1.274907, "lng": 103.8456},   # Amara / Tanjong Pagar, as get_places.py; gives events distance_m
+        "quota_share": 1.0,
+        "out_path": "public/data/events.json",
+        # --- Only Music & General buckets (Family is curated from Places API) ---
+        "queries_by_bucket": {
+            "music": [
+                "concerts in {city} {month_year}",
+                "live music {city} weekend",
+                "DJ events {city}",
+            ],
+            "general": [
+                "festivals in {city} {month_year}",
+                "carnival {city}",
+                "night festival {city}",
+                "street market {city}",
+                "food festival {city}",
+                "lantern festival {city}",
+                "light show {city}",
+                "fireworks {city}",
+                "museum exhibitions {city} {month_year}",
+            ],
+        },
+        # ---- Locality guard: keep only SG-looking items ----
+        "local_brands": {
+            "singapore", "sentosa", "gardens by the bay", "mandai",
+            "bird paradise", "river wonders", "zoo", "esplanade",
+            "artscience museum", "marina bay sands", "science centre",
+            "jewel changi", "nparks", "botanic gardens",
+            "national museum", "asian civilisations museum",
+            "singapore discovery centre", "hortpark", "marina barrage",
+            "children's museum singapore", "science center singapore",
+        },
+        "local_tlds": (".sg",),
+        "block_hosts": {"onepa.gov.sg", "pa.gov.sg"},
+    },
+    "bkk": {
+        "city": "Bangkok",
+        "serp": {"hl": "en", "gl": "th", "location": "Bangkok, Thailand"},
+        "timezone": "Asia/Bangkok",
+        "quota_share": 0.6,
+        "out_path": "public/data/events-bkk.json",
+        "queries_by_bucket": {
+            "music": [
+                "concerts in {city} {month_year}",
+                "live music {city} weekend",
+                "jazz bar live {city}",
+            ],
+            "general": [
+                "festivals in {city} {month_year}",
+                "night market {city}",
+                "art exhibitions {city} {month_year}",
+                "food festival {city}",
+                "temple fair {city}",
+            ],
+        },
+        "local_brands": {
+            "bangkok", "thailand", "sukhumvit", "silom", "siam",
+            "iconsiam", "centralworld", "impact arena", "queen sirikit",
+            "lumpini", "benjakitti", "chatuchak", "jodd fairs",
+            "bacc", "river city", "asiatique",
+        },
+        "local_tlds": (".th",),
+        "block_hosts": set(),
+    },
+    "sha": {
+        "city": "Shanghai",
+        "serp": {"hl": "en", "gl": "cn", "location": "Shanghai, China"},
+        "timezone": "Asia/Shanghai",
+        "quota_share": 0.4,
+        "out_path": "public/data/events-sha.json",
+        "queries_by_bucket": {
+            "music": [
+                "concerts in {city} {month_year}",
+                "live music {city} weekend",
+            ],
+            "general": [
+                "festivals in {city} {month_year}",
+                "museum exhibitions {city} {month_year}",
+                "art exhibitions {city}",
+                "food festival {city}",
+            ],
+        },
+        "local_brands": {
+            "shanghai", "pudong", "the bund", "xintiandi", "jing'an",
+            "mercedes-benz arena", "west bund", "power station of art",
+            "yuz museum", "long museum", "expo park", "hongkou",
+        },
+        "local_tlds": (".cn",),
+        "block_hosts": set(),
+    },
+}
+
+DEFAULT_CITY = "sg"
+
+def queries_for(profile: dict, month_year: str) -> dict:
+    return {
+        tag: [t.format(city=profile["city"], month_year=month_year) for t in templates]
+        for tag, templates in profile["queries_by_bucket"].items()
+    }
+
+def split_quota(codes, total_calls: int) -> dict:
+    """Per-city call budget proportional to quota_share (each city gets at least 1)."""
+    shares = {c: float(PROFILES[c].get("quota_share", 1.0)) for c in codes}
+    weight = sum(shares.values()) or 1.0
+    budget = {c: max(1, int(total_calls * s / weight)) for c, s in shares.items()}
+    # hand out rounding leftovers by share, largest first
+    spare = total_calls - sum(budget.values())
+    for c in sorted(codes, key=lambda c: -shares[c]):
+        if spare <= 0:
+            break
+        budget[c] += 1
+        spare -= 1
+    return budget
+
+def parse_cities(value: str | None) -> list[str]:
+    codes = [c.strip().lower() for c in (value or DEFAULT_CITY).split(",") if c.strip()]
+    unknown = [c for c in codes if c not in PROFILES]
+    if unknown:
+        raise ValueError(f"Unknown city profile(s): {unknown}. Known: {sorted(PROFILES)}")
+    return list(dict.fromkeys(codes))
@@ -0,0 +1,179 @@
+# event_windows.py  (SerpAPI date strings -> epoch times + "when" buckets, SGT)
+#
+# SerpAPI gives dates as display text: start_date "Oct 4" and a "when" line
+# such as "Sat, 4 Oct, 5:00 – 8:00 pm" or "Sat, 4 Oct – Sun, 5 Oct". This
+# turns them into timezone-aware start/end times and precomputes the buckets
+# the frontend filters on, so browsers never parse dates.
+import re
+from datetime import datetime, timedelta, time
+from zoneinfo import ZoneInfo
+
+from dateutil import parser
+
+TZ = ZoneInfo("Asia/Singapore")
+
+BUCKETS = ("today", "tonight", "this_weekend", "next_7_days", "later")
+
+TONIGHT_FROM = time(18, 0)          # "tonight" = 6pm until 4am next day
+TONIGHT_UNTIL_NEXT_DAY = time(4, 0)
+
+RANGE_SPLIT_RE = re.compile(r"\s+[–—-]\s+|\s*[–—]\s*")
+MERIDIEM_RE = re.compile(r"\b(am|pm)\b", re.I)
+DATE_WORD_RE = re.compile(
+    r"\b(jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec|mon|tue|wed|thu|fri|sat|sun)[a-z]*\b", re.I
+)
+HAS_CLOCK_RE = re.compile(r"\d{1,2}:\d{2}|\b\d{1,2}\s*(?:am|pm)\b", re.I)
+BARE_HOUR_RE = re.compile(r"(^|,\s*)(\d{1,2})\s*$")    # "Fri, 10 Oct, 7" / "8" before " – 10 pm"
+YEAR_RE = re.compile(r"\b\d{4}\b")
+
+def now_sgt() -> datetime:
+    return datetime.now(TZ)
+
+def _parse(text: str, default: datetime):
+    default = default.replace(tzinfo=None)
+    try:
+        dt = parser.parse(text, default=default, fuzzy=True)
+    except (ValueError, OverflowError):
+        return None
+    # fuzzy mode reads a stray number as a year ("7" -> 2007); only trust
+    # a year that is actually written out
+    if dt.year != default.year and not YEAR_RE.search(text):
+        try:
+            dt = dt.replace(year=default.year)
+        except ValueError:
+            return None
+    return dt
+
+def _roll_year(dt: datetime, now: datetime) -> datetime:
+    # "Jan 5" seen in December means next January
+    if dt < now.replace(tzinfo=None) - timedelta(days=120):
+        try:
+            return dt.replace(year=dt.year + 1)
+        except ValueError:
+            return dt
+    return dt
+
+def parse_when(start_str: str, when_str: str, now: datetime | None = None, tz: ZoneInfo = TZ):
+    """
+    Returns (start, end) as aware datetimes in `tz` (default Asia/Singapore),
+    or (None, None). All-day events span 00:00 → 23:59 of their (last) day.
+    """
+    now = now or datetime.now(tz)
+    base = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    start_day = _parse(start_str, base) if start_str else None
+    if start_day:
+        start_day = _roll_year(start_day.replace(hour=0, minute=0), now)
+
+    text = (when_str or "").strip()
+    if not text or not (DATE_WORD_RE.search(text) or HAS_CLOCK_RE.search(text)):
+        if not start_day:
+            return None, None
+        return start_day.replace(tzinfo=tz), start_day.replace(hour=23, minute=59, tzinfo=tz)
+
+    parts = RANGE_SPLIT_RE.split(text, maxsplit=1)
+    left = parts[0]
+    right = parts[1] if len(parts) > 1 else ""
+
+    # "7 – 10 pm": a bare leading hour is a clock time (it takes the right
+    # side's am/pm below), not a day or a year
+    if right and HAS_CLOCK_RE.search(right) and not DATE_WORD_RE.search(right):
+        m = BARE_HOUR_RE.search(left)
+        if m and int(m.group(2)) <= 23:
+            left = f"{left[:m.start()]}{m.group(1)}{m.group(2)}:00"
+
+    day = start_day or base.replace(tzinfo=None)
+    left_has_date = bool(DATE_WORD_RE.search(left))
+    left_dt = _parse(left, day)
+    if left_dt is None:
+        return (start_day.replace(tzinfo=tz), start_day.replace(hour=23, minute=59, tzinfo=tz)) if start_day else (None, None)
+    if left_has_date:
+        left_dt = _roll_year(left_dt, now)
+    left_has_clock = bool(HAS_CLOCK_RE.search(left))
+
+    if not right:
+        start = left_dt if left_has_clock else left_dt.replace(hour=0, minute=0)
+        end = start + timedelta(hours=2) if left_has_clock else left_dt.replace(hour=23, minute=59)
+        return start.replace(tzinfo=tz), end.replace(tzinfo=tz)
+
+    right_has_date = bool(DATE_WORD_RE.search(right))
+    right_has_clock = bool(HAS_CLOCK_RE.search(right))
+    right_dt = _parse(right, left_dt.replace(hour=0, minute=0))
+    if right_dt is None:
+        right_dt = left_dt
+    elif right_has_date:
+        right_dt = _roll_year(right_dt, now)
+
+    # "5:00 – 8:00 pm": the left side inherits the right side's meridiem
+    if left_has_clock and not MERIDIEM_RE.search(left):
+        m = MERIDIEM_RE.search(right)
+        if m and m.group(1).lower() == "pm" and left_dt.hour < 12:
+            left_dt = left_dt.replace(hour=left_dt.hour + 12)
+        if left_dt.hour >= 12 and right_dt.hour < left_dt.hour and not right_has_date:
+            left_dt = left_dt.replace(hour=left_dt.hour - 12)   # "11:00 – 2:00 pm"
+
+    start = left_dt if left_has_clock else left_dt.replace(hour=0, minute=0)
+    if right_has_clock:
+        end = right_dt
+        if not right_has_date and end <= start:
+            end += timedelta(days=1)      # runs past midnight
+    else:
+        end = right_dt.replace(hour=23, minute=59)
+    if end < start:
+        end = start.replace(hour=23, minute=59)
+    return start.replace(tzinfo=tz), end.replace(tzinfo=tz)
+
+def _overlaps(start, end, lo, hi) -> bool:
+    return start < hi and end > lo
+
+def buckets_for(start: datetime, end: datetime, now: datetime | None = None) -> list[str]:
+    now = now or now_sgt()
+    day0 = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    day1 = day0 + timedelta(days=1)
+    out = []
+
+    if _overlaps(start, end, max(now, day0), day1):
+        out.append("today")
+
+    tonight_lo = max(now, day0.replace(hour=TONIGHT_FROM.hour, minute=TONIGHT_FROM.minute))
+    tonight_hi = day1.replace(hour=TONIGHT_UNTIL_NEXT_DAY.hour)
+    if _overlaps(start, end, tonight_lo, tonight_hi):
+        out.append("tonight")
+
+    # Fri 17:00 → Mon 00:00 of this week (or the coming one, Mon–Thu)
+    wd = day0.weekday()   # Mon=0
+    fri = day0 + timedelta(days=(4 - wd) % 7) if wd <= 4 else day0 - timedelta(days=wd - 4)
+    wk_lo = max(now, fri.replace(hour=17))
+    wk_hi = fri + timedelta(days=3)
+    if _overlaps(start, end, wk_lo, wk_hi):
+        out.append("this_weekend")
+
+    if _overlaps(start, end, now, day0 + timedelta(days=7)):
+        out.append("next_7_days")
+    elif start >= day0 + timedelta(days=7):
+        out.append("later")
+    return out
+
+def annotate(events: list[dict], now: datetime | None = None, tz: ZoneInfo = TZ):
+    """
+    Parses each event's start / end display strings once and adds start_ts /
+    end_ts (epoch seconds) in place; None when the dates can't be parsed.
+    """
+    now = now or datetime.now(tz)
+    for e in events:
+        start, end = parse_when(e.get("start") or "", e.get("end") or "", now, tz)
+        e["start_ts"] = int(start.timestamp()) if start else None
+        e["end_ts"] = int(end.timestamp()) if start else None
+
+def bucket_index(events: list[dict], now: datetime | None = None, tz: ZoneInfo = TZ) -> dict:
+    """{bucket: [positions in `events`]} for annotated events, as of `now`."""
+    now = now or datetime.now(tz)
+    index = {b: [] for b in BUCKETS}
+    for i, e in enumerate(events):
+        if e.get("start_ts") is None:
+            continue
+        start = datetime.fromtimestamp(e["start_ts"], tz)
+        end = datetime.fromtimestamp(e["end_ts"], tz)
+        for b in buckets_for(start, end, now):
+            index[b].append(i)
+    return index
@@ -0,0 +1,165 @@
+# field_masks.py  (Places field masks derived from output schemas + response metrics)
+#
+# Each pipeline declares the output fields it writes and which Places fields
+# each one is built from. The X-Goog-FieldMask is generated from that, so it
+# can't drift from the transform, and the SKU tier the mask bills at is
+# reported (and optionally capped with PLACES_MAX_SKU_TIER).
+#
+# Requests also go through one keep-alive session that negotiates gzip, and
+# every response is metered (wire bytes vs decoded JSON bytes).
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# ---------------- SKU tiers (Places API New, Text/Nearby Search) ----------------
+SKU_TIERS = ["ids_only", "essentials", "pro", "enterprise", "enterprise_atmosphere"]
+
+FIELD_TIERS = {
+    # IDs only
+    "id": "ids_only",
+    "name": "ids_only",
+    "attributions": "ids_only",
+    # Pro
+    "displayName": "pro",
+    "formattedAddress": "pro",
+    "shortFormattedAddress": "pro",
+    "location": "pro",
+    "viewport": "pro",
+    "photos": "pro",
+    "types": "pro",
+    "primaryType": "pro",
+    "primaryTypeDisplayName": "pro",
+    "googleMapsUri": "pro",
+    "businessStatus": "pro",
+    "plusCode": "pro",
+    # Enterprise
+    "rating": "enterprise",
+    "userRatingCount": "enterprise",
+    "priceLevel": "enterprise",
+    "websiteUri": "enterprise",
+    "currentOpeningHours": "enterprise",
+    "regularOpeningHours": "enterprise",
+    "nationalPhoneNumber": "enterprise",
+    # Enterprise + Atmosphere
+    "editorialSummary": "enterprise_atmosphere",
+    "reviews": "enterprise_atmosphere",
+    "servesCoffee": "enterprise_atmosphere",
+    "servesBeer": "enterprise_atmosphere",
+    "outdoorSeating": "enterprise_atmosphere",
+}
+
+# Nearby Search has no IDs-only SKU; its cheapest tier is Pro.
+ENDPOINT_MIN_TIER = {
+    "searchText": "ids_only",
+    "searchNearby": "pro",
+}
+
+# Repeated fields where selecting a sub-field actually shrinks the payload
+# (e.g. photos.name instead of every photo's authorAttributions).
+SUBFIELD_OK = {"photos"}
+
+MAX_SKU_TIER = os.getenv("PLACES_MAX_SKU_TIER")   # e.g. "pro" to refuse Enterprise fields
+
+def _tier_rank(tier: str) -> int:
+    return SKU_TIERS.index(tier)
+
+def _mask_path(source: str) -> str:
+    top, _, sub = source.partition(".")
+    return f"{top}.{sub}" if sub and top in SUBFIELD_OK else top
+
+def fields_for(schema: dict, extra=()) -> list[str]:
+    """Unique Places field paths needed by an output schema (output -> [source paths])."""
+    paths = []
+    for sources in schema.values():
+        paths.extend(_mask_path(s) for s in sources)
+    paths.extend(_mask_path(s) for s in extra)
+    # A bare "photos" supersedes "photos.name"
+    out = dict.fromkeys(paths)
+    return [p for p in out if "." not in p or p.split(".")[0] not in out]
+
+def sku_tier(fields, endpoint: str = "searchText") -> str:
+    rank = _tier_rank(ENDPOINT_MIN_TIER.get(endpoint, "ids_only"))
+    for f in fields:
+        rank = max(rank, _tier_rank(FIELD_TIERS.get(f.split(".")[0], "enterprise_atmosphere")))
+    return SKU_TIERS[rank]
+
+def field_mask(schema: dict, endpoint: str = "searchText", extra=(), paging: bool = False,
+               max_tier: str | None = MAX_SKU_TIER, required=()) -> str:
+    """
+    `required` names the Places fields the pipeline's transform can't do
+    without (e.g. it filters on rating): a tier cap that would drop one of
+    them raises instead of silently producing an empty output.
+    """
+    fields = fields_for(schema, extra)
+    if max_tier:
+        cap = _tier_rank(max_tier)
+        dropped = [f for f in fields if _tier_rank(FIELD_TIERS.get(f.split(".")[0], "enterprise_atmosphere")) > cap]
+        needed = sorted({f.split(".")[0] for f in dropped} & {r.split(".")[0] for r in required})
+        if needed:
+            raise ValueError(
+                f"PLACES_MAX_SKU_TIER={max_tier} would drop {needed} from the {endpoint} field mask, "
+                f"but they are required (tier '{sku_tier(needed, endpoint)}'). Raise the cap or unset it."
+            )
+        if dropped:
+            print(f"⚠️ Field mask capped at '{max_tier}': dropping {dropped}")
+            fields = [f for f in fields if f not in dropped]
+    mask = [f"places.{f}" for f in fields]
+    if paging:
+        mask.append("nextPageToken")
+    return ",".join(mask)
+
+def describe_mask(mask: str, endpoint: str = "searchText") -> str:
+    fields = [f[len("places."):] for f in mask.split(",") if f.startswith("places.")]
+    return f"Field mask ({endpoint}, SKU tier '{sku_tier(fields, endpoint)}'): {', '.join(fields)}"
+
+# ---------------- Session + response metrics ----------------
+# Google APIs only gzip responses when the User-Agent contains "gzip".
+USER_AGENT = "amara-concierge/1.0 (gzip)"
+
+_session = None
+_session_lock = threading.Lock()
+
+def api_session() -> requests.Session:
+    """Shared keep-alive session that asks for compressed responses."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            s = requests.Session()
+            s.headers.update({"Accept-Encoding": "gzip", "User-Agent": USER_AGENT})
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _session = s
+    return _session
+
+RESPONSE_STATS = {}
+_stats_lock = threading.Lock()
+
+def meter(label: str, r: requests.Response) -> requests.Response:
+    """Record wire vs decoded size of a (fully read) response under `label`."""
+    body = len(r.content)
+    wire = r.headers.get("Content-Length")
+    try:
+        wire = int(wire) if wire is not None else r.raw.tell()
+    except (TypeError, ValueError, AttributeError):
+        wire = body
+    with _stats_lock:
+        st = RESPONSE_STATS.setdefault(label, {"calls": 0, "wire_bytes": 0, "json_bytes": 0, "gzip": 0})
+        st["calls"] += 1
+        st["wire_bytes"] += wire or 0
+        st["json_bytes"] += body
+        if "gzip" in (r.headers.get("Content-Encoding") or ""):
+            st["gzip"] += 1
+    return r
+
+def reset_response_stats():
+    with _stats_lock:
+        RESPONSE_STATS.clear()
+
+def print_response_stats():
+    for label, st in RESPONSE_STATS.items():
+        ratio = (st["json_bytes"] / st["wire_bytes"]) if st["wire_bytes"] else 0
+        print(f"Responses [{label}]: {st['calls']} call(s), {st['wire_bytes']/1024:.1f} KB on the wire, "
+              f"{st['json_bytes']/1024:.1f} KB JSON (x{ratio:.1f}), gzip {st['gzip']}/{st['calls']}")
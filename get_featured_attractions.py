@@ -1,22 +1,49 @@
 # get_featured_attractions.py  (Places API NEW – with ratings)
-import os, json, requests
+import os, json, argparse, requests, functools
 from pathlib import Path
 from datetime import datetime
 
+import history_store
+import data_manifest
+from checkpoint import Checkpoint, add_resume_flag
+from field_masks import field_mask, describe_mask, api_session, meter, print_response_stats
+
 API_KEY = os.getenv("GOOGLE_API_KEY")
-if not API_KEY:
-    raise RuntimeError("GOOGLE_API_KEY is not set")
+
+def require_api_key():
+    if not API_KEY:
+        raise RuntimeError("GOOGLE_API_KEY is not set")
 
 BASE = "https://places.googleapis.com/v1"
-HEADERS = {
-    "X-Goog-Api-Key": API_KEY,
-    # ⬇️ ask for rating + userRatingCount as well
-    "X-Goog-FieldMask": (
-        "places.displayName,places.id,places.formattedAddress,"
-        "places.location,places.googleMapsUri,places.photos,"
-        "places.rating,places.userRatingCount"
-    ),
+
+# Output schema: attraction field -> Places fields it is built from.
+# Only photos[0].name is used, so don't pay for every photo's attributions.
+ATTRACTION_SCHEMA = {
+    "title": ["displayName"],
+    "address": ["formattedAddress"],
+    "lat": ["location"],
+    "lng": ["location"],
+    "maps_url": ["googleMapsUri"],
+    "photo_url": ["photos.name"],
+    "rating": ["rating"],
+    "rating_count": ["userRatingCount"],
+    "category": [],
+    "source": [],
 }
+# The attraction filters need rating and photos; location places them on the map
+REQUIRED_FIELDS = ("rating", "photos", "location")
+
+# Built on first use (main() asks up front), so a bad PLACES_MAX_SKU_TIER
+# fails this run instead of every import of the module
+@functools.cache
+def request_mask() -> str:
+    return field_mask(ATTRACTION_SCHEMA, endpoint="searchText", required=REQUIRED_FIELDS)
+
+def _headers():
+    return {
+        "X-Goog-Api-Key": API_KEY,
+        "X-Goog-FieldMask": request_mask(),
+    }
 
 QUERIES = [
     "Flower Dome Gardens by the Bay",
@@ -37,6 +64,9 @@ QUERIES = [
 OUT_JSON = Path("public/data/featured_attractions.json")
 OUT_JSON.parent.mkdir(parents=True, exist_ok=True)
 
+# Set by main(); None means "no checkpointing" (e.g. when imported)
+CHECKPOINT = None
+
 def search_place(q: str):
     body = {
         "textQuery": f"{q}, Singapore",
@@ -48,9 +78,12 @@ def search_place(q: str):
             }
         },
     }
-    r = requests.post(f"{BASE}/places:searchText", json=body, headers=HEADERS, timeout=30)
-    r.raise_for_status()
-    places = r.json().get("places", []) or []
+    def call():
+        r = api_session().post(f"{BASE}/places:searchText", json=body, headers=_headers(), timeout=30)
+        r.raise_for_status()
+        return meter("places:searchText", r).json()
+    data = CHECKPOINT.request(["searchText", body], call) if CHECKPOINT else call()
+    places = data.get("places", []) or []
     return places[0] if places else None
 
 def photo_media_url(place: dict) -> str | None:
@@ -62,7 +95,7 @@ def photo_media_url(place: dict) -> str | None:
 
 def normalize(p: dict):
     loc = p.get("location") or {}
-    return {
+    record = {
         "title": (p.get("displayName") or {}).get("text"),
         "address": p.get("formattedAddress"),
         "lat": loc.get("latitude"),
@@ -74,8 +107,15 @@ def normalize(p: dict):
         "category": "family_featured",
         "source": "places_api_new",
     }
+    return {k: record[k] for k in ATTRACTION_SCHEMA}
+
+def main(argv=None):
+    global CHECKPOINT
+    args = add_resume_flag(argparse.ArgumentParser(description="Refresh featured_attractions.json")).parse_args(argv)
+    require_api_key()
+    print(describe_mask(request_mask(), "searchText"))
+    CHECKPOINT = Checkpoint("attractions", resume=args.resume)
 
-def main():
     results = []
     for q in QUERIES:
         print(f"🔎 Finding: {q}")
@@ -94,6 +134,12 @@ def main():
     payload = {"generated_at": datetime.utcnow().isoformat() + "Z", "attractions": results}
     OUT_JSON.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
     print(f"✅ Saved {len(results)} attractions to {OUT_JSON}")
+    data_manifest.safe_update(OUT_JSON)
+    print_response_stats()
+
+    history_store.safe_record_run("attractions", results, meta={"queries": len(QUERIES)})
+    CHECKPOINT.done()
+    CHECKPOINT = None
 
 if __name__ == "__main__":
     main()
@@ -1,11 +1,20 @@
 import os
 import json
 import math
+import functools
 import time
+import argparse
 from datetime import datetime, timezone
 import requests
 from pathlib import Path
 
+import history_store
+import data_manifest
+from checkpoint import Checkpoint, add_resume_flag
+from place_classifier import PlaceClassifier, CATEGORY_BITS
+from coverage_planner import plan_coverage, bounding_rectangle
+from field_masks import field_mask, describe_mask, api_session, meter, print_response_stats
+
 # --- Load .env locally if present (optional) ---
 env_path = Path(".env")
 if env_path.exists():
@@ -16,11 +25,13 @@ if env_path.exists():
         pass
 
 API_KEY = os.getenv("GOOGLE_API_KEY")
-if not API_KEY:
-    raise RuntimeError(
-        "GOOGLE_API_KEY is not set. "
-        "Locally: put it in a .env file. On GitHub: set as repo secret and expose to workflow."
-    )
+
+def require_api_key():
+    if not API_KEY:
+        raise RuntimeError(
+            "GOOGLE_API_KEY is not set. "
+            "Locally: put it in a .env file. On GitHub: set as repo secret and expose to workflow."
+        )
 
 # --- Location & radius (meters) ---
 LAT, LNG = 1.274907, 103.8456     # Amara / Tanjong Pagar area
@@ -29,28 +40,43 @@ RADIUS_METERS = 800
 NEARBY_URL = "https://places.googleapis.com/v1/places:searchNearby"
 TEXT_URL   = "https://places.googleapis.com/v1/places:searchText"
 
-# Ask only for fields the front end needs (+ nextPageToken for paging)
-FIELD_MASK = ",".join([
-    "places.id",
-    "places.displayName",
-    "places.rating",
-    "places.userRatingCount",
-    "places.formattedAddress",
-    "places.googleMapsUri",
-    "places.photos.name",
-    "places.photos.widthPx",
-    "places.photos.heightPx",
-    "places.types",
-    "places.primaryType",
-    "places.location",            # <-- needed for distance
-    "nextPageToken",
-])
-
-def _headers():
+# Output schema: places.json field -> Places fields it is built from.
+# The field mask is derived from this (see field_masks.py), so only what the
+# front end needs is requested — and transform() emits exactly these keys.
+PLACES_SCHEMA = {
+    "name": ["displayName"],
+    "rating": ["rating"],
+    "rating_count": ["userRatingCount"],
+    "address": ["formattedAddress"],
+    "place_id": ["id"],
+    "maps_url": ["googleMapsUri"],
+    "photo_url": ["photos.name"],
+    "types": ["types"],
+    "primary_type": ["primaryType"],
+    "lat": ["location"],                 # <-- needed for distance
+    "lng": ["location"],
+    "distance_m": ["location"],
+    "is_hawker_centre": ["primaryType", "types", "displayName"],
+    "category_mask": ["primaryType", "types", "displayName"],
+}
+
+# transform() filters on rating, skips places without photos and needs location for distance
+REQUIRED_FIELDS = ("rating", "photos", "location")
+
+# Built on first use (main() asks up front) rather than at import: a bad
+# PLACES_MAX_SKU_TIER should fail this run, not every module importing this one
+@functools.cache
+def request_masks() -> dict:
+    return {
+        "searchNearby": field_mask(PLACES_SCHEMA, endpoint="searchNearby", paging=True, required=REQUIRED_FIELDS),
+        "searchText": field_mask(PLACES_SCHEMA, endpoint="searchText", required=REQUIRED_FIELDS),
+    }
+
+def _headers(mask):
     return {
         "Content-Type": "application/json",
         "X-Goog-Api-Key": API_KEY,
-        "X-Goog-FieldMask": FIELD_MASK,
+        "X-Goog-FieldMask": mask,
     }
 
 # ---------------- Buckets (includedTypes) ----------------
@@ -132,12 +158,6 @@ HAWKER_NAME_KEYWORDS = (
 
 EXCLUDED_PRIMARY = {"lodging"}   # and anything containing "hotel"}
 
-def is_allowed_primary(primary: str) -> bool:
-    p = (primary or "").lower()
-    if p in EXCLUDED_PRIMARY or "hotel" in p:
-        return False
-    return True
-
 # Per-bucket primaryType restriction (None => no extra restriction)
 ALLOWED_PRIMARY = {
     "bookstores": {"book_store"},   # STRICT: only true bookstores
@@ -146,6 +166,18 @@ ALLOWED_PRIMARY = {
     "bars": None,
 }
 
+# All of the above compiled once into set lookups / single-pass name matchers
+CLASSIFIER = PlaceClassifier(
+    excluded_primary=EXCLUDED_PRIMARY,
+    allowed_primary=ALLOWED_PRIMARY,
+    hawker_name_tokens=HAWKER_NAME_TOKENS,
+    hawker_name_keywords=HAWKER_NAME_KEYWORDS,
+    hawker_types=HAWKER_TYPES,
+)
+
+def is_allowed_primary(primary: str) -> bool:
+    return CLASSIFIER.is_allowed_primary(primary)
+
 # --- Haversine distance (meters) ---
 def haversine_m(lat1, lon1, lat2, lon2):
     if lat2 is None or lon2 is None:
@@ -163,9 +195,31 @@ MAX_PAGES_PER_CHUNK = 3
 PAGE_DELAY_SEC = 2.0
 PER_PAGE = 20
 
-def nearby_all_pages(included_types):
+# --- Adaptive tiling (see coverage_planner.py) ---
+TILE_MIN_RADIUS = float(os.getenv("PLACES_TILE_MIN_RADIUS", "150"))   # don't split below this
+# tiles (not HTTP calls: each tile pages up to MAX_PAGES_PER_CHUNK) per type group
+TILE_MAX_TILES  = int(os.getenv("PLACES_TILE_MAX_TILES", "21"))
+
+# Set by main(); None means "no checkpointing" (e.g. when imported)
+CHECKPOINT = None
+
+def _post(url, body, mask, label):
+    """POST one Places request; with a checkpoint, completed responses are replayed on --resume."""
+    def call():
+        r = api_session().post(url, headers=_headers(mask), json=body, timeout=30)
+        r.raise_for_status()
+        return meter(label, r).json()
+    if CHECKPOINT is None:
+        return call(), False
+    parts = [url, body]
+    cached = CHECKPOINT.has_request(parts)
+    return CHECKPOINT.request(parts, call), cached
+
+def nearby_all_pages(included_types, lat=LAT, lng=LNG, radius=RADIUS_METERS):
+    """One circle, paged up to the cap. Returns (items, saturated)."""
     items = []
     page_token = None
+    saturated = False
     for _ in range(MAX_PAGES_PER_CHUNK):
         body = {
             "includedTypes": included_types,
@@ -173,54 +227,65 @@ def nearby_all_pages(included_types):
             "rankPreference": "POPULARITY",
             "locationRestriction": {
                 "circle": {
-                    "center": {"latitude": LAT, "longitude": LNG},
-                    "radius": float(RADIUS_METERS),
+                    "center": {"latitude": lat, "longitude": lng},
+                    "radius": float(radius),
                 }
             },
         }
         if page_token:
             body["pageToken"] = page_token
 
-        r = requests.post(NEARBY_URL, headers=_headers(), json=body, timeout=30)
-        r.raise_for_status()
-        data = r.json()
+        data, cached = _post(NEARBY_URL, body, request_masks()["searchNearby"], "places:searchNearby")
         if "error" in data:
             print(f"Nearby error ({included_types}):", data["error"].get("message"))
             break
 
-        items.extend(data.get("places", []) or [])
+        page = data.get("places", []) or []
+        items.extend(page)
         page_token = data.get("nextPageToken")
+        # A full last page (or a token we won't follow) means more results exist here
+        saturated = bool(page_token) or len(page) >= PER_PAGE
         if not page_token:
             break
-        time.sleep(PAGE_DELAY_SEC)
+        if not cached:
+            time.sleep(PAGE_DELAY_SEC)
+    return items, saturated
+
+def nearby_covered(included_types):
+    """Nearby search over the whole radius, subdividing only where tiles saturate."""
+    items, _ = plan_coverage(
+        lambda lat, lng, radius: nearby_all_pages(included_types, lat, lng, radius),
+        LAT, LNG, RADIUS_METERS,
+        min_radius=TILE_MIN_RADIUS, max_tiles=TILE_MAX_TILES, merge=better,
+        label=",".join(included_types[:2]) + ("…" if len(included_types) > 2 else ""),
+    )
     return items
 
 def text_search(query):
+    # Restrict (not just bias) to the box around our radius: out-of-area
+    # results were paid for and then useless.
     body = {
         "textQuery": query,
         "maxResultCount": 20,
-        "locationBias": {
-            "circle": {
-                "center": {"latitude": LAT, "longitude": LNG},
-                "radius": float(RADIUS_METERS),
-            }
+        "locationRestriction": {
+            "rectangle": bounding_rectangle(LAT, LNG, RADIUS_METERS)
         }
     }
-    r = requests.post(TEXT_URL, headers=_headers(), json=body, timeout=30)
-    r.raise_for_status()
-    data = r.json()
+    data, _ = _post(TEXT_URL, body, request_masks()["searchText"], "places:searchText")
     if "error" in data:
         print("TextSearch error:", data["error"].get("message"))
         return []
     return data.get("places", []) or []
 
-def first_photo_url(photos, max_h=480, max_w=720):
+def first_photo_url(photos, max_h=480, max_w=720, key=API_KEY):
+    """Media URL of the first photo; without a `key` param when key is None (offline / archived output)."""
     if not photos:
         return None
     name = (photos[0] or {}).get("name")
     if not name:
         return None
-    return f"https://places.googleapis.com/v1/{name}/media?maxHeightPx={max_h}&maxWidthPx={max_w}&key={API_KEY}"
+    url = f"https://places.googleapis.com/v1/{name}/media?maxHeightPx={max_h}&maxWidthPx={max_w}"
+    return f"{url}&key={key}" if key else url
 
 def better(a, b):
     ar, br = a.get("userRatingCount") or 0, b.get("userRatingCount") or 0
@@ -229,140 +294,147 @@ def better(a, b):
     ra, rb = a.get("rating") or 0, b.get("rating") or 0
     return a if ra >= rb else b
 
-def _norm(s: str) -> str:
-    return (s or "").strip().lower()
-
 def is_hawker_centre_place(p: dict) -> bool:
-    primary = _norm(p.get("primaryType"))
-    types = [_norm(t) for t in (p.get("types") or [])]
-    name = _norm((p.get("displayName") or {}).get("text") or "")
-
-    if primary == "food_court":
-        return True
-    if any(tok in name for tok in HAWKER_NAME_TOKENS):
-        return True
-    if "food_court" in types and any(k in name for k in HAWKER_NAME_KEYWORDS):
-        return True
-    return False
+    return CLASSIFIER.is_hawker(p)
 
 # --- Fetch & blend ---
-raw_by_id = {}
-
-# 1) Restaurants/Cafes/Bars/Bookstores
-for bucket_name, types in BUCKETS.items():
-    allowed_primary_for_bucket = ALLOWED_PRIMARY.get(bucket_name)
-
-    # Nearby search
-    for i in range(0, len(types), 10):  # API allows up to 10 types per call
-        sub = types[i:i+10]
-        try:
-            for p in nearby_all_pages(sub):
-                primary = (p.get("primaryType") or "").lower()
-
-                # Global exclusions (lodging/hotel)
-                if not is_allowed_primary(primary):
-                    continue
-                # Bucket-specific restriction (e.g., bookstores must be exactly book_store)
-                if allowed_primary_for_bucket and primary not in allowed_primary_for_bucket:
-                    continue
-
-                pid = p.get("id")
-                if not pid:
-                    continue
-                raw_by_id[pid] = better(raw_by_id.get(pid, p), p)
-        except requests.RequestException as e:
-            print(f"Nearby failed for {sub}: {e}")
+def collect_raw():
+    raw_by_id = {}
 
-    # Text search
-    for tq in TEXT_QUERIES[bucket_name]:
-        try:
-            for p in text_search(tq):
-                primary = (p.get("primaryType") or "").lower()
-
-                if not is_allowed_primary(primary):
-                    continue
-                if allowed_primary_for_bucket and primary not in allowed_primary_for_bucket:
-                    continue
-
-                pid = p.get("id")
-                if not pid:
-                    continue
-                raw_by_id[pid] = better(raw_by_id.get(pid, p), p)
-        except requests.RequestException as e:
-            print(f"TextSearch failed for '{tq}': {e}")
-
-# 2) Hawkers
-try:
-    for p in nearby_all_pages(HAWKER_TYPES):
-        if not is_hawker_centre_place(p):
-            continue
-        pid = p.get("id")
-        if not pid:
-            continue
-        raw_by_id[pid] = better(raw_by_id.get(pid, p), p)
-except requests.RequestException as e:
-    print(f"Nearby failed for hawkers: {e}")
-
-for q in HAWKER_TEXT_QUERIES:
-    try:
-        for p in text_search(q):
-            if not is_hawker_centre_place(p):
+    def merge(items, accept):
+        for p in items:
+            if not accept(p):
                 continue
             pid = p.get("id")
             if not pid:
                 continue
             raw_by_id[pid] = better(raw_by_id.get(pid, p), p)
+
+    # 1) Restaurants/Cafes/Bars/Bookstores
+    for bucket_name, types in BUCKETS.items():
+        # Global exclusions (lodging/hotel) + bucket restriction (e.g. bookstores must be book_store)
+        accept = lambda p, b=bucket_name: CLASSIFIER.admit(p, b)
+
+        # Nearby search
+        for i in range(0, len(types), 10):  # API allows up to 10 types per call
+            sub = types[i:i+10]
+            try:
+                merge(nearby_covered(sub), accept)
+            except requests.RequestException as e:
+                print(f"Nearby failed for {sub}: {e}")
+
+        # Text search
+        for tq in TEXT_QUERIES[bucket_name]:
+            try:
+                merge(text_search(tq), accept)
+            except requests.RequestException as e:
+                print(f"TextSearch failed for '{tq}': {e}")
+
+    # 2) Hawkers
+    try:
+        merge(nearby_covered(HAWKER_TYPES), CLASSIFIER.is_hawker)
     except requests.RequestException as e:
-        print(f"TextSearch failed for hawker '{q}': {e}")
+        print(f"Nearby failed for hawkers: {e}")
+
+    for q in HAWKER_TEXT_QUERIES:
+        try:
+            merge(text_search(q), CLASSIFIER.is_hawker)
+        except requests.RequestException as e:
+            print(f"TextSearch failed for hawker '{q}': {e}")
+
+    return raw_by_id
 
 # --- Transform for frontend ---
-places = []
-for p in raw_by_id.values():
+def drop_reason(p: dict) -> str | None:
+    """Why transform() leaves a collected place out, or None if it keeps it."""
     rating = p.get("rating")
     if rating is None or rating <= 3.5:
-        continue
+        return "low_rating"
+    # ✅ Skip anything without a usable image
+    if not first_photo_url(p.get("photos"), key=None):
+        return "no_photo"
+    return None
 
-    display = p.get("displayName") or {}
-    photo_url = first_photo_url(p.get("photos"))
+def transform(raw_by_id, api_key=API_KEY):
+    candidates = list(raw_by_id.values())
+    masks = CLASSIFIER.classify(candidates)
 
-    # ✅ Skip anything without a usable image
-    if not photo_url:
-        continue
-
-    # Pull lat/lng to compute distance
-    loc = p.get("location") or {}
-    plat = loc.get("latitude")
-    plng = loc.get("longitude")
-    dist_m = haversine_m(LAT, LNG, plat, plng)
-
-    places.append({
-        "name": display.get("text"),
-        "rating": rating,
-        "rating_count": p.get("userRatingCount"),
-        "address": p.get("formattedAddress"),
-        "place_id": p.get("id"),
-        "maps_url": p.get("googleMapsUri"),
-        "photo_url": photo_url,
-        "types": p.get("types", []),
-        "primary_type": p.get("primaryType"),
-        "lat": plat,
-        "lng": plng,
-        "distance_m": round(dist_m) if dist_m is not None else None,
-        "is_hawker_centre": is_hawker_centre_place(p),
-    })
-
-# Sort by rating then rating_count
-places.sort(key=lambda x: ((x.get("rating") or 0), (x.get("rating_count") or 0)), reverse=True)
+    places = []
+    for p, mask in zip(candidates, masks):
+        if drop_reason(p):
+            continue
+        rating = p.get("rating")
+        display = p.get("displayName") or {}
+        photo_url = first_photo_url(p.get("photos"), key=api_key)
+
+        # Pull lat/lng to compute distance
+        loc = p.get("location") or {}
+        plat = loc.get("latitude")
+        plng = loc.get("longitude")
+        dist_m = haversine_m(LAT, LNG, plat, plng)
+
+        record = {
+            "name": display.get("text"),
+            "rating": rating,
+            "rating_count": p.get("userRatingCount"),
+            "address": p.get("formattedAddress"),
+            "place_id": p.get("id"),
+            "maps_url": p.get("googleMapsUri"),
+            "photo_url": photo_url,
+            "types": p.get("types", []),
+            "primary_type": p.get("primaryType"),
+            "lat": plat,
+            "lng": plng,
+            "distance_m": round(dist_m) if dist_m is not None else None,
+            "is_hawker_centre": bool(mask & CATEGORY_BITS["hawker"]),
+            "category_mask": mask,
+        }
+        places.append({k: record[k] for k in PLACES_SCHEMA})
+
+    # Sort by rating then rating_count
+    places.sort(key=lambda x: ((x.get("rating") or 0), (x.get("rating_count") or 0)), reverse=True)
+    return places
+
+def with_photo_key(places, key=API_KEY):
+    """transform(api_key=None) output with the key added to each photo_url. Only
+    the published file carries it; checkpoint stages and history don't."""
+    if not key:
+        return places
+    return [{**p, "photo_url": f"{p['photo_url']}&key={key}"} if p.get("photo_url") else p for p in places]
 
 # --- Write JSON ---
-Path("public/data").mkdir(parents=True, exist_ok=True)
-meta = {
-    "generated_at": datetime.now(timezone.utc).isoformat(),
-    "origin": {"lat": LAT, "lng": LNG}
-}
-out = {"meta": meta, "places": places}
+def write_output(places):
+    Path("public/data").mkdir(parents=True, exist_ok=True)
+    meta = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "origin": {"lat": LAT, "lng": LNG}
+    }
+    out = {"meta": meta, "places": places}
+
+    with open("public/data/places.json", "w", encoding="utf-8") as f:
+        json.dump(out, f, ensure_ascii=False, indent=2)
+
+    print(f"Wrote {len(places)} places to public/data/places.json (with metadata)")
+    data_manifest.safe_update("public/data/places.json")
+
+def main(argv=None):
+    global CHECKPOINT
+    args = add_resume_flag(argparse.ArgumentParser(description="Refresh public/data/places.json")).parse_args(argv)
+    require_api_key()
+
+    for endpoint, mask in request_masks().items():
+        print(describe_mask(mask, endpoint))
+
+    CHECKPOINT = Checkpoint("places", resume=args.resume)
+    raw_by_id = CHECKPOINT.stage("raw_by_id", collect_raw)
+    # staged without the key: .cache is uploaded to the actions cache
+    places = CHECKPOINT.stage("places", lambda: transform(raw_by_id, api_key=None))
+    write_output(with_photo_key(places))
+    print_response_stats()
 
-with open("public/data/places.json", "w", encoding="utf-8") as f:
-    json.dump(out, f, ensure_ascii=False, indent=2)
+    history_store.safe_record_run("places", places, meta={"raw_candidates": len(raw_by_id)})
+    CHECKPOINT.done()
+    CHECKPOINT = None
 
-print(f"Wrote {len(places)} places to public/data/places.json (with metadata)")
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,31 @@
 import os
 import re
 import json
+import argparse
+import threading
 import requests
 from pathlib import Path
 from datetime import datetime, timedelta
-from dateutil import parser
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse, urljoin, parse_qsl, urlencode, urlunparse
 
+import history_store
+import data_manifest
+from checkpoint import Checkpoint, add_resume_flag
+from field_masks import api_session, meter, print_response_stats
+import image_probe
+import event_extract
+import event_windows
+import event_locales
+import venue_index
+from event_locales import PROFILES, DEFAULT_CITY
+
 # ---------------- Config ----------------
 API_KEY = os.getenv("SERPAPI_KEY")
-if not API_KEY:
-    raise RuntimeError("SERPAPI_KEY is not set")
+
+def require_api_key():
+    if not API_KEY:
+        raise RuntimeError("SERPAPI_KEY is not set")
 
 # Quota/refresh controls
 MAX_CALLS_PER_RUN      = int(os.getenv("EVENTS_MAX_CALLS", "10"))
@@ -18,34 +33,34 @@ TARGET_EVENTS          = int(os.getenv("EVENTS_TARGET_COUNT", "60"))
 PER_BUCKET_CAP         = int(os.getenv("EVENTS_PER_BUCKET_CAP", "25"))
 PER_DOMAIN_CAP         = int(os.getenv("EVENTS_PER_DOMAIN_CAP", "4"))
 REQUIRE_IMAGE          = os.getenv("EVENTS_REQUIRE_IMAGE", "1") == "1"
+PROBE_IMAGES           = os.getenv("EVENTS_PROBE_IMAGES", "1") == "1"
+MIN_IMAGE_W            = int(os.getenv("EVENTS_MIN_IMAGE_W", "240"))
+MIN_IMAGE_H            = int(os.getenv("EVENTS_MIN_IMAGE_H", "160"))
+MAX_PROBE_CANDIDATES   = int(os.getenv("EVENTS_MAX_PROBE_CANDIDATES", "3"))
+
+# City profiles (locale, queries, locality brands, quota share, output) live in
+# event_locales.py; the module-level names below are the default (SG) profile.
+DEFAULT_PROFILE = PROFILES[DEFAULT_CITY]
 
-OUT_PATH = Path("public/data/events.json")
+OUT_PATH = Path(DEFAULT_PROFILE["out_path"])
 OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
 
-SERP_LOCALE = {"engine": "google_events", "hl": "en", "gl": "sg", "location": "Singapore"}
+SERP_ENGINE = {"engine": "google_events"}
+SERP_LOCALE = {**SERP_ENGINE, **DEFAULT_PROFILE["serp"]}
+
+# Raw event fields normalize_event() actually reads; SerpAPI trims the
+# response to these via json_restrictor (EVENTS_JSON_RESTRICT=0 to disable).
+SERP_EVENT_FIELDS = [
+    "title", "date", "address", "link", "venue", "event_location",
+    "ticket_info", "image", "thumbnail",
+]
+JSON_RESTRICT = os.getenv("EVENTS_JSON_RESTRICT", "1") == "1"
 
 now = datetime.now()
 month_year = now.strftime("%B %Y")
 
 # --- Only Music & General buckets (Family is curated from Places API) ---
-QUERIES_BY_BUCKET = {
-    "music": [
-        f"concerts in Singapore {month_year}",
-        "live music Singapore weekend",
-        "DJ events Singapore",
-    ],
-    "general": [
-        f"festivals in Singapore {month_year}",
-        "carnival Singapore",
-        "night festival Singapore",
-        "street market Singapore",
-        "food festival Singapore",
-        "lantern festival Singapore",
-        "light show Singapore",
-        "fireworks Singapore",
-        f"museum exhibitions Singapore {month_year}",
-    ],
-}
+QUERIES_BY_BUCKET = event_locales.queries_for(DEFAULT_PROFILE, month_year)
 
 PAST_GRACE_DAYS = 1
 
@@ -69,7 +84,7 @@ CISO_RE = re.compile(r"\bciso\b", re.I)
 # --- Community-club filter (General bucket) ---
 COMMUNITY_CLUB_PHRASE_RE = re.compile(r"\bcommunity\s*club\b", re.I)   # “community club”
 CC_SHORT_RE               = re.compile(r"\b[a-z]{3,}\s+cc\b", re.I)     # e.g. “Fengshan CC”
-BLOCK_HOSTS               = {"onepa.gov.sg", "pa.gov.sg"}
+BLOCK_HOSTS               = DEFAULT_PROFILE["block_hosts"]
 
 def matches_any(text: str, *patterns) -> bool:
     if not text:
@@ -87,143 +102,82 @@ def looks_like_interval_walk(text: str) -> bool:
 
 # ---------------- Helpers ----------------
 _calls_made = 0
+_calls_by_city = {}
+_calls_lock = threading.Lock()
+
+# Per-city call budgets, set by main() from each profile's quota_share
+CITY_BUDGETS = {}
 
-def fetch_events(query: str):
+# Set by main(); None means "no checkpointing" (e.g. when imported)
+CHECKPOINT = None
+
+def reset_run_state():
+    """
+    Fresh clock, month queries and call counters for a new run. Needed when
+    main() runs more than once in one process (refresher.py); the shared
+    normalization cache survives within the same day.
+    """
+    global now, month_year, QUERIES_BY_BUCKET, _calls_made
+    day = now.date()
+    now = datetime.now()
+    month_year = now.strftime("%B %Y")
+    QUERIES_BY_BUCKET = event_locales.queries_for(DEFAULT_PROFILE, month_year)
+    with _calls_lock:
+        _calls_made = 0
+        _calls_by_city.clear()
+    with _stats_lock:
+        for stats in (IMG_STATS, PROBE_STATS):
+            for k in stats:
+                stats[k] = 0
+    if now.date() != day:
+        with _normalized_lock:
+            _normalized.clear()
+
+def _serpapi_get(params):
+    if JSON_RESTRICT:
+        params = {**params, "json_restrictor": f"events_results[].{{{','.join(SERP_EVENT_FIELDS)}}}"}
+    r = api_session().get("https://serpapi.com/search", params=params, timeout=30)
+    r.raise_for_status()
+    return meter("serpapi:google_events", r).json() or {}
+
+def _reserve_call(city: str) -> bool:
     global _calls_made
-    if _calls_made >= MAX_CALLS_PER_RUN:
-        print(f"⛔️ Budget reached ({MAX_CALLS_PER_RUN} calls). Skipping: {query}")
+    budget = CITY_BUDGETS.get(city, MAX_CALLS_PER_RUN)
+    with _calls_lock:
+        if _calls_made >= MAX_CALLS_PER_RUN or _calls_by_city.get(city, 0) >= budget:
+            return False
+        _calls_made += 1
+        _calls_by_city[city] = _calls_by_city.get(city, 0) + 1
+        return True
+
+def _release_call(city: str):
+    global _calls_made
+    with _calls_lock:
+        _calls_made -= 1
+        _calls_by_city[city] -= 1
+
+def fetch_events(query: str, city: str = DEFAULT_CITY):
+    if not _reserve_call(city):
+        print(f"⛔️ [{city}] Budget reached ({CITY_BUDGETS.get(city, MAX_CALLS_PER_RUN)} calls). Skipping: {query}")
         return []
 
-    params = {**SERP_LOCALE, "q": query, "api_key": API_KEY}
+    locale = {**SERP_ENGINE, **PROFILES[city]["serp"]}
+    params = {**locale, "q": query, "api_key": API_KEY}
     try:
-        r = requests.get("https://serpapi.com/search", params=params, timeout=30)
-        r.raise_for_status()
+        if CHECKPOINT is None:
+            data = _serpapi_get(params)
+        else:
+            # Keyed without the api_key so rotated keys still resume.
+            # Replayed responses still count: they were paid for by the interrupted run.
+            parts = ["serpapi", {**locale, "q": query}]
+            data = CHECKPOINT.request(parts, lambda: _serpapi_get(params))
     except requests.RequestException as e:
+        _release_call(city)
         print(f"❌ Request failed for '{query}': {e}")
         return []
 
-    _calls_made += 1
-    data = r.json() or {}
     return data.get("events_results", []) or []
 
-def parse_date_safe(s):
-    if not s:
-        return None
-    try:
-        return parser.parse(s)
-    except Exception:
-        return None
-
-def _coerce_address(addr):
-    if not addr:
-        return ""
-    if isinstance(addr, str):
-        return addr
-    if isinstance(addr, (list, tuple)):
-        parts = []
-        for x in addr:
-            if isinstance(x, dict):
-                parts.append(_coerce_address(x.get("address") or x.get("name") or ""))
-            else:
-                parts.append(str(x))
-        return ", ".join([p for p in parts if p])
-    if isinstance(addr, dict):
-        return str(addr.get("address") or addr.get("name") or "")
-    return str(addr)
-
-def _first_string_url(value):
-    if not value:
-        return None
-    if isinstance(value, str):
-        return value
-    if isinstance(value, dict):
-        for k in ("link", "url", "image", "src"):
-            v = value.get(k)
-            if isinstance(v, str) and v:
-                return v
-    if isinstance(value, (list, tuple)):
-        for item in value:
-            u = _first_string_url(item)
-            if u:
-                return u
-    return None
-
-def _extract_ticket_url(raw):
-    ti = raw.get("ticket_info")
-    url = _first_string_url(ti)
-    return url or _first_string_url(raw.get("link"))
-
-def _extract_image(raw):
-    img = _first_string_url(raw.get("image"))
-    return img or _first_string_url(raw.get("thumbnail"))
-
-def _extract_venue(raw):
-    v = raw.get("venue")
-    if isinstance(v, str) and v.strip():
-        return v.strip()
-    if isinstance(v, dict):
-        name = v.get("name") or v.get("address")
-        if isinstance(name, dict):
-            name = name.get("name") or name.get("address")
-        if name:
-            return str(name)
-    if isinstance(v, (list, tuple)):
-        for item in v:
-            if isinstance(item, dict):
-                name = item.get("name") or _coerce_address(item.get("address"))
-                if name:
-                    return name
-            elif isinstance(item, str) and item.strip():
-                return item.strip()
-
-    el = raw.get("event_location")
-    if isinstance(el, str):
-        return el
-    if isinstance(el, dict):
-        return el.get("name") or _coerce_address(el.get("address"))
-    if isinstance(el, (list, tuple)):
-        for item in el:
-            if isinstance(item, dict):
-                name = item.get("name") or _coerce_address(item.get("address"))
-                if name:
-                    return name
-            elif isinstance(item, str) and item.strip():
-                return item.strip()
-
-    return ""
-
-def _extract_address(raw):
-    addr = raw.get("address")
-    if addr:
-        return _coerce_address(addr)
-    el = raw.get("event_location")
-    if isinstance(el, dict):
-        return _coerce_address(el.get("address") or el.get("name"))
-    if isinstance(el, (list, tuple)):
-        for item in el:
-            if isinstance(item, dict):
-                s = _coerce_address(item.get("address") or item.get("name"))
-                if s:
-                    return s
-            elif isinstance(item, str) and item.strip():
-                return item.strip()
-    return ""
-
-def _date_field(date_obj, key):
-    if not date_obj:
-        return None
-    if isinstance(date_obj, dict):
-        return date_obj.get(key) or date_obj.get("when")
-    if isinstance(date_obj, (list, tuple)):
-        for item in date_obj:
-            if isinstance(item, dict) and (item.get(key) or item.get("when")):
-                return item.get(key) or item.get("when")
-            if isinstance(item, str):
-                return item
-    if isinstance(date_obj, str):
-        return date_obj
-    return None
-
 # ---------- Hi-res image helpers ----------
 BAD_THUMB_HOSTS = {
     "encrypted-tbn0.gstatic.com",
@@ -300,7 +254,7 @@ def fetch_og_image(page_url: str, timeout=12) -> str | None:
     if not page_url:
         return None
     try:
-        r = requests.get(
+        r = api_session().get(
             page_url,
             timeout=timeout,
             headers={"User-Agent": "Mozilla/5.0 (compatible; AmaraConciergeBot/1.0)"},
@@ -316,111 +270,186 @@ def fetch_og_image(page_url: str, timeout=12) -> str | None:
     img = m.group(1).strip()
     return urljoin(page_url, img)
 
-# simple counters to see effectiveness in logs
+# simple counters to see effectiveness in logs (bumped from the city threads)
 IMG_STATS = {"upgraded": 0, "og": 0, "kept": 0, "lowres_fallback": 0}
+_stats_lock = threading.Lock()
+
+def _count(stats: dict, key: str, n: int = 1):
+    with _stats_lock:
+        stats[key] += n
 
-def best_image_for(raw) -> str | None:
+def best_image_for(raw, fields=None, fetch_og: bool = True) -> str | None:
     """
     Choose the best possible image:
       1) use 'image' if it's not an obvious low-res proxy (upgrade googleusercontent if possible)
       2) else try 'thumbnail' with same checks
-      3) else fetch og:image from event page
+      3) else fetch og:image from event page (skipped when fetch_og is False)
       4) else return whatever is left (low-res fallback)
+    `fields` is event_extract.extract(raw) when the caller already has it.
     """
+    fields = fields or event_extract.extract(raw)
     # 1) image
-    img = _first_string_url(raw.get("image"))
+    img = fields["image_url"]
     if img:
         host = (urlparse(img).hostname or "").lower()
         if host in GOOGLE_CONTENT_HOSTS:
             upgraded = upgrade_googleusercontent(img, target=1200)
             if upgraded != img:
-                IMG_STATS["upgraded"] += 1
+                _count(IMG_STATS, "upgraded")
                 img = upgraded
         if not is_low_res_proxy(img):
-            IMG_STATS["kept"] += 1
+            _count(IMG_STATS, "kept")
             return img
 
     # 2) thumbnail
-    thumb = _first_string_url(raw.get("thumbnail"))
+    thumb = fields["thumbnail_url"]
     if thumb:
         host = (urlparse(thumb).hostname or "").lower()
         if host in GOOGLE_CONTENT_HOSTS:
             upgraded = upgrade_googleusercontent(thumb, target=1200)
             if upgraded != thumb:
-                IMG_STATS["upgraded"] += 1
+                _count(IMG_STATS, "upgraded")
                 thumb = upgraded
         if not is_low_res_proxy(thumb):
-            IMG_STATS["kept"] += 1
+            _count(IMG_STATS, "kept")
             return thumb
 
     # 3) fall back to event page og:image
-    ticket = _extract_ticket_url(raw)
-    og = fetch_og_image(ticket) if ticket else None
+    ticket = fields["ticket"]
+    og = fetch_og_image(ticket) if ticket and fetch_og else None
     if og:
-        IMG_STATS["og"] += 1
+        _count(IMG_STATS, "og")
         return og
 
     # 4) last resort: return whatever we had (may be low-res)
     if img or thumb:
-        IMG_STATS["lowres_fallback"] += 1
+        _count(IMG_STATS, "lowres_fallback")
     return img or thumb
 
-def normalize_event(raw, category_tag):
-    d = raw.get("date", {}) or {}
-    start_str = _date_field(d, "start_date")
-    end_str   = _date_field(d, "end_date")
+def image_candidates_for(raw, chosen, fields=None) -> list[str]:
+    """Every image we could publish for this event, best guess first (for probing)."""
+    fields = fields or event_extract.extract(raw)
+    out = [chosen]
+    for u in (fields["image_url"], fields["thumbnail_url"]):
+        if u:
+            out.append(upgrade_googleusercontent(u, target=1200))
+            out.append(u)
+    return [u for u in dict.fromkeys(out) if u]
+
+# Probe candidates concurrently (header bytes only, cached per URL by
+# image_probe) and keep the first image that is actually alive and big enough.
+# Rounds: every event's best guess first, then its next candidate only if the
+# previous one failed, at most MAX_PROBE_CANDIDATES per event.
+PROBE_STATS = {"probed": 0, "kept": 0, "swapped": 0, "unverified": 0, "dropped": 0}
+
+def validate_event_images(events):
+    candidates = [(e.get("image_candidates") or [])[:MAX_PROBE_CANDIDATES] for e in events]
+    results, chosen, inconclusive = {}, {}, set()
+    for rnd in range(MAX_PROBE_CANDIDATES):
+        batch = {i: c[rnd] for i, c in enumerate(candidates) if i not in chosen and rnd < len(c)}
+        if not batch:
+            break
+        fresh = image_probe.probe_many(u for u in batch.values() if u not in results)
+        _count(PROBE_STATS, "probed", len(fresh))
+        results.update(fresh)
+        for i, u in batch.items():
+            res = results.get(u)
+            if image_probe.is_usable(res, MIN_IMAGE_W, MIN_IMAGE_H):
+                chosen[i] = u
+                inconclusive.discard(i)
+            elif not image_probe.is_conclusive(res):
+                inconclusive.add(i)
+
+    out = []
+    for i, e in enumerate(events):
+        u = chosen.get(i)
+        if u:
+            _count(PROBE_STATS, "swapped" if u != e.get("image") else "kept")
+            res = results[u]
+            e["image"] = u
+            e["image_width"] = res.get("width")
+            e["image_height"] = res.get("height")
+        elif i in inconclusive and e.get("image"):
+            # timeouts / 403 / 5xx say nothing about the image: publish it unverified
+            _count(PROBE_STATS, "unverified")
+        else:
+            e["image"] = ""
+            if REQUIRE_IMAGE:
+                _count(PROBE_STATS, "dropped")
+                continue
+        out.append(e)
+    return out
 
-    venue_name = _extract_venue(raw)
-    address    = _extract_address(raw)
-    ticket     = _extract_ticket_url(raw)
-    image      = best_image_for(raw)   # << USE HI-RES PIPELINE
+def normalize_event(raw, category_tag, fetch_og: bool = True):
+    f = event_extract.extract(raw)     # one pass over the raw payload
+    start_str, end_str = f["start"], f["end"]
+    address = f["address"]
+    image = best_image_for(raw, f, fetch_og)     # << USE HI-RES PIPELINE
 
     return {
         "title": raw.get("title"),
         "start": start_str or "",
         "end": end_str or "",
-        "venue": venue_name or address or "",
+        "venue": f["venue"] or address or "",
         "address": address,
-        "url": ticket,
+        "url": f["ticket"],
         "image": image,
         "category": category_tag,
         "source": "serpapi_google_events",
-        "parsed_start": parse_date_safe(start_str),
-        "parsed_end": parse_date_safe(end_str),
+        "image_candidates": image_candidates_for(raw, image, f),
     }
 
-# ---- Locality guard: keep only SG-looking items ----
-LOCAL_BRANDS = {
-    "singapore", "sentosa", "gardens by the bay", "mandai",
-    "bird paradise", "river wonders", "zoo", "esplanade",
-    "artscience museum", "marina bay sands", "science centre",
-    "jewel changi", "nparks", "botanic gardens",
-    "national museum", "asian civilisations museum",
-    "singapore discovery centre", "hortpark", "marina barrage",
-    "children's museum singapore", "science center singapore",
-}
-
-def is_local_event(e) -> bool:
+# Working fields left out of events.json: "end" is SerpAPI's raw "when" line
+# (start_ts / end_ts replace it); "start" stays as the card's display date.
+UNPUBLISHED_FIELDS = ("end", "image_candidates")
+
+# Shared across queries and cities: the same raw event (returned by several
+# overlapping queries) is normalized — and its og:image fetched — only once.
+_normalized = {}
+_normalized_lock = threading.Lock()
+
+def _raw_identity(raw) -> str:
+    return json.dumps(
+        [raw.get("title"), raw.get("link"), raw.get("date"), raw.get("address")],
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+
+def normalize_event_cached(raw, category_tag):
+    key = _raw_identity(raw)
+    with _normalized_lock:
+        base = _normalized.get(key)
+    if base is None:
+        base = normalize_event(raw, category_tag)
+        with _normalized_lock:
+            base = _normalized.setdefault(key, base)
+    return {**base, "category": category_tag}
+
+# ---- Locality guard: keep only items that look local to the city ----
+LOCAL_BRANDS = DEFAULT_PROFILE["local_brands"]
+
+def is_local_event(e, city: str = DEFAULT_CITY) -> bool:
+    profile = PROFILES[city]
     text = " ".join([
         str(e.get("title") or ""),
         str(e.get("venue") or ""),
         str(e.get("address") or ""),
     ]).lower()
 
-    if "singapore" in text:
+    if profile["city"].lower() in text:
         return True
-    if any(tag in text for tag in LOCAL_BRANDS):
+    if any(tag in text for tag in profile["local_brands"]):
         return True
 
     host = urlparse(e.get("url") or "").hostname or ""
-    if host.endswith(".sg"):
+    if host.endswith(tuple(profile["local_tlds"])):
         return True
 
     return False
 
-def should_drop(e, tag: str) -> bool:
-    if not is_local_event(e):
-        return True
+def drop_reason(e, tag: str, city: str = DEFAULT_CITY) -> str | None:
+    """Name of the first filter rule that rejects `e`, or None to keep it."""
+    if not is_local_event(e, city):
+        return "not_local"
 
     text = " ".join([
         str(e.get("title") or ""),
@@ -430,25 +459,28 @@ def should_drop(e, tag: str) -> bool:
 
     # fitness / corporate / rituals / image
     if matches_any(text, FITNESS_RE) or looks_like_interval_walk(text):
-        return True
+        return "fitness"
     if matches_any(text, BIZ_RE) or CISO_RE.search(text):
-        return True
+        return "business"
     if REQUIRE_IMAGE and not (e.get("image") or "").strip():
-        return True
+        return "no_image"
     if RITUAL_RE.search(text):
-        return True
+        return "ritual"
 
     # General-only community club filtering
     if tag == "general":
         host = (urlparse(e.get("url") or "").hostname or "").lower()
         if host.startswith("www."):
             host = host[4:]
-        if host in BLOCK_HOSTS:
-            return True
+        if host in PROFILES[city]["block_hosts"]:
+            return "blocked_host"
         if COMMUNITY_CLUB_PHRASE_RE.search(text) or CC_SHORT_RE.search(text):
-            return True
+            return "community_club"
 
-    return False
+    return None
+
+def should_drop(e, tag: str, city: str = DEFAULT_CITY) -> bool:
+    return drop_reason(e, tag, city) is not None
 
 def deduplicate(events):
     seen, out = set(), []
@@ -464,11 +496,12 @@ def deduplicate(events):
     return out
 
 def filter_future(events):
-    cutoff = now - timedelta(days=PAST_GRACE_DAYS)
-    return [e for e in events if (e.get("parsed_start") is None) or (e["parsed_start"] >= cutoff)]
+    """Events from annotate(); undated ones are kept."""
+    cutoff = (now - timedelta(days=PAST_GRACE_DAYS)).timestamp()
+    return [e for e in events if e.get("start_ts") is None or e["start_ts"] >= cutoff]
 
 def sort_by_start(events):
-    return sorted(events, key=lambda e: e.get("parsed_start") or datetime.max)
+    return sorted(events, key=lambda e: e["start_ts"] if e.get("start_ts") is not None else float("inf"))
 
 def domain_of(url: str) -> str:
     if not url:
@@ -482,10 +515,11 @@ def domain_of(url: str) -> str:
         return ""
 
 # -------- Query planning: round-robin until budget or queries exhausted --------
-def build_query_plan(max_calls: int = MAX_CALLS_PER_RUN):
+def build_query_plan(max_calls: int = MAX_CALLS_PER_RUN, queries_by_bucket=None):
+    queries_by_bucket = queries_by_bucket or QUERIES_BY_BUCKET
     plan = []
-    buckets = [("music", QUERIES_BY_BUCKET["music"]),
-               ("general", QUERIES_BY_BUCKET["general"])]
+    buckets = [("music", queries_by_bucket["music"]),
+               ("general", queries_by_bucket["general"])]
 
     i = 0
     while len(plan) < max_calls:
@@ -500,18 +534,25 @@ def build_query_plan(max_calls: int = MAX_CALLS_PER_RUN):
     return plan
 
 # ---------------- Main ----------------
-def run_query(tag: str, q: str):
-    results = fetch_events(q)
+def run_query(tag: str, q: str, city: str = DEFAULT_CITY):
+    results = fetch_events(q, city)
     if not results:
         return []
-    normed   = [normalize_event(r, tag) for r in results]
-    filtered = [e for e in normed if not should_drop(e, tag)]
+    normed   = [normalize_event_cached(r, tag) for r in results]
+    # the one date parse: start_ts / end_ts drive filtering, order and buckets
+    tz = event_windows.ZoneInfo(PROFILES[city]["timezone"])
+    event_windows.annotate(normed, datetime.now(tz), tz)
+    filtered = [e for e in normed if not should_drop(e, tag, city)]
     filtered = sort_by_start(filter_future(deduplicate(filtered)))[:PER_BUCKET_CAP]
     return filtered
 
-def main():
+def harvest_city(city: str):
+    """Plan, fetch, filter and publish one city's events file. Returns a summary dict."""
+    profile = PROFILES[city]
+    out_path = Path(profile["out_path"])
     all_events = []
-    plan = build_query_plan(MAX_CALLS_PER_RUN)
+    plan = build_query_plan(CITY_BUDGETS.get(city, MAX_CALLS_PER_RUN),
+                            event_locales.queries_for(profile, month_year))
     used = {}
     host_counts = {}
 
@@ -524,10 +565,10 @@ def main():
         host_counts[host] = host_counts.get(host, 0) + 1
         return True
 
-    print("Queries plan:")
+    print(f"[{city}] Queries plan:")
     for tag, q in plan:
-        print(f"  [{tag}] {q}")
-        bucket_events = run_query(tag, q)
+        print(f"  [{city}/{tag}] {q}")
+        bucket_events = run_query(tag, q, city)
         used.setdefault(tag, 0)
         used[tag] += 1
         for e in bucket_events:
@@ -535,26 +576,80 @@ def main():
                 all_events.append(e)
 
     all_events = deduplicate(all_events)
-    all_events = sort_by_start(filter_future(all_events))[:TARGET_EVENTS]
+    all_events = sort_by_start(filter_future(all_events))
+    if PROBE_IMAGES and CHECKPOINT is not None:
+        all_events = CHECKPOINT.stage(
+            "validated_images" if city == DEFAULT_CITY else f"validated_images-{city}",
+            lambda: validate_event_images(all_events),
+        )
+    elif PROBE_IMAGES:
+        all_events = validate_event_images(all_events)
+    all_events = all_events[:TARGET_EVENTS]
 
     for e in all_events:
-        e.pop("parsed_start", None)
-        e.pop("parsed_end", None)
+        for k in UNPUBLISHED_FIELDS:
+            e.pop(k, None)
+
+    # "when" buckets (city-local day) from start_ts / end_ts, so the frontend
+    # can filter without parsing SerpAPI's display strings
+    tz = event_windows.ZoneInfo(profile["timezone"])
+    local_now = datetime.now(tz)
+    bucket_index = event_windows.bucket_index(all_events, local_now, tz)
+
+    # lat/lng + distance from the hotel, matched against venues we already know
+    if profile.get("origin"):
+        venue_index.resolve_events(all_events, profile["origin"], region=profile["serp"]["gl"].upper())
 
     payload = {
         "source": "serpapi_google_events",
         "generated_at": datetime.utcnow().isoformat() + "Z",
+        "city": profile["city"],
+        "timezone": profile["timezone"],
+        "buckets_as_of": local_now.date().isoformat(),
+        "buckets": bucket_index,
         "events": all_events,
     }
 
-    with OUT_PATH.open("w", encoding="utf-8") as f:
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with out_path.open("w", encoding="utf-8") as f:
         json.dump(payload, f, ensure_ascii=False, indent=2)
+    print(f"✅ [{city}] Saved {len(all_events)} events to {out_path}")
+    data_manifest.safe_update(out_path)
+
+    meta = {"calls": _calls_by_city.get(city, 0), "buckets": used, "per_domain": host_counts}
+    history_store.safe_record_run("events", all_events, meta=meta, scope="" if city == DEFAULT_CITY else city)
+    return {"city": city, "events": len(all_events), **meta}
+
+def main(argv=None):
+    global CHECKPOINT
+    ap = add_resume_flag(argparse.ArgumentParser(description="Refresh public/data/events*.json"))
+    ap.add_argument("--cities", default=os.getenv("EVENTS_CITIES", DEFAULT_CITY),
+                    help=f"comma-separated city profiles (known: {','.join(sorted(PROFILES))})")
+    args = ap.parse_args(argv)
+    require_api_key()
+    reset_run_state()
+    cities = event_locales.parse_cities(args.cities)
+    CITY_BUDGETS.clear()
+    CITY_BUDGETS.update(event_locales.split_quota(cities, MAX_CALLS_PER_RUN))
+    CHECKPOINT = Checkpoint("events", resume=args.resume)
+
+    print(f"Cities: {CITY_BUDGETS} (of {MAX_CALLS_PER_RUN} calls)")
+    # One process, one connection pool / image cache / normalization cache for all cities
+    with ThreadPoolExecutor(max_workers=len(cities)) as ex:
+        summaries = list(ex.map(harvest_city, cities))
 
     print("-" * 56)
-    print(f"Used { _calls_made } call(s). Buckets hit: {used}")
-    print(f"Per-domain counts: {host_counts}")
-    print(f"Image stats: {IMG_STATS}")
-    print(f"✅ Saved {len(all_events)} events to {OUT_PATH}")
+    print(f"Used { _calls_made } call(s).")
+    for summary in summaries:
+        print(f"  [{summary['city']}] {summary['events']} events, {summary['calls']} call(s), "
+              f"buckets hit: {summary['buckets']}, per-domain: {summary['per_domain']}")
+    print(f"Image stats (per normalized event): {IMG_STATS}")
+    print_response_stats()
+    if PROBE_IMAGES:
+        print(f"Image probe: {PROBE_STATS}")
+
+    CHECKPOINT.done()
+    CHECKPOINT = None
 
 if __name__ == "__main__":
     print("▶ Run python get_serpapi_events.py")
@@ -0,0 +1,348 @@
+# history_store.py  (append-only run history for places / events / attractions)
+#
+# Every pipeline run appends its normalized records here, so rating drift,
+# event churn and API yield can be analysed without replaying git history.
+#
+#   python history_store.py stats
+#   python history_store.py as-of places 2025-10-01T00:00:00Z
+#   python history_store.py compact --keep-days 30
+#   python history_store.py export events out/events.parquet
+import os
+import sys
+import json
+import sqlite3
+import hashlib
+import argparse
+from pathlib import Path
+from datetime import datetime, timezone, timedelta
+
+DB_PATH = Path(os.getenv("HISTORY_DB", ".cache/history.sqlite"))
+HISTORY_ENABLED = os.getenv("HISTORY_ENABLED", "1") == "1"
+
+# kind -> (key column, typed columns pulled out of each record)
+# Everything else stays queryable through the JSON "payload" column.
+KINDS = {
+    "places": ("place_id", [
+        ("name", "TEXT"),
+        ("rating", "REAL"),
+        ("rating_count", "INTEGER"),
+        ("primary_type", "TEXT"),
+        ("lat", "REAL"),
+        ("lng", "REAL"),
+        ("distance_m", "INTEGER"),
+        ("is_hawker_centre", "INTEGER"),
+    ]),
+    "events": ("event_key", [
+        ("title", "TEXT"),
+        ("start", "TEXT"),
+        ("venue", "TEXT"),
+        ("category", "TEXT"),
+        ("url", "TEXT"),
+        ("image", "TEXT"),
+    ]),
+    "attractions": ("attraction_key", [
+        ("title", "TEXT"),
+        ("rating", "REAL"),
+        ("rating_count", "INTEGER"),
+        ("lat", "REAL"),
+        ("lng", "REAL"),
+    ]),
+}
+
+def _utc_iso(dt: datetime | None = None) -> str:
+    dt = dt or datetime.now(timezone.utc)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+def _parse_ts(s: str) -> str:
+    """Accept '2025-10-01', '2025-10-01T08:00', '...Z' or '+08:00' and return UTC iso."""
+    dt = datetime.fromisoformat(s.strip().replace("Z", "+00:00"))
+    return _utc_iso(dt)
+
+# ---------------- Record keys ----------------
+def event_key(e: dict) -> str:
+    # Same identity as deduplicate() in get_serpapi_events.py
+    raw = "|".join([
+        (e.get("title") or "").strip().lower(),
+        (e.get("start") or "").strip(),
+        (e.get("venue") or "").strip().lower(),
+    ])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+def attraction_key(a: dict) -> str:
+    raw = (a.get("maps_url") or a.get("title") or "").strip().lower()
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+KEY_FUNCS = {
+    "places": lambda p: p.get("place_id"),
+    "events": event_key,
+    "attractions": attraction_key,
+}
+
+# ---------------- Schema ----------------
+def connect(path: Path = DB_PATH) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path))
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    _ensure_schema(conn)
+    return conn
+
+def _ensure_schema(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS runs (
+            run_id       INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind         TEXT NOT NULL,
+            run_at       TEXT NOT NULL,
+            record_count INTEGER NOT NULL,
+            meta         TEXT,
+            scope        TEXT NOT NULL DEFAULT ''
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_runs_kind_at ON runs(kind, run_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_runs_kind_scope_at ON runs(kind, scope, run_at)")
+
+    for kind, (key_col, cols) in KINDS.items():
+        col_sql = ",\n".join(f"{name} {typ}" for name, typ in cols)
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {kind} (
+                run_id   INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+                run_at   TEXT NOT NULL,
+                {key_col} TEXT NOT NULL,
+                {col_sql},
+                payload_hash TEXT NOT NULL,
+                payload  TEXT NOT NULL
+            )
+        """)
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{kind}_run ON {kind}(run_id)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{kind}_key_at ON {kind}({key_col}, run_at)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{kind}_at ON {kind}(run_at)")
+    conn.commit()
+
+# ---------------- Write ----------------
+def record_run(kind: str, records: list[dict], meta: dict | None = None,
+               run_at: datetime | None = None, path: Path = DB_PATH, scope: str = "") -> int:
+    """Append one run's normalized records. Returns the new run_id.
+    `scope` separates parallel feeds of one kind (e.g. events per city)."""
+    key_col, cols = KINDS[kind]
+    key_of = KEY_FUNCS[kind]
+    at = _utc_iso(run_at)
+
+    rows = []
+    for r in records:
+        key = key_of(r)
+        if not key:
+            continue
+        payload = json.dumps(r, ensure_ascii=False, sort_keys=True, default=str)
+        vals = []
+        for name, typ in cols:
+            v = r.get(name)
+            if typ == "INTEGER" and isinstance(v, bool):
+                v = int(v)
+            elif isinstance(v, (dict, list)):
+                v = json.dumps(v, ensure_ascii=False)
+            vals.append(v)
+        rows.append((at, key, *vals, hashlib.sha1(payload.encode("utf-8")).hexdigest(), payload))
+
+    conn = connect(path)
+    try:
+        with conn:
+            cur = conn.execute(
+                "INSERT INTO runs(kind, scope, run_at, record_count, meta) VALUES (?, ?, ?, ?, ?)",
+                (kind, scope, at, len(rows), json.dumps(meta or {}, ensure_ascii=False, default=str)),
+            )
+            run_id = cur.lastrowid
+            names = ", ".join(["run_id", "run_at", key_col, *[n for n, _ in cols], "payload_hash", "payload"])
+            marks = ", ".join("?" * (len(cols) + 5))
+            conn.executemany(
+                f"INSERT INTO {kind} ({names}) VALUES ({marks})",
+                [(run_id, *row) for row in rows],
+            )
+        return run_id
+    finally:
+        conn.close()
+
+def safe_record_run(kind: str, records: list[dict], meta: dict | None = None, scope: str = ""):
+    """Pipeline hook: never let history bookkeeping fail a data refresh."""
+    if not HISTORY_ENABLED:
+        return None
+    try:
+        run_id = record_run(kind, records, meta=meta, scope=scope)
+        label = f"{kind}/{scope}" if scope else kind
+        print(f"🗄️  History: run {run_id} appended {len(records)} {label} to {DB_PATH}")
+        return run_id
+    except (sqlite3.Error, OSError) as e:
+        print(f"⚠️ History store write failed ({kind}): {e}")
+        return None
+
+# ---------------- Read ----------------
+def run_as_of(kind: str, ts: str | None = None, path: Path = DB_PATH, scope: str = ""):
+    """Latest run of `kind` at or before `ts` (UTC iso), or the latest run overall."""
+    conn = connect(path)
+    try:
+        if ts:
+            return conn.execute(
+                "SELECT * FROM runs WHERE kind = ? AND scope = ? AND run_at <= ? ORDER BY run_at DESC LIMIT 1",
+                (kind, scope, _parse_ts(ts)),
+            ).fetchone()
+        return conn.execute(
+            "SELECT * FROM runs WHERE kind = ? AND scope = ? ORDER BY run_at DESC LIMIT 1", (kind, scope)
+        ).fetchone()
+    finally:
+        conn.close()
+
+def as_of(kind: str, ts: str | None = None, path: Path = DB_PATH, scope: str = "") -> list[dict]:
+    """The full record set as it was published at `ts` (latest if None)."""
+    run = run_as_of(kind, ts, path, scope)
+    if run is None:
+        return []
+    conn = connect(path)
+    try:
+        rows = conn.execute(f"SELECT payload FROM {kind} WHERE run_id = ?", (run["run_id"],)).fetchall()
+        return [json.loads(r["payload"]) for r in rows]
+    finally:
+        conn.close()
+
+def previous_state(kind: str, path: Path = DB_PATH, scope: str = "") -> dict:
+    """key -> payload_hash for the latest run; cheap lookup for delta/incremental work."""
+    run = run_as_of(kind, None, path, scope)
+    if run is None:
+        return {}
+    key_col, _ = KINDS[kind]
+    conn = connect(path)
+    try:
+        rows = conn.execute(
+            f"SELECT {key_col} AS k, payload_hash AS h FROM {kind} WHERE run_id = ?", (run["run_id"],)
+        ).fetchall()
+        return {r["k"]: r["h"] for r in rows}
+    finally:
+        conn.close()
+
+def key_history(kind: str, key: str, path: Path = DB_PATH) -> list[dict]:
+    """Every stored version of one record, oldest first (e.g. rating drift of a place)."""
+    key_col, _ = KINDS[kind]
+    conn = connect(path)
+    try:
+        rows = conn.execute(
+            f"SELECT run_at, payload FROM {kind} WHERE {key_col} = ? ORDER BY run_at", (key,)
+        ).fetchall()
+        return [{"run_at": r["run_at"], **json.loads(r["payload"])} for r in rows]
+    finally:
+        conn.close()
+
+# ---------------- Maintenance ----------------
+def compact(keep_days: int = 30, path: Path = DB_PATH) -> int:
+    """
+    Thin out old history: runs newer than `keep_days` are kept as-is, older runs
+    are reduced to the last run of each (kind, UTC day). Returns runs removed.
+    """
+    cutoff = _utc_iso(datetime.now(timezone.utc) - timedelta(days=keep_days))
+    conn = connect(path)
+    try:
+        with conn:
+            doomed = [r["run_id"] for r in conn.execute("""
+                SELECT run_id FROM runs r
+                WHERE run_at < ?
+                  AND run_at < (SELECT MAX(run_at) FROM runs r2
+                                WHERE r2.kind = r.kind AND r2.scope = r.scope
+                                  AND substr(r2.run_at, 1, 10) = substr(r.run_at, 1, 10))
+            """, (cutoff,)).fetchall()]
+            for kind in KINDS:
+                conn.executemany(f"DELETE FROM {kind} WHERE run_id = ?", [(i,) for i in doomed])
+            conn.executemany("DELETE FROM runs WHERE run_id = ?", [(i,) for i in doomed])
+        conn.execute("VACUUM")
+        return len(doomed)
+    finally:
+        conn.close()
+
+def stats(path: Path = DB_PATH) -> list[dict]:
+    conn = connect(path)
+    try:
+        rows = conn.execute("""
+            SELECT kind, scope, COUNT(*) AS runs, SUM(record_count) AS records,
+                   MIN(run_at) AS first_run, MAX(run_at) AS last_run
+            FROM runs GROUP BY kind, scope ORDER BY kind, scope
+        """).fetchall()
+        return [dict(r) for r in rows]
+    finally:
+        conn.close()
+
+# ---------------- Columnar export (optional pyarrow) ----------------
+def export(kind: str, out_path: Path, since: str | None = None, path: Path = DB_PATH) -> int:
+    """Write the typed columns of `kind` to Parquet (.parquet) or Arrow IPC (.arrow)."""
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise RuntimeError("pyarrow is not installed (pip install pyarrow) — needed for Parquet/Arrow export")
+
+    key_col, cols = KINDS[kind]
+    names = ["run_id", "run_at", key_col, *[n for n, _ in cols]]
+    conn = connect(path)
+    try:
+        sql = f"SELECT {', '.join(names)} FROM {kind}"
+        params = ()
+        if since:
+            sql += " WHERE run_at >= ?"
+            params = (_parse_ts(since),)
+        rows = conn.execute(sql + " ORDER BY run_at", params).fetchall()
+    finally:
+        conn.close()
+
+    table = pa.table({n: [r[n] for r in rows] for n in names})
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    if out_path.suffix == ".arrow":
+        import pyarrow.feather as feather
+        feather.write_feather(table, str(out_path))
+    else:
+        import pyarrow.parquet as pq
+        pq.write_table(table, str(out_path))
+    return len(rows)
+
+# ---------------- CLI ----------------
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Query and maintain the local run history store.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    sub.add_parser("stats", help="runs/records per kind")
+
+    p_asof = sub.add_parser("as-of", help="print the records published at a point in time")
+    p_asof.add_argument("kind", choices=sorted(KINDS))
+    p_asof.add_argument("ts", nargs="?", help="ISO timestamp (default: latest)")
+    p_asof.add_argument("--scope", default="", help="e.g. an events city profile (bkk)")
+
+    p_hist = sub.add_parser("history", help="every stored version of one record")
+    p_hist.add_argument("kind", choices=sorted(KINDS))
+    p_hist.add_argument("key")
+
+    p_comp = sub.add_parser("compact", help="keep one run per day beyond --keep-days")
+    p_comp.add_argument("--keep-days", type=int, default=30)
+
+    p_exp = sub.add_parser("export", help="export to .parquet or .arrow (needs pyarrow)")
+    p_exp.add_argument("kind", choices=sorted(KINDS))
+    p_exp.add_argument("out")
+    p_exp.add_argument("--since")
+
+    args = ap.parse_args(argv)
+
+    if args.cmd == "stats":
+        for row in stats():
+            label = f"{row['kind']}/{row['scope']}" if row["scope"] else row["kind"]
+            print(f"{label:<12} runs={row['runs']:<5} records={row['records']:<7} "
+                  f"{row['first_run']} → {row['last_run']}")
+    elif args.cmd == "as-of":
+        json.dump(as_of(args.kind, args.ts, scope=args.scope), sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    elif args.cmd == "history":
+        json.dump(key_history(args.kind, args.key), sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    elif args.cmd == "compact":
+        print(f"✅ Removed {compact(args.keep_days)} run(s)")
+    elif args.cmd == "export":
+        n = export(args.kind, Path(args.out), since=args.since)
+        print(f"✅ Exported {n} {args.kind} rows to {args.out}")
+
+if __name__ == "__main__":
+    main()
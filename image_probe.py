@@ -0,0 +1,191 @@
+# image_probe.py  (concurrent image liveness + real-dimension probing)
+#
+# Reads only the first few KB of each image (HTTP Range request) and parses
+# the PNG / GIF / JPEG / WebP header for the true width/height, so pipelines
+# can drop dead or tiny images before publishing instead of guessing from URL
+# size tokens. Results are cached by URL in .cache/image_probe.json.
+import os
+import json
+import time
+import struct
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+PROBE_BYTES   = int(os.getenv("IMAGE_PROBE_BYTES", "65536"))
+PROBE_WORKERS = int(os.getenv("IMAGE_PROBE_WORKERS", "16"))
+PROBE_TIMEOUT = float(os.getenv("IMAGE_PROBE_TIMEOUT", "10"))
+CACHE_PATH    = Path(os.getenv("IMAGE_PROBE_CACHE", ".cache/image_probe.json"))
+CACHE_TTL_OK  = int(os.getenv("IMAGE_PROBE_TTL_DAYS", "14")) * 86400
+CACHE_TTL_BAD = 86400   # retry dead images daily; hosts do come back
+
+USER_AGENT = "Mozilla/5.0 (compatible; AmaraConciergeBot/1.0)"
+
+# ---------------- Header parsing ----------------
+def _jpeg_size(b: bytes):
+    i = 2
+    n = len(b)
+    while i + 9 < n:
+        if b[i] != 0xFF:
+            i += 1
+            continue
+        marker = b[i + 1]
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            i += 2
+            continue
+        if marker == 0xFF:
+            i += 1
+            continue
+        seg_len = struct.unpack(">H", b[i + 2:i + 4])[0]
+        # SOF0..SOF15, minus DHT(C4) / JPG(C8) / DAC(CC)
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            h, w = struct.unpack(">HH", b[i + 5:i + 9])
+            return w, h
+        i += 2 + seg_len
+    return None
+
+def _webp_size(b: bytes):
+    chunk = b[12:16]
+    if chunk == b"VP8 " and len(b) >= 30:
+        w, h = struct.unpack("<HH", b[26:30])
+        return w & 0x3FFF, h & 0x3FFF
+    if chunk == b"VP8L" and len(b) >= 25:
+        bits = int.from_bytes(b[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X" and len(b) >= 30:
+        w = int.from_bytes(b[24:27], "little") + 1
+        h = int.from_bytes(b[27:30], "little") + 1
+        return w, h
+    return None
+
+def sniff_image(b: bytes):
+    """Return (format, width, height); width/height are None if the header is unknown/truncated."""
+    if b.startswith(b"\x89PNG\r\n\x1a\n") and len(b) >= 24:
+        w, h = struct.unpack(">II", b[16:24])
+        return "png", w, h
+    if b[:6] in (b"GIF87a", b"GIF89a") and len(b) >= 10:
+        w, h = struct.unpack("<HH", b[6:10])
+        return "gif", w, h
+    if b.startswith(b"\xff\xd8"):
+        size = _jpeg_size(b)
+        return ("jpeg", *size) if size else ("jpeg", None, None)
+    if b[:4] == b"RIFF" and b[8:12] == b"WEBP":
+        size = _webp_size(b)
+        return ("webp", *size) if size else ("webp", None, None)
+    if b[4:12] in (b"ftypavif", b"ftypavis", b"ftypheic", b"ftypmif1"):
+        return "avif", None, None
+    head = b[:256].lstrip().lower()
+    if head.startswith(b"<svg") or (head.startswith(b"<?xml") and b"<svg" in b[:1024].lower()):
+        return "svg", None, None
+    return None, None, None
+
+# ---------------- Cache ----------------
+_cache_lock = threading.Lock()
+_cache = None
+
+def _load_cache() -> dict:
+    global _cache
+    if _cache is None:
+        try:
+            _cache = json.loads(CACHE_PATH.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            _cache = {}
+    return _cache
+
+def save_cache():
+    if _cache is None:
+        return
+    CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = CACHE_PATH.with_suffix(".tmp")
+    # one writer at a time: city harvests save from several threads and
+    # share the tmp file
+    with _cache_lock:
+        tmp.write_text(json.dumps(_cache, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, CACHE_PATH)
+
+def _cached(url: str):
+    hit = _load_cache().get(url)
+    if not hit:
+        return None
+    ttl = CACHE_TTL_OK if hit.get("ok") else CACHE_TTL_BAD
+    if time.time() - hit.get("checked_at", 0) > ttl:
+        return None
+    return hit
+
+# ---------------- Probe ----------------
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=PROBE_WORKERS))
+_session.mount("http://", HTTPAdapter(pool_connections=32, pool_maxsize=PROBE_WORKERS))
+
+def _probe_uncached(url: str) -> dict:
+    out = {"ok": False, "format": None, "width": None, "height": None, "status": None}
+    try:
+        r = _session.get(
+            url,
+            headers={"Range": f"bytes=0-{PROBE_BYTES - 1}", "User-Agent": USER_AGENT},
+            timeout=PROBE_TIMEOUT,
+            stream=True,
+        )
+        out["status"] = r.status_code
+        try:
+            if r.status_code not in (200, 206):
+                return out
+            buf = bytearray()
+            for chunk in r.iter_content(8192):
+                buf.extend(chunk)
+                if len(buf) >= PROBE_BYTES:
+                    break
+        finally:
+            r.close()   # drop the rest of a 200 (server ignored Range)
+    except requests.RequestException as e:
+        out["error"] = type(e).__name__
+        return out
+
+    fmt, w, h = sniff_image(bytes(buf))
+    ctype = (r.headers.get("Content-Type") or "").lower()
+    if fmt is None and not ctype.startswith("image/"):
+        return out   # HTML error page, placeholder text, etc.
+    out.update({"ok": True, "format": fmt or ctype.split(";")[0], "width": w, "height": h})
+    return out
+
+def probe(url: str) -> dict:
+    hit = _cached(url)
+    if hit is not None:
+        return hit
+    res = _probe_uncached(url)
+    res["checked_at"] = int(time.time())
+    with _cache_lock:
+        _load_cache()[url] = res
+    return res
+
+def probe_many(urls, workers: int = PROBE_WORKERS) -> dict:
+    """Probe unique URLs concurrently. Returns url -> result."""
+    unique = [u for u in dict.fromkeys(urls) if u]
+    if not unique:
+        return {}
+    _load_cache()
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(unique)))) as ex:
+        results = dict(zip(unique, ex.map(probe, unique)))
+    save_cache()
+    return results
+
+def is_conclusive(res: dict) -> bool:
+    """True when the probe really judged the image (alive, gone, or not an image);
+    False for network errors, rate limits, bot blocks and server errors."""
+    if not res:
+        return False
+    if res.get("ok"):
+        return True
+    status = res.get("status")
+    return status in (200, 206, 404, 410)
+
+def is_usable(res: dict, min_w: int, min_h: int) -> bool:
+    if not res or not res.get("ok"):
+        return False
+    w, h = res.get("width"), res.get("height")
+    if w is None or h is None:
+        return True    # alive but dimensions unknown (svg/avif/truncated header)
+    return w >= min_w and h >= min_h
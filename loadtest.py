@@ -0,0 +1,436 @@
+# loadtest.py  (guest-traffic load test for the static concierge site)
+#
+# Serves public/ locally behind a simulated guest network (per-connection
+# latency + bandwidth) and replays N concurrent guest sessions through the
+# same fetch sequence a browser does: index.html, its stylesheet / script /
+# logo, then every data/*.json that script.js fetches on load. Each session
+# can visit more than once so caching strategies show up in the numbers.
+#
+#   python loadtest.py                                  # all strategies, 50 guests
+#   python loadtest.py --sessions 300 --strategy etag --latency-ms 120 --kbps 1500
+#   python loadtest.py --visits 3 --revisit-after 600 --json out/loadtest.json
+#
+# Strategies change how data/*.json is cached (the shell always gets
+# Firebase Hosting's default max-age):
+#   no-store  the original setup: no-store headers and ?ts= cache-busting
+#   etag      no-cache + ETag; repeat visits revalidate and get 304s
+#   max-age   max-age=--max-age + ETag; fresh copies are reused without a request
+#   sw        public/sw.js: the first visit installs the worker (precaching the
+#             shell); repeat visits render from its cache and only check
+#             data/manifest.json, re-downloading files whose hash changed
+import re
+import sys
+import json
+import gzip
+import zlib
+import time
+import hashlib
+import argparse
+import threading
+import statistics
+from pathlib import Path
+from html.parser import HTMLParser
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+PUBLIC_DIR = Path("public")
+SHELL_MAX_AGE = 3600          # Firebase Hosting default for static files
+BROWSER_CONNECTIONS = 6       # per-host connection limit in browsers
+CHUNK = 4096
+
+COMPRESSIBLE = {".html", ".css", ".js", ".json", ".svg", ".txt"}
+CONTENT_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".css": "text/css; charset=utf-8",
+    ".js": "text/javascript; charset=utf-8",
+    ".json": "application/json; charset=utf-8",
+    ".svg": "image/svg+xml",
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".webp": "image/webp",
+}
+
+# strategy -> (Cache-Control for data/*.json, client appends ?ts=)
+STRATEGIES = {
+    "no-store": ("no-cache, no-store, must-revalidate", True),
+    "etag": ("no-cache", False),
+    "max-age": ("public, max-age={max_age}", False),
+    "sw": ("no-cache", False),
+}
+SW_SCRIPT = "sw.js"
+MANIFEST = "data/manifest.json"
+
+# ---------------- Fetch sequence ----------------
+class _ShellAssets(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.assets = []
+
+    def handle_starttag(self, tag, attrs):
+        a = dict(attrs)
+        if tag == "link" and "stylesheet" in (a.get("rel") or "") and a.get("href"):
+            self.assets.append(a["href"])
+        elif tag in ("script", "img") and a.get("src"):
+            self.assets.append(a["src"])
+
+FETCH_RE = re.compile(r"""\bfetch\(\s*[`'"]([^`'"?$]+)""")
+
+def _local(url: str) -> bool:
+    return not re.match(r"^(?:[a-z]+:)?//", url, re.I) and not url.startswith("data:")
+
+def fetch_sequence(public_dir: Path = PUBLIC_DIR):
+    """(shell assets, data files) in the order the page requests them."""
+    p = _ShellAssets()
+    p.feed((public_dir / "index.html").read_text(encoding="utf-8"))
+    shell = [u.lstrip("/") for u in dict.fromkeys(p.assets) if _local(u)]
+
+    data = []
+    for js in [u for u in shell if u.endswith(".js")]:
+        src = (public_dir / js).read_text(encoding="utf-8")
+        # script.js kicks these off in source order of their loader functions
+        data.extend(FETCH_RE.findall(src))
+    return shell, list(dict.fromkeys(data))
+
+# ---------------- Server ----------------
+class _Assets:
+    """Files read once per mtime, with a gzipped copy and a strong ETag."""
+
+    def __init__(self, root: Path):
+        self.root = root.resolve()
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def get(self, rel: str):
+        path = (self.root / rel).resolve()
+        if self.root not in path.parents or not path.is_file():
+            return None
+        mtime = path.stat().st_mtime_ns
+        with self._lock:
+            hit = self._cache.get(path)
+            if hit and hit["mtime"] == mtime:
+                return hit
+        raw = path.read_bytes()
+        entry = {
+            "mtime": mtime,
+            "raw": raw,
+            "gz": gzip.compress(raw, 6) if path.suffix in COMPRESSIBLE else None,
+            "etag": '"%s"' % hashlib.sha1(raw).hexdigest()[:16],
+            "type": CONTENT_TYPES.get(path.suffix, "application/octet-stream"),
+        }
+        with self._lock:
+            self._cache[path] = entry
+        return entry
+
+class GuestNetworkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        srv = self.server
+        rel = self.path.split("?", 1)[0].split("#", 1)[0].lstrip("/") or "index.html"
+        time.sleep(srv.latency_s)
+
+        asset = srv.assets.get(rel)
+        if asset is None:
+            self.send_error(404)
+            return
+
+        if rel == MANIFEST or rel == SW_SCRIPT:
+            cache_control = "no-cache"      # as in firebase.json
+        elif rel.startswith("data/"):
+            cache_control = srv.data_cache_control
+        elif rel.endswith(".html"):
+            cache_control = "no-cache"
+        else:
+            cache_control = f"public, max-age={SHELL_MAX_AGE}"
+        use_etag = "no-store" not in cache_control
+
+        if use_etag and self.headers.get("If-None-Match") == asset["etag"]:
+            self.send_response(304)
+            self.send_header("ETag", asset["etag"])
+            self.send_header("Cache-Control", cache_control)
+            self.end_headers()
+            return
+
+        gz = srv.gzip and asset["gz"] is not None and "gzip" in (self.headers.get("Accept-Encoding") or "")
+        body = asset["gz"] if gz else asset["raw"]
+        self.send_response(200)
+        self.send_header("Content-Type", asset["type"])
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", cache_control)
+        if use_etag:
+            self.send_header("ETag", asset["etag"])
+        if gz:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        self._throttled_write(body)
+
+    def _throttled_write(self, body: bytes):
+        bps = self.server.bytes_per_s
+        for i in range(0, len(body), CHUNK):
+            chunk = body[i:i + CHUNK]
+            self.wfile.write(chunk)
+            if bps:
+                time.sleep(len(chunk) / bps)
+
+class _GuestServer(ThreadingHTTPServer):
+    # the default backlog (5) drops SYNs under a lobby-sized burst and the
+    # 1 s retransmit would show up as fake tail latency
+    request_queue_size = 1024
+
+def serve(public_dir: Path, strategy: str, latency_ms: float, kbps: float,
+          max_age: int, use_gzip: bool, port: int = 0) -> ThreadingHTTPServer:
+    srv = _GuestServer(("127.0.0.1", port), GuestNetworkHandler)
+    srv.daemon_threads = True
+    srv.assets = _Assets(public_dir)
+    srv.latency_s = latency_ms / 1000.0
+    srv.bytes_per_s = kbps * 1000 / 8 if kbps else 0
+    srv.gzip = use_gzip
+    srv.data_cache_control = STRATEGIES[strategy][0].format(max_age=max_age)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+
+# ---------------- Guest sessions ----------------
+def _max_age(cache_control: str):
+    cc = (cache_control or "").lower()
+    if "no-store" in cc or "no-cache" in cc:
+        return 0
+    m = re.search(r"max-age=(\d+)", cc)
+    return int(m.group(1)) if m else 0
+
+class Guest:
+    """One device: a keep-alive session plus a minimal HTTP cache on a virtual clock."""
+
+    def __init__(self, base: str, cache_bust: bool, sw: bool = False):
+        self.base = base
+        self.cache_bust = cache_bust
+        self.sw = sw
+        self.sw_cache = {}  # path -> manifest hash ("" for shell) once the worker is installed
+        self.http = requests.Session()
+        self.http.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=BROWSER_CONNECTIONS))
+        self.http.headers["Accept-Encoding"] = "gzip"
+        self.cache = {}     # path -> {"etag", "expires"}
+        self.clock = 0.0    # virtual seconds since the first visit
+        self._lock = threading.Lock()
+
+    def get(self, rel: str, bust: bool, stats: dict, reload: bool = False):
+        """Fetch like a browser would; returns (status, decoded body or None)."""
+        with self._lock:
+            entry = None if (bust or reload) else self.cache.get(rel)
+            if entry and entry["expires"] > self.clock:
+                stats["cache_hits"] += 1
+                return 304, None
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        url = f"{self.base}/{rel}" + (f"?ts={int(time.time() * 1000)}" if bust else "")
+
+        t0 = time.perf_counter()
+        r = self.http.get(url, headers=headers, stream=True)
+        body = r.raw.read(decode_content=False)
+        elapsed = time.perf_counter() - t0
+        r.close()
+
+        with self._lock:
+            stats["requests"] += 1
+            stats["latencies"].append(elapsed)
+            stats["bytes"] += len(body)
+            if r.status_code == 304:
+                stats["not_modified"] += 1
+            cc = r.headers.get("Cache-Control", "")
+            if "no-store" not in cc and r.status_code in (200, 304):
+                self.cache[rel] = {
+                    "etag": r.headers.get("ETag") or (entry or {}).get("etag"),
+                    "expires": self.clock + _max_age(cc),
+                }
+        if r.status_code != 200:
+            return r.status_code, None
+        if r.headers.get("Content-Encoding") == "gzip":
+            body = zlib.decompress(body, 16 + zlib.MAX_WBITS)
+        return 200, body
+
+    def _manifest_hashes(self, stats) -> dict | None:
+        status, body = self.get(MANIFEST, False, stats)
+        if status != 200:
+            return None
+        try:
+            files = json.loads(body).get("files") or {}
+        except ValueError:
+            return None
+        return {f"data/{name}": (e or {}).get("hash", "") for name, e in files.items()}
+
+    def _install_worker(self, shell, data, stats):
+        # sw.js install: precache the shell bypassing the HTTP cache
+        self.get(SW_SCRIPT, False, stats)
+        for u in ["index.html", *shell]:
+            self.get(u, False, stats, reload=True)
+            self.sw_cache[u] = ""
+        hashes = self._manifest_hashes(stats) or {}
+        for rel in data:
+            self.sw_cache[rel] = hashes.get(rel, "")
+
+    def _visit_from_worker(self, shell, data, stats, t0):
+        # everything renders from the worker's cache; the network work is background
+        stats["cache_hits"] += len(self.sw_cache)
+        stats["first_data_s"] = stats["all_data_s"] = time.perf_counter() - t0
+        self.get(SW_SCRIPT, False, stats)                 # browser's update check
+        hashes = self._manifest_hashes(stats)
+        if hashes is None:
+            return stats                                  # 304: nothing changed
+        for rel in data:
+            if hashes.get(rel) != self.sw_cache.get(rel):
+                self.get(rel, False, stats, reload=True)
+                self.sw_cache[rel] = hashes.get(rel, "")
+        return stats
+
+    def visit(self, shell, data) -> dict:
+        stats = {"requests": 0, "bytes": 0, "not_modified": 0, "cache_hits": 0, "latencies": []}
+        t0 = time.perf_counter()
+        if self.sw and self.sw_cache:
+            self._visit_from_worker(shell, data, stats, t0)
+            stats["total_s"] = time.perf_counter() - t0
+            return stats
+        with ThreadPoolExecutor(max_workers=BROWSER_CONNECTIONS) as pool:
+            self.get("index.html", False, stats)
+            # stylesheet, logos and script download in parallel; data waits on script.js
+            scripts = [u for u in shell if u.endswith(".js")]
+            others = [pool.submit(self.get, u, False, stats) for u in shell if u not in scripts]
+            for u in scripts:
+                self.get(u, False, stats)
+
+            data_done = []
+            def load(rel):
+                self.get(rel, self.cache_bust, stats)
+                data_done.append(time.perf_counter() - t0)
+            for f in [pool.submit(load, rel) for rel in data] + others:
+                f.result()
+
+        stats["first_data_s"] = min(data_done) if data_done else None
+        stats["all_data_s"] = max(data_done) if data_done else None
+        if self.sw:
+            self._install_worker(shell, data, stats)
+        stats["total_s"] = time.perf_counter() - t0
+        return stats
+
+def run_session(base, cache_bust, shell, data, visits, revisit_after, sw=False):
+    guest = Guest(base, cache_bust, sw)
+    try:
+        out = []
+        for _ in range(visits):
+            out.append(guest.visit(shell, data))
+            guest.clock += revisit_after
+        return out
+    finally:
+        guest.http.close()
+
+# ---------------- Report ----------------
+def _pct(values, p):
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+    k = min(len(values) - 1, max(0, int(round(p / 100 * len(values) + 0.5)) - 1))
+    return values[k]
+
+def summarize(visits: list[dict]) -> dict:
+    lat = [x for v in visits for x in v["latencies"]]
+    return {
+        "sessions": len(visits),
+        "bytes_per_session": round(statistics.mean(v["bytes"] for v in visits)),
+        "requests_per_session": round(statistics.mean(v["requests"] for v in visits), 2),
+        "not_modified": sum(v["not_modified"] for v in visits),
+        "cache_hits": sum(v["cache_hits"] for v in visits),
+        "first_data_p50_ms": _ms(_pct([v["first_data_s"] for v in visits], 50)),
+        "first_data_p95_ms": _ms(_pct([v["first_data_s"] for v in visits], 95)),
+        "all_data_p95_ms": _ms(_pct([v["all_data_s"] for v in visits], 95)),
+        "request_p95_ms": _ms(_pct(lat, 95)),
+    }
+
+def _ms(s):
+    return None if s is None else round(s * 1000, 1)
+
+def run_strategy(strategy: str, args, shell, data) -> dict:
+    srv = serve(Path(args.public), strategy, args.latency_ms, args.kbps, args.max_age, not args.no_gzip)
+    base = f"http://127.0.0.1:{srv.server_address[1]}"
+    cache_bust = STRATEGIES[strategy][1]
+    try:
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency or args.sessions) as pool:
+            sessions = list(pool.map(
+                lambda _: run_session(base, cache_bust, shell, data, args.visits, args.revisit_after,
+                                      sw=strategy == "sw"),
+                range(args.sessions),
+            ))
+        wall = time.perf_counter() - t0
+    finally:
+        srv.shutdown()
+        srv.server_close()
+
+    by_visit = {f"visit_{i + 1}": summarize([s[i] for s in sessions]) for i in range(args.visits)}
+    return {"strategy": strategy, "wall_s": round(wall, 2), **by_visit}
+
+def print_table(results: list[dict], visits: int):
+    cols = [
+        ("bytes/sess", "bytes_per_session"),
+        ("req/sess", "requests_per_session"),
+        ("304s", "not_modified"),
+        ("hits", "cache_hits"),
+        ("1st data p50", "first_data_p50_ms"),
+        ("1st data p95", "first_data_p95_ms"),
+        ("all data p95", "all_data_p95_ms"),
+        ("req p95", "request_p95_ms"),
+    ]
+    head = f"{'strategy':<10} {'visit':<6}" + "".join(f"{c:>14}" for c, _ in cols)
+    print(head)
+    print("-" * len(head))
+    for res in results:
+        for i in range(visits):
+            row = res[f"visit_{i + 1}"]
+            print(f"{res['strategy']:<10} {i + 1:<6}" + "".join(
+                f"{'-' if row[k] is None else row[k]:>14}" for _, k in cols))
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Load-test public/ under simulated guest traffic")
+    ap.add_argument("--public", default=str(PUBLIC_DIR))
+    ap.add_argument("--strategy", choices=[*STRATEGIES, "all"], default="all")
+    ap.add_argument("--sessions", type=int, default=50, help="concurrent guests")
+    ap.add_argument("--concurrency", type=int, default=0, help="cap on simultaneous guests (default: all)")
+    ap.add_argument("--visits", type=int, default=2, help="page loads per guest")
+    ap.add_argument("--revisit-after", type=float, default=120.0,
+                    help="virtual seconds between a guest's visits (for max-age freshness)")
+    ap.add_argument("--latency-ms", type=float, default=80.0, help="added per request")
+    ap.add_argument("--kbps", type=float, default=4000.0, help="per-connection bandwidth, 0 = unlimited")
+    ap.add_argument("--max-age", type=int, default=300, help="data max-age for the max-age strategy")
+    ap.add_argument("--no-gzip", action="store_true", help="serve uncompressed (Firebase gzips)")
+    ap.add_argument("--json", help="also write results to this file")
+    args = ap.parse_args(argv)
+
+    shell, data = fetch_sequence(Path(args.public))
+    if not data:
+        print("❌ No data fetches found in the page scripts")
+        return 1
+    print(f"🧭 Sequence: index.html → {', '.join(shell)} → {', '.join(data)}")
+    print(f"🌐 Network: +{args.latency_ms:g} ms, {args.kbps:g} kbps/conn; "
+          f"{args.sessions} guests × {args.visits} visit(s)")
+
+    strategies = list(STRATEGIES) if args.strategy == "all" else [args.strategy]
+    results = []
+    for s in strategies:
+        results.append(run_strategy(s, args, shell, data))
+        print(f"  ✓ {s} ({results[-1]['wall_s']} s)")
+    print()
+    print_table(results, args.visits)
+
+    if args.json:
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+        print(f"\n✅ Wrote {args.json}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
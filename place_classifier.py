@@ -0,0 +1,153 @@
+# place_classifier.py  (compiled category rules for Places results)
+#
+# All bucket / exclusion / hawker rules are compiled once into set lookups and
+# single-pass regex matchers, and each place is classified into a bitmask that
+# the frontend categorize() reads directly (see CATEGORY_BITS in script.js).
+import re
+
+# Keep in sync with CATEGORY_BITS in public/script.js
+CATEGORY_BITS = {
+    "restaurants": 1,
+    "cafes": 2,
+    "bars": 4,
+    "bookstores": 8,
+    "hawker": 16,
+}
+
+# Name-based categorization (mirrors the NAME_IS_* regexes in public/script.js;
+# ASCII word boundaries, same as JS \b)
+NAME_RULES = {
+    "cafes": r"\b(café|cafe|coffee|espresso|roastery|coffee\s*bar|bakery)\b",
+    "bars": r"\b(bar|pub|taproom|wine\s*bar|speakeasy)\b"
+            r"|\b(cocktail|cocktails|wine|beer|ale|lager|ipa|stout|porter|whisky|whiskey|gin|rum|tequila|mezcal|soju|sake|spirits|liqueur)\b",
+    "restaurants": r"\b(restaurant|ristorante|trattoria|bistro|eatery|osteria|cantina|kitchen|diner)\b",
+    "bookstores": r"\b(bookstore|book\s*shop|book\s*store|books|comics|manga|书店|書店|书屋|書屋)\b",
+}
+
+# primaryType substring -> category, used when the name says nothing
+PRIMARY_RULES = (
+    ("cafe", "cafes"),
+    ("bar", "bars"),
+    ("restaurant", "restaurants"),
+    ("book_store", "bookstores"),
+)
+
+def _alternation(phrases) -> re.Pattern | None:
+    phrases = sorted({p.lower() for p in phrases if p}, key=len, reverse=True)
+    if not phrases:
+        return None
+    return re.compile("|".join(re.escape(p) for p in phrases))
+
+def _norm(s) -> str:
+    return (s or "").strip().lower()
+
+def _name_of(p: dict) -> str:
+    return (p.get("displayName") or {}).get("text") or p.get("name") or ""
+
+class PlaceClassifier:
+    """
+    Compiled view of the get_places.py rule tables.
+
+    - admit(p, bucket): global exclusions + per-bucket primaryType restriction
+                        (reject_reason(p, bucket) says which one failed)
+    - is_hawker(p):     hawker centre detection (memoized per place id + the fields it reads)
+    - mask(p):          category bitmask for the frontend
+    """
+
+    def __init__(self, excluded_primary, allowed_primary, hawker_name_tokens,
+                 hawker_name_keywords, hawker_types=("food_court",)):
+        self.excluded_primary = frozenset(_norm(t) for t in excluded_primary)
+        self.allowed_primary = {
+            bucket: (frozenset(_norm(t) for t in allowed) if allowed else None)
+            for bucket, allowed in allowed_primary.items()
+        }
+        self.hawker_types = frozenset(_norm(t) for t in hawker_types)
+        self._hawker_token_re = _alternation(hawker_name_tokens)
+        self._hawker_keyword_re = _alternation(hawker_name_keywords)
+        self._name_res = [(CATEGORY_BITS[cat], re.compile(rx, re.I | re.A)) for cat, rx in NAME_RULES.items()]
+
+        self._primary_ok = {}      # primaryType -> bool
+        self._primary_bits = {}    # primaryType -> fallback mask
+        self._hawker_by_id = {}    # _hawker_key(p) -> bool
+
+    # ---- Admission ----
+    def is_allowed_primary(self, primary: str) -> bool:
+        p = _norm(primary)
+        ok = self._primary_ok.get(p)
+        if ok is None:
+            ok = p not in self.excluded_primary and "hotel" not in p
+            self._primary_ok[p] = ok
+        return ok
+
+    def reject_reason(self, p: dict, bucket: str) -> str | None:
+        primary = _norm(p.get("primaryType"))
+        if not self.is_allowed_primary(primary):
+            return "excluded_primary"
+        allowed = self.allowed_primary.get(bucket)
+        if allowed and primary not in allowed:
+            return "bucket_restriction"
+        return None
+
+    def admit(self, p: dict, bucket: str) -> bool:
+        return self.reject_reason(p, bucket) is None
+
+    # ---- Hawker ----
+    def _hawker_uncached(self, p: dict) -> bool:
+        primary = _norm(p.get("primaryType"))
+        if primary in self.hawker_types:
+            return True
+        name = _norm(_name_of(p))
+        if self._hawker_token_re and self._hawker_token_re.search(name):
+            return True
+        if self._hawker_keyword_re and self._hawker_keyword_re.search(name):
+            types = p.get("types") or ()
+            return any(_norm(t) in self.hawker_types for t in types)
+        return False
+
+    @staticmethod
+    def _hawker_key(p: dict):
+        # the id alone would outlive a renamed / retyped place in a long-running
+        # process (refresher daemon, backfill over many archives)
+        pid = p.get("id") or p.get("place_id")
+        if not pid:
+            return None
+        return pid, _name_of(p), p.get("primaryType"), tuple(p.get("types") or ())
+
+    def is_hawker(self, p: dict) -> bool:
+        key = self._hawker_key(p)
+        if key is None:
+            return self._hawker_uncached(p)
+        hit = self._hawker_by_id.get(key)
+        if hit is None:
+            hit = self._hawker_by_id[key] = self._hawker_uncached(p)
+        return hit
+
+    # ---- Categories ----
+    def _fallback_bits(self, primary: str) -> int:
+        bits = self._primary_bits.get(primary)
+        if bits is None:
+            bits = 0
+            for needle, cat in PRIMARY_RULES:
+                if needle in primary:
+                    bits |= CATEGORY_BITS[cat]
+            self._primary_bits[primary] = bits
+        return bits
+
+    def mask(self, p: dict) -> int:
+        name = _name_of(p)
+        bits = 0
+        for bit, rx in self._name_res:
+            if rx.search(name):
+                bits |= bit
+        if not bits:
+            bits = self._fallback_bits(_norm(p.get("primaryType") or p.get("primary_type")))
+        if self.is_hawker(p):
+            bits |= CATEGORY_BITS["hawker"]
+        return bits
+
+    def classify(self, places) -> list[int]:
+        """Batch classify: one bitmask per place, in input order."""
+        return [self.mask(p) for p in places]
+
+def mask_to_categories(mask: int) -> list[str]:
+    return [cat for cat, bit in CATEGORY_BITS.items() if mask & bit]
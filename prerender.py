@@ -0,0 +1,247 @@
+# prerender.py  (build step: first screen of index.html rendered from the data)
+#
+# Without this, a guest scanning the QR code sees an empty shell until
+# script.js has fetched places/events/attractions and rendered them. Run after
+# the data pipelines, this renders the hero slides, the top picks carousel and
+# the first event cards straight into index.html (between the
+# <!-- prerender:NAME --> markers), and inlines the records they were built
+# from as JSON. script.js hydrates that markup in place and only appends /
+# replaces what the full data changes.
+#
+# The selection logic mirrors buildHeroFromPlaces / pickTopPicks / renderEvents
+# in public/script.js (keep in sync); if the two ever disagree the page just
+# re-renders that block once the data has loaded.
+#
+#   python prerender.py                          # public/index.html in place
+#   python prerender.py --out .cache/serve/index.html
+import re
+import json
+import math
+import argparse
+from html import escape
+from pathlib import Path
+from datetime import datetime, timezone
+
+from place_classifier import CATEGORY_BITS, mask_to_categories
+
+PUBLIC_DIR = Path("public")
+DATA_DIR = PUBLIC_DIR / "data"
+INDEX_PATH = PUBLIC_DIR / "index.html"
+
+HERO_SLIDES = 6
+TOP_PICKS = 12
+EVENT_CARDS = 6      # first row or two; script.js appends the rest
+TOP_PICK_QUOTAS = {"restaurants": 3, "cafes": 3, "bars": 3, "bookstores": 3}
+
+_classifier = None
+
+def _esc(v) -> str:
+    return escape("" if v is None else str(v), quote=True)
+
+def _css_url(v) -> str:
+    """URL safe inside CSS url('…'): percent-encode quotes, parens, backslash and whitespace."""
+    return re.sub(r"""['"()\\ \t\n\r\f]""", lambda m: f"%{ord(m.group()):02X}", "" if v is None else str(v))
+
+def _js_num(v) -> str:
+    """Number as JS template literals print it (4.0 -> "4")."""
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v)
+
+def _finite(v) -> bool:
+    return isinstance(v, (int, float)) and not isinstance(v, bool) and math.isfinite(v)
+
+def _js_round(x: float) -> int:
+    return math.floor(x + 0.5)
+
+def _records(path: Path, key: str) -> list[dict]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return []
+    items = data.get(key) if isinstance(data, dict) else data
+    return items if isinstance(items, list) else []
+
+# ---------------- Selection (mirrors script.js) ----------------
+def place_key(p: dict) -> str:
+    return p.get("place_id") or p.get("name") or ""
+
+def event_key(e: dict) -> str:
+    return e.get("url") or f"{e.get('title') or ''}|{e.get('start') or ''}"
+
+def format_distance(m) -> str:
+    if not _finite(m):
+        return ""
+    if m < 1000:
+        return f"{_js_round(m)} m"
+    km = m / 1000
+    return f"{km:.1f} km" if km < 10 else f"{_js_round(km)} km"
+
+def top_score(p: dict) -> float:
+    r = float(p.get("rating") or 0)
+    n = float(p.get("rating_count") or 0)
+    d = p.get("distance_m")
+    d = 0 if d is None else d      # Number(null) is 0 in script.js
+    C, m = 25, 4.3
+    bayes = (C * m + n * r) / (C + n)
+    dist_boost = max(0, 1 - min(d, 1200) / 1200) if _finite(d) else 0
+    return bayes + dist_boost
+
+def categories(p: dict) -> set:
+    mask = p.get("category_mask")
+    if not isinstance(mask, int):
+        global _classifier
+        if _classifier is None:
+            from get_places import CLASSIFIER
+            _classifier = CLASSIFIER
+        mask = _classifier.mask(p)
+    return set(mask_to_categories(mask & ~CATEGORY_BITS["hawker"]))
+
+def hero_picks(places: list[dict]) -> list[dict]:
+    with_photo = [p for p in places if p.get("photo_url")]
+    return sorted(with_photo, key=top_score, reverse=True)[:HERO_SLIDES]
+
+def pick_top_picks(places: list[dict], limit: int = TOP_PICKS) -> list[dict]:
+    scored = sorted((p for p in places if p.get("photo_url")), key=top_score, reverse=True)
+    buckets = {k: [] for k in (*TOP_PICK_QUOTAS, "other")}
+    for p in scored:
+        tags = categories(p)
+        key = next((k for k in TOP_PICK_QUOTAS if k in tags), "other")
+        buckets[key].append(p)
+    picks = []
+    for k in buckets:
+        for p in buckets[k][:TOP_PICK_QUOTAS.get(k, 0)]:
+            if len(picks) < limit:
+                picks.append(p)
+    chosen = {id(p) for p in picks}
+    for p in scored:
+        if len(picks) >= limit:
+            break
+        if id(p) not in chosen:
+            picks.append(p)
+    return picks[:limit]
+
+def first_events(events: list[dict], limit: int = EVENT_CARDS) -> list[dict]:
+    # renderEvents with the default "All / Any time" filters
+    items = [e for e in events if isinstance(e.get("image"), str) and e["image"].strip()]
+    timed = sorted((e for e in items if _finite(e.get("start_ts"))), key=lambda e: e["start_ts"])
+    return (timed + [e for e in items if not _finite(e.get("start_ts"))])[:limit]
+
+# ---------------- Markup (same templates as script.js) ----------------
+def hero_slide_html(p: dict, i: int) -> str:
+    active = " is-active" if i == 0 else ""
+    return (f'<div class="hs-slide{active}" role="img" aria-label="{_esc(p.get("name"))}" '
+            f'data-key="{_esc(place_key(p))}" style="background-image:url(\'{_esc(_css_url(p["photo_url"]))}\')"></div>')
+
+def hero_dots_html(count: int) -> str:
+    return "".join(
+        f'<button class="hs-dot{" is-active" if i == 0 else ""}" role="tab" '
+        f'aria-selected="{"true" if i == 0 else "false"}" aria-label="Slide {i + 1}"></button>'
+        for i in range(count)
+    )
+
+def top_slide_html(p: dict) -> str:
+    name = _esc(p.get("name"))
+    rating = f"{_js_num(p['rating'])}★" if p.get("rating") else ""
+    meta = " · ".join(x for x in (rating, format_distance(p.get("distance_m"))) if x)
+    pill = f'<span class="pill">{meta}</span>' if meta else ""
+    return (f'<a class="slide" href="{_esc(p.get("maps_url") or "#")}" target="_blank" rel="noopener" '
+            f'data-key="{_esc(place_key(p))}">'
+            f'<img class="thumb" src="{_esc(p["photo_url"])}" alt="{name}" loading="lazy">'
+            f'<div class="meta"><div class="name">{name}</div>{pill}</div></a>')
+
+def _to_text(v) -> str:
+    if isinstance(v, list):
+        return ", ".join(str(x) for x in v if x)
+    if isinstance(v, dict):
+        return ", ".join(str(v[k]) for k in ("name", "address", "line1", "line2", "city") if v.get(k))
+    return "" if v is None else str(v)
+
+def event_card_html(e: dict, eager: bool = False) -> str:
+    size = (f' width="{e["image_width"]}" height="{e["image_height"]}"'
+            if e.get("image_width") and e.get("image_height") else "")
+    dist = (f'<span class="rating-pill">{format_distance(e["distance_m"])}</span>'
+            if _finite(e.get("distance_m")) else "")
+    link = (f'<a class="btn-link" href="{_esc(e["url"])}" target="_blank" rel="noopener">Event Link</a>'
+            if e.get("url") else "")
+    return (f'<article class="card" data-key="{_esc(event_key(e))}">'
+            f'<div class="thumb-wrap"><img class="thumb event-img" src="{_esc(e["image"])}" '
+            f'alt="{_esc(e.get("title"))}" loading="{"eager" if eager else "lazy"}"{size}>{dist}</div>'
+            f'<div class="title">{_esc(e.get("title"))}</div>'
+            f'<div class="addr">{_esc(_to_text(e.get("venue")) or _to_text(e.get("address")))}</div>'
+            f'<div class="addr"><b>{_esc(e.get("start") or "")}</b></div>'
+            f'<div class="actions">{link}</div></article>')
+
+def data_script(payload: dict) -> str:
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
+    return f'<script id="prerendered" type="application/json">{body}</script>'
+
+# ---------------- index.html ----------------
+def splice(html: str, name: str, content: str) -> str:
+    """Replace what's between <!-- prerender:name --> and <!-- /prerender:name -->."""
+    rx = re.compile(rf"(<!-- prerender:{re.escape(name)} -->).*?(<!-- /prerender:{re.escape(name)} -->)", re.S)
+    html, n = rx.subn(lambda m: m.group(1) + content + m.group(2), html, count=1)
+    if not n:
+        raise ValueError(f"marker <!-- prerender:{name} --> not found")
+    return html
+
+def _set_hidden(html: str, section_id: str, hidden: bool) -> str:
+    def fix(m):
+        classes = [c for c in m.group(2).split() if c != "hidden"] + (["hidden"] if hidden else [])
+        return f'{m.group(1)}{" ".join(classes)}"'
+    return re.sub(rf'(<section id="{re.escape(section_id)}" class=")([^"]*)"', fix, html, count=1)
+
+def render(html: str, places: list[dict], events: list[dict]) -> tuple[str, dict]:
+    hero = hero_picks(places)
+    picks = pick_top_picks(places)
+    cards = first_events(events)
+
+    html = splice(html, "hero-slides", "".join(hero_slide_html(p, i) for i, p in enumerate(hero)))
+    html = splice(html, "hero-dots", hero_dots_html(len(hero)))
+    html = splice(html, "top-picks", "".join(top_slide_html(p) for p in picks))
+    html = _set_hidden(html, "topPicks", not picks)
+    html = splice(html, "events", "".join(event_card_html(e, eager=i < 2) for i, e in enumerate(cards)))
+
+    slice_places = list({place_key(p): p for p in [*hero, *picks]}.values())
+    html = splice(html, "data", data_script({
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "places": slice_places,
+        "events": cards,
+    }))
+    return html, {"hero": len(hero), "top_picks": len(picks), "events": len(cards)}
+
+def build(index_path: Path = INDEX_PATH, out_path: Path | None = None, data_dir: Path = DATA_DIR) -> dict:
+    out_path = Path(out_path or index_path)
+    html, stats = render(
+        Path(index_path).read_text(encoding="utf-8"),
+        _records(data_dir / "places.json", "places"),
+        _records(data_dir / "events.json", "events"),
+    )
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out_path.with_name(f".{out_path.name}.tmp")
+    tmp.write_text(html, encoding="utf-8")
+    tmp.replace(out_path)
+    stats["bytes"] = len(html.encode("utf-8"))
+    return stats
+
+def safe_build(index_path: Path = INDEX_PATH, out_path: Path | None = None, data_dir: Path = DATA_DIR):
+    """Refresh hook: a prerender problem must not fail a data refresh (the page still works unrendered)."""
+    try:
+        stats = build(index_path, out_path, data_dir)
+        print(f"🖼️ Prerendered {out_path or index_path}: {stats}")
+        return stats
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Prerender failed: {e}")
+        return None
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Render the first screen of index.html from public/data")
+    ap.add_argument("--index", default=str(INDEX_PATH), help="template with <!-- prerender:* --> markers")
+    ap.add_argument("--out", default=None, help="write here instead of rewriting --index in place")
+    ap.add_argument("--data-dir", default=str(DATA_DIR))
+    args = ap.parse_args(argv)
+    stats = build(Path(args.index), args.out and Path(args.out), Path(args.data_dir))
+    print(f"✅ Prerendered {args.out or args.index}: {stats}")
+
+if __name__ == "__main__":
+    main()
@@ -28,6 +28,8 @@ const scrollCue = document.querySelector('.scroll-cue');
 // Events / attractions refs
 const heroAttractionLink = document.getElementById('heroAttractionLink');
 const eventCatSel = document.getElementById('eventCat');
+const eventWhenSel = document.getElementById('eventWhen');
+const eventListEl = document.getElementById('eventList');
 
 // Auto-close filters on small screens (matches your CSS breakpoint)
 const mqlMobile = window.matchMedia('(max-width: 639px)');
@@ -37,6 +39,8 @@ let featuredAttractions = [];
 let selectedType = (typeSel?.value || 'all').toLowerCase();
 let allEventsData = [];
 let selectedEventCat = 'all';
+let selectedEventWhen = 'all';
+let eventBucketIndex = null;   // { bucket: [event indexes] } from events.json, if still current
 let heroMode = 'places';
 
 
@@ -54,10 +58,14 @@ const NAME_ALCOHOL_RE = /\b(cocktail|cocktails|wine|beer|ale|lager|ipa|stout|por
 const NAME_IS_RESTAURANT_RE = /\b(restaurant|ristorante|trattoria|bistro|eatery|osteria|cantina|kitchen|diner)\b/i;
 const NAME_IS_BOOKSTORE_RE = /\b(bookstore|book\s*shop|book\s*store|books|comics|manga|书店|書店|书屋|書屋)\b/i;
 
+// Precomputed by place_classifier.py (places.json -> category_mask); keep in sync with CATEGORY_BITS there
+const CATEGORY_BITS = { restaurants: 1, cafes: 2, bars: 4, bookstores: 8, hawker: 16 };
+const CATEGORY_TAGS = ['restaurants','cafes','bars','bookstores'];
+
 // Load data (places)
 async function loadPlaces() {
   try {
-    const res = await fetch(`data/places.json?ts=${Date.now()}`);
+    const res = await fetch('data/places.json');
     if (!res.ok) throw new Error(`HTTP ${res.status}`);
     const data = await res.json();
     allPlaces = Array.isArray(data.places) ? data.places : (Array.isArray(data) ? data : []);
@@ -74,7 +82,7 @@ async function loadPlaces() {
 // Load featured attractions (year-round)
 async function loadAttractions() {
   try {
-    const res = await fetch(`data/featured_attractions.json?ts=${Date.now()}`);
+    const res = await fetch('data/featured_attractions.json');
     if (!res.ok) throw new Error(`HTTP ${res.status}`);
     const data = await res.json();
     featuredAttractions = Array.isArray(data.attractions) ? data.attractions : (Array.isArray(data) ? data : []);
@@ -85,6 +93,7 @@ async function loadAttractions() {
 
 /* ---------- Helpers ---------- */
 function isHawker(p) {
+  if (Number.isInteger(p.category_mask)) return (p.category_mask & CATEGORY_BITS.hawker) !== 0;
   if (typeof p.is_hawker_centre === 'boolean') return p.is_hawker_centre;
   const name = (p.name || '').toLowerCase().trim();
   const primary = (p.primary_type || '').toLowerCase();
@@ -94,6 +103,9 @@ function isHawker(p) {
   return canonicalNameHit || metaHit;
 }
 function categorize(p){
+  if (Number.isInteger(p.category_mask)) {
+    return new Set(CATEGORY_TAGS.filter(t => p.category_mask & CATEGORY_BITS[t]));
+  }
   const tags = new Set();
   const name = p.name || '';
   const primary = (p.primary_type || '').toLowerCase();
@@ -250,10 +262,13 @@ function buildHeroFromPlaces(all){
 
   const picks = [...all].filter(p => p.photo_url).sort((a,b)=> topScore(b) - topScore(a)).slice(0, 6);
 
-  heroSlidesEl.innerHTML = picks.map((p, i) =>
-    `<div class="hs-slide${i===0 ? ' is-active':''}" role="img" aria-label="${esc(p.name || '')}"
-       style="background-image:url('${p.photo_url}')"></div>`
-  ).join('');
+  // already on screen (prerendered, or places data unchanged): keep the slides
+  if (!sameKeys(heroSlidesEl, picks.map(placeKey))) {
+    heroSlidesEl.innerHTML = picks.map((p, i) =>
+      `<div class="hs-slide${i===0 ? ' is-active':''}" role="img" aria-label="${esc(p.name || '')}"
+         data-key="${esc(placeKey(p))}" style="background-image:url('${esc(cssUrl(p.photo_url))}')"></div>`
+    ).join('');
+  }
   heroSlides = [...heroSlidesEl.querySelectorAll('.hs-slide')];
 
   rebuildDots(heroSlides.length);
@@ -285,7 +300,7 @@ function buildEventsHero(attractions){
       <div class="hs-slide${i===0?' is-active':''}" role="img"
            aria-label="${title}"
            data-href="${esc(href)}"
-           style="background-image:url('${img}')"></div>
+           style="background-image:url('${esc(cssUrl(img))}')"></div>
     `;
   }).join('');
 
@@ -328,10 +343,16 @@ function renderTopPicks(all){
   const items = pickTopPicks(all, 12);
   if (!items.length){ topSection.classList.add('hidden'); return; }
   topSection.classList.remove('hidden');
-  topTrack.innerHTML = items.map(topSlideHtml).join('');
+  fillList(topTrack, items.map(placeKey), items.map(topSlideHtml));
+  bindTopPicksControlsOnce();
+}
+let topControlsBound = false;
+function bindTopPicksControlsOnce(){
+  if (topControlsBound) return;
   const step = () => topTrack.clientWidth * 0.9;
   topPrev?.addEventListener('click', () => topTrack.scrollBy({ left: -step(), behavior:'smooth'}));
   topNext?.addEventListener('click', () => topTrack.scrollBy({ left:  step(), behavior:'smooth'}));
+  topControlsBound = true;
 }
 function topSlideHtml(p){
   const name = esc(p.name || '');
@@ -339,7 +360,7 @@ function topSlideHtml(p){
   const rating = p.rating ? `${p.rating}★` : '';
   const meta = [rating, dist].filter(Boolean).join(' · ');
   return `
-    <a class="slide" href="${p.maps_url || '#'}" target="_blank" rel="noopener">
+    <a class="slide" href="${p.maps_url || '#'}" target="_blank" rel="noopener" data-key="${esc(placeKey(p))}">
       <img class="thumb" src="${p.photo_url}" alt="${name}" loading="lazy">
       <div class="meta">
         <div class="name">${name}</div>
@@ -416,11 +437,35 @@ function autoCloseFiltersIfMobile(panel) {
 // utils
 const num = v => Number.isFinite(v) ? v : parseFloat(v);
 function esc(s=''){ return s.replace(/[&<>\"']/g, c => ({'&':'&amp;','<':'&lt;','>':'&gt;','"':'&quot;',"'":'&#39;'}[c])); }
+// for CSS url('…'): same encoding as _css_url() in prerender.py
+const cssUrl = (s='') => String(s).replace(/['"()\\ \t\n\r\f]/g, c => '%' + c.charCodeAt(0).toString(16).toUpperCase().padStart(2, '0'));
 const toText = (v) => Array.isArray(v) ? v.filter(Boolean).join(', ')
   : (v && typeof v === 'object')
     ? (['name','address','line1','line2','city'].map(k => v[k]).filter(Boolean).join(', ') || String(v))
     : (v ?? '');
 
+// Keys shared with prerender.py: prerendered children carry data-key, so a
+// render that would produce the same items leaves them alone.
+const placeKey = p => p.place_id || p.name || '';
+const eventKey = e => e.url || `${e.title || ''}|${e.start || ''}`;
+function sameKeys(el, keys){
+  const have = [...el.children].map(c => c.dataset.key);
+  return have.length === keys.length && have.every((k, i) => k === keys[i]);
+}
+// Keep the leading children that already match `keys` and append the rest;
+// anything else is a full re-render. Returns the newly added elements.
+function fillList(el, keys, htmls, emptyHtml = ''){
+  const have = [...el.children].map(c => c.dataset.key);
+  const prefix = have.length > 0 && have.length <= keys.length && have.every((k, i) => k === keys[i]);
+  if (!prefix) {
+    el.innerHTML = htmls.join('') || emptyHtml;
+    return [...el.children];
+  }
+  const before = el.children.length;
+  el.insertAdjacentHTML('beforeend', htmls.slice(have.length).join(''));
+  return [...el.children].slice(before);
+}
+
 // ------- Family (curated) helpers -------
 function scoreAttraction(a){
   const r = Number(a.rating) || 0;
@@ -455,10 +500,12 @@ function renderFamilyAttractionsIntoEventsPanel(){
 // ---------- Events ----------
 async function loadEvents(){
   try{
-    const res = await fetch(`data/events.json?ts=${Date.now()}`);
+    const res = await fetch('data/events.json');
     if (!res.ok) throw new Error(`HTTP ${res.status}`);
     const data = await res.json();
     allEventsData = data?.events || [];
+    // Precomputed buckets are only valid on the SGT day they were generated for
+    eventBucketIndex = (data?.buckets && data.buckets_as_of === sgtDateKey(Date.now())) ? data.buckets : null;
     renderEvents(allEventsData);
   }catch(e){
     console.error('Failed to fetch events.json', e);
@@ -476,21 +523,34 @@ function renderEvents(events){
   }
 
   let items = events;
+  if (selectedEventWhen !== 'all') {
+    if (eventBucketIndex) {
+      const keep = new Set(eventBucketIndex[selectedEventWhen] || []);
+      items = items.filter((_, i) => keep.has(i));
+    } else {
+      items = items.filter(e => eventInBucket(e, selectedEventWhen, Date.now()));
+    }
+  }
   if (selectedEventCat !== 'all') {
     items = items.filter(e => ((e.category || 'general') + '').toLowerCase() === selectedEventCat);
   }
   items = items.filter(e => typeof e.image === 'string' && e.image.trim().length > 0);
 
+  // events.json ships epoch start_ts (already sorted); older files only have display strings
   const parseDate = d => (d && !isNaN(Date.parse(d))) ? new Date(d) : null;
-  items.sort((a,b)=>{
-    const A = parseDate(a.start), B = parseDate(b.start);
+  const startKey = e => Number.isFinite(e.start_ts) ? e.start_ts * 1000 : parseDate(e.start);
+  items = [...items].sort((a,b)=>{
+    const A = startKey(a), B = startKey(b);
     if (!A) return 1; if (!B) return -1; return A - B;
   });
 
-  list.innerHTML = items.slice(0,24).map(e=>`
-    <article class="card">
+  items = items.slice(0, 24);
+  const added = fillList(list, items.map(eventKey), items.map(e=>`
+    <article class="card" data-key="${esc(eventKey(e))}">
       <div class="thumb-wrap">
-        <img class="thumb event-img" src="${e.image}" alt="${esc(e.title)}" loading="lazy">
+        <img class="thumb event-img" src="${e.image}" alt="${esc(e.title)}" loading="lazy"${
+          (e.image_width && e.image_height) ? ` width="${e.image_width}" height="${e.image_height}"` : ''}>
+        ${Number.isFinite(e.distance_m) ? `<span class="rating-pill">${formatDistance(e.distance_m)}</span>` : ''}
       </div>
       <div class="title">${esc(e.title)}</div>
       <div class="addr">${esc(toText(e.venue) || toText(e.address))}</div>
@@ -499,12 +559,12 @@ function renderEvents(events){
         ${e.url ? `<a class="btn-link" href="${e.url}" target="_blank" rel="noopener">Event Link</a>` : ''}
       </div>
     </article>
-  `).join('') || `<div class="notice">No events found.</div>`;
+  `), `<div class="notice">No events found.</div>`);
 
-  pruneBrokenEventImages(list);
+  pruneBrokenEventImages(added);
 }
-function pruneBrokenEventImages(root){
-  root.querySelectorAll('img.event-img').forEach(img => {
+function pruneBrokenEventImages(cards){
+  cards.flatMap(c => [...c.querySelectorAll('img.event-img')]).forEach(img => {
     const removeCard = () => img.closest('article.card')?.remove();
     img.addEventListener('error', removeCard, { once: true });
     img.addEventListener('load', () => {
@@ -518,11 +578,37 @@ function pruneBrokenEventImages(root){
   });
 }
 
+// ---- "When" buckets (mirrors event_windows.py; SGT is UTC+8 with no DST) ----
+const SGT_OFFSET_MS = 8 * 3600 * 1000;
+const DAY_MS = 86400 * 1000;
+function sgtDateKey(ms){ return new Date(ms + SGT_OFFSET_MS).toISOString().slice(0, 10); }
+function sgtDayStart(ms){ return Math.floor((ms + SGT_OFFSET_MS) / DAY_MS) * DAY_MS - SGT_OFFSET_MS; }
+function eventInBucket(e, bucket, nowMs){
+  if (!Number.isFinite(e.start_ts) || !Number.isFinite(e.end_ts)) return false;
+  const s = e.start_ts * 1000, en = e.end_ts * 1000;
+  const overlaps = (lo, hi) => s < hi && en > lo;
+  const day0 = sgtDayStart(nowMs), day1 = day0 + DAY_MS;
+  if (bucket === 'today') return overlaps(nowMs, day1);
+  if (bucket === 'tonight') return overlaps(Math.max(nowMs, day0 + 18 * 3600e3), day1 + 4 * 3600e3);
+  if (bucket === 'this_weekend') {
+    const wd = (new Date(day0 + SGT_OFFSET_MS).getUTCDay() + 6) % 7;   // Mon=0
+    const fri = wd <= 4 ? day0 + (4 - wd) * DAY_MS : day0 - (wd - 4) * DAY_MS;
+    return overlaps(Math.max(nowMs, fri + 17 * 3600e3), fri + 3 * DAY_MS);
+  }
+  if (bucket === 'next_7_days') return overlaps(nowMs, day0 + 7 * DAY_MS);
+  if (bucket === 'later') return s >= day0 + 7 * DAY_MS;
+  return true;
+}
+
 // Events category change -> re-render
 eventCatSel?.addEventListener('change', ()=>{
   selectedEventCat = eventCatSel.value;
   renderEvents(allEventsData);
 });
+eventWhenSel?.addEventListener('change', ()=>{
+  selectedEventWhen = eventWhenSel.value;
+  renderEvents(allEventsData);
+});
 
 /* ---------- Nav: swap hero on tab change ---------- */
 document.querySelectorAll('.nav-btn').forEach(btn=>{
@@ -661,7 +747,51 @@ typeSel?.addEventListener('change', handlePlacesFilters);
 minRatingSel?.addEventListener('change', handlePlacesFilters);
 sortSel?.addEventListener('change', handlePlacesFilters);
 
+// First screen prerendered into index.html (prerender.py): wire up that markup
+// and use its data slice until the full files arrive, which then only append
+// or replace what changed.
+function hydratePrerendered(){
+  const el = document.getElementById('prerendered');
+  if (!el) return;
+  let data;
+  try { data = JSON.parse(el.textContent); } catch (e) { return; }
+  if (Array.isArray(data?.places) && data.places.length) {
+    allPlaces = data.places;
+    buildHeroFromPlaces(allPlaces);
+    if (topTrack?.children.length) bindTopPicksControlsOnce();
+  }
+  if (Array.isArray(data?.events) && eventListEl?.children.length) {
+    allEventsData = data.events;
+    pruneBrokenEventImages([...eventListEl.children]);
+  }
+}
+
 // kick off
+hydratePrerendered();
 loadAttractions();   // prefetch for snappy swap
 loadEvents();
 loadPlaces();
+
+/* ===== Offline cache (sw.js): data is served from cache, then refreshed ===== */
+const DATA_RELOADERS = {
+  'data/places.json': loadPlaces,
+  'data/events.json': loadEvents,
+  'data/featured_attractions.json': async () => {
+    await loadAttractions();
+    const eventsActive = document.querySelector('.nav-btn.active')?.dataset.tab === 'events';
+    if (!eventsActive) return;
+    if (featuredAttractions.length) buildEventsHero(featuredAttractions);
+    renderEvents(allEventsData);   // Family cards come from attractions
+  },
+};
+
+if ('serviceWorker' in navigator) {
+  window.addEventListener('load', () => {
+    navigator.serviceWorker.register('sw.js').catch((e) => console.warn('Service worker not registered', e));
+  });
+  // sw.js found a newer data file (manifest hash changed): re-render with it
+  navigator.serviceWorker.addEventListener('message', (ev) => {
+    if (ev.data?.type !== 'data-updated') return;
+    DATA_RELOADERS[ev.data.file]?.();
+  });
+}
@@ -0,0 +1,154 @@
+/* Amara Explore service worker
+ *
+ * Shell (html/css/js/logos): precached on install, served from cache and
+ * refreshed in the background (stale-while-revalidate).
+ *
+ * Data (data/*.json): served from cache immediately. In the background the
+ * worker fetches data/manifest.json (written by the Python pipelines via
+ * data_manifest.py) and re-downloads a file only when its hash changed,
+ * then tells open pages so they can re-render with the fresh copy.
+ *
+ * Bump SHELL_VERSION when the list of shell files changes.
+ */
+const SHELL_VERSION = 'v1';
+const SHELL_CACHE = `amara-shell-${SHELL_VERSION}`;
+const DATA_CACHE = 'amara-data';
+const MANIFEST_URL = 'data/manifest.json';
+const MANIFEST_MIN_INTERVAL_MS = 30 * 1000;   // one manifest check per burst of requests
+const HASH_HEADER = 'X-Data-Hash';
+
+const SHELL_FILES = [
+  './',
+  'index.html',
+  'style.css',
+  'script.js',
+  'assets/logo/amara-singapore-light.png',
+  'assets/logo/amara-singapore-dark.png',
+];
+
+self.addEventListener('install', (event) => {
+  event.waitUntil(
+    caches.open(SHELL_CACHE)
+      .then((cache) => cache.addAll(SHELL_FILES.map((u) => new Request(u, { cache: 'reload' }))))
+      .then(() => self.skipWaiting())
+  );
+});
+
+self.addEventListener('activate', (event) => {
+  event.waitUntil((async () => {
+    const keep = new Set([SHELL_CACHE, DATA_CACHE]);
+    for (const key of await caches.keys()) {
+      if (key.startsWith('amara-') && !keep.has(key)) await caches.delete(key);
+    }
+    await self.clients.claim();
+  })());
+});
+
+self.addEventListener('fetch', (event) => {
+  const req = event.request;
+  if (req.method !== 'GET') return;
+  const url = new URL(req.url);
+  if (url.origin !== self.location.origin) return;
+
+  const rel = url.pathname.replace(/^\/+/, '');
+  if (rel === MANIFEST_URL) {
+    event.respondWith(networkFirst(req));
+  } else if (rel.startsWith('data/') && rel.endsWith('.json')) {
+    event.respondWith(dataResponse(event, url));
+  } else if (req.mode === 'navigate' || SHELL_FILES.includes(rel)) {
+    event.respondWith(shellResponse(event, req));
+  }
+});
+
+/* ---------- Shell: stale-while-revalidate ---------- */
+async function shellResponse(event, req) {
+  const cache = await caches.open(SHELL_CACHE);
+  const key = req.mode === 'navigate' ? 'index.html' : req;
+  const cached = await cache.match(key, { ignoreSearch: true });
+  const refresh = fetch(req).then((res) => {
+    if (res.ok) return cache.put(key, res.clone()).then(() => res);
+    return res;
+  });
+  if (cached) {
+    event.waitUntil(refresh.catch(() => {}));
+    return cached;
+  }
+  return refresh;
+}
+
+/* ---------- Manifest ---------- */
+let manifestCheck = null;   // { at, promise }
+
+function latestManifest() {
+  const now = Date.now();
+  if (manifestCheck && now - manifestCheck.at < MANIFEST_MIN_INTERVAL_MS) return manifestCheck.promise;
+  const promise = fetch(MANIFEST_URL, { cache: 'no-cache' })
+    .then((res) => (res.ok ? res.json() : null))
+    .catch(() => null);
+  manifestCheck = { at: now, promise };
+  return promise;
+}
+
+async function networkFirst(req) {
+  const cache = await caches.open(DATA_CACHE);
+  try {
+    const res = await fetch(req, { cache: 'no-cache' });
+    if (res.ok) await cache.put(MANIFEST_URL, res.clone());
+    return res;
+  } catch (e) {
+    const cached = await cache.match(MANIFEST_URL);
+    if (cached) return cached;
+    throw e;
+  }
+}
+
+/* ---------- Data: cached copy now, re-download only on hash change ---------- */
+function dataKey(url) {
+  return url.pathname.replace(/^\/+/, '');   // query strings (old ?ts=) don't matter
+}
+
+async function storeData(cache, key, res, hash) {
+  const body = await res.blob();
+  const headers = new Headers(res.headers);
+  headers.set(HASH_HEADER, hash || '');
+  const copy = new Response(body, { status: res.status, statusText: res.statusText, headers });
+  await cache.put(key, copy.clone());
+  return copy;
+}
+
+// `hash` may be a promise so the manifest and the file download in parallel
+async function download(cache, key, hash) {
+  const [res, h] = await Promise.all([fetch(key, { cache: 'no-cache' }), hash]);
+  if (!res.ok) return res;
+  return storeData(cache, key, res, h);
+}
+
+function manifestHash(key) {
+  return latestManifest().then((m) => m?.files?.[key.replace(/^data\//, '')]?.hash || '');
+}
+
+async function revalidate(cache, key, cached) {
+  const manifest = await latestManifest();
+  const entry = manifest?.files?.[key.replace(/^data\//, '')];
+  if (entry && cached.headers.get(HASH_HEADER) === entry.hash) return;   // unchanged
+  const fresh = await download(cache, key, entry?.hash);
+  if (!fresh.ok) return;
+  if (!entry) {
+    // no manifest entry: plain stale-while-revalidate, notify only on a real change
+    const [a, b] = await Promise.all([cached.clone().text(), fresh.clone().text()]);
+    if (a === b) return;
+  }
+  const clients = await self.clients.matchAll({ type: 'window' });
+  clients.forEach((c) => c.postMessage({ type: 'data-updated', file: key }));
+}
+
+async function dataResponse(event, url) {
+  const cache = await caches.open(DATA_CACHE);
+  const key = dataKey(url);
+  const cached = await cache.match(key);
+  if (cached) {
+    event.waitUntil(revalidate(cache, key, cached).catch(() => {}));
+    return cached;
+  }
+  return download(cache, key, manifestHash(key));
+}
@@ -0,0 +1,274 @@
+# refresher.py  (long-running refresh daemon with a local preview server)
+#
+# Replaces the cron + shell date logic in the workflow with one warm process:
+# pipelines run in-process (so the shared HTTP session, image-probe cache,
+# date/normalization memos and history store stay warm between runs), each on
+# its own cadence or when its data goes stale, and every successful run is
+# published atomically to a serving directory that a small HTTP server
+# exposes for previews.
+#
+#   python refresher.py                       # schedule all jobs, serve on :8080
+#   python refresher.py --jobs events --port 9000
+#   python refresher.py --force places --once # run one job now, publish, exit
+#
+# Cadence (Asia/Singapore), same as the workflow:
+#   events       00:00 on odd days of the month and on weekends; stale after 60 h
+#   places       Monday 00:05; stale after 8 days
+#   attractions  Monday 00:10; stale after 8 days
+#
+# A job whose previous attempt failed or was killed (and is younger than its
+# max age) runs with --resume, replaying the checkpointed API responses.
+import os
+import json
+import shutil
+import signal
+import argparse
+import importlib
+import threading
+import traceback
+from pathlib import Path
+from functools import partial
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from zoneinfo import ZoneInfo
+
+import prerender
+import event_locales
+from field_masks import reset_response_stats
+
+SGT = ZoneInfo("Asia/Singapore")
+PUBLIC_DIR = Path("public")
+DATA_DIR = PUBLIC_DIR / "data"
+SERVE_DIR = Path(os.getenv("REFRESHER_SERVE_DIR", ".cache/serve"))
+STATE_PATH = Path(".cache/refresher_state.json")
+TICK_SEC = 60
+RETRY_AFTER = timedelta(minutes=int(os.getenv("REFRESHER_RETRY_MIN", "30")))
+
+# ---------------- Cadence ----------------
+def _latest_slot(now: datetime, at_hm, day_ok) -> datetime:
+    """Most recent datetime <= now at `at_hm` (SGT) on a day where day_ok(date)."""
+    now = now.astimezone(SGT)
+    for back in range(0, 15):
+        d = (now - timedelta(days=back)).date()
+        slot = datetime(d.year, d.month, d.day, *at_hm, tzinfo=SGT)
+        if slot <= now and day_ok(d):
+            return slot
+    return now - timedelta(days=14)
+
+def _events_day(d) -> bool:
+    return d.day % 2 == 1 or d.weekday() >= 5     # odd day-of-month or Sat/Sun
+
+def _monday(d) -> bool:
+    return d.weekday() == 0
+
+def _events_outputs():
+    cities = event_locales.parse_cities(os.getenv("EVENTS_CITIES"))
+    return [Path(event_locales.PROFILES[c]["out_path"]).name for c in cities]
+
+JOBS = {
+    "events": {
+        "module": "get_serpapi_events",
+        "env": "SERPAPI_KEY",
+        "slot": partial(_latest_slot, at_hm=(0, 0), day_ok=_events_day),
+        "max_age": timedelta(hours=60),
+        "outputs": _events_outputs,
+    },
+    "places": {
+        "module": "get_places",
+        "env": "GOOGLE_API_KEY",
+        "slot": partial(_latest_slot, at_hm=(0, 5), day_ok=_monday),
+        "max_age": timedelta(days=8),
+        "outputs": lambda: ["places.json"],
+    },
+    "attractions": {
+        "module": "get_featured_attractions",
+        "env": "GOOGLE_API_KEY",
+        "slot": partial(_latest_slot, at_hm=(0, 10), day_ok=_monday),
+        "max_age": timedelta(days=8),
+        "outputs": lambda: ["featured_attractions.json"],
+    },
+}
+
+# ---------------- State ----------------
+def _iso(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).isoformat()
+
+def _parse(s):
+    return datetime.fromisoformat(s) if s else None
+
+def load_state(path: Path = STATE_PATH) -> dict:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+def save_state(state: dict, path: Path = STATE_PATH):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+def last_success(name: str, state: dict):
+    """From the daemon's own record, else the output file's mtime (data from CI/git)."""
+    ts = _parse(state.get(name, {}).get("last_success"))
+    if ts:
+        return ts
+    mtimes = [(DATA_DIR / f).stat().st_mtime for f in JOBS[name]["outputs"]() if (DATA_DIR / f).exists()]
+    return datetime.fromtimestamp(min(mtimes), timezone.utc) if mtimes else None
+
+def due_reason(name: str, state: dict, now: datetime):
+    """Why `name` should run now, or None."""
+    job = JOBS[name]
+    attempt = _parse(state.get(name, {}).get("last_attempt"))
+    if attempt and state.get(name, {}).get("last_error") and now - attempt < RETRY_AFTER:
+        return None
+    done = last_success(name, state)
+    if done is None:
+        return "no data yet"
+    slot = job["slot"](now)
+    if done < slot:
+        return f"scheduled {slot:%a %d %b %H:%M}"
+    if now - done > job["max_age"]:
+        return f"stale ({(now - done).total_seconds() / 3600:.0f} h old)"
+    return None
+
+# ---------------- Publish ----------------
+def _atomic_copy(src: Path, dst: Path):
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(f".{dst.name}.tmp")
+    shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+def publish(files, serve_dir: Path = SERVE_DIR):
+    """Swap data files into the serving dir; manifest last so the service worker never sees a hash early."""
+    for name in [*files, "manifest.json"]:
+        src = DATA_DIR / name
+        if src.exists():
+            _atomic_copy(src, serve_dir / "data" / name)
+    # first screen from the data just published (public/index.html stays the template)
+    prerender.safe_build(PUBLIC_DIR / "index.html", serve_dir / "index.html")
+
+def mirror_public(serve_dir: Path = SERVE_DIR):
+    for src in PUBLIC_DIR.rglob("*"):
+        if src.is_file():
+            _atomic_copy(src, serve_dir / src.relative_to(PUBLIC_DIR))
+    prerender.safe_build(PUBLIC_DIR / "index.html", serve_dir / "index.html")
+
+# ---------------- Preview server ----------------
+class PreviewHandler(SimpleHTTPRequestHandler):
+    def end_headers(self):
+        path = self.path.split("?", 1)[0]
+        if path.startswith("/data/") or path in ("/", "/index.html", "/sw.js"):
+            self.send_header("Cache-Control", "no-cache")
+        super().end_headers()
+
+    def log_message(self, *args):
+        pass
+
+def start_server(serve_dir: Path, host: str, port: int) -> ThreadingHTTPServer:
+    srv = ThreadingHTTPServer((host, port), partial(PreviewHandler, directory=str(serve_dir)))
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+
+# ---------------- Runner ----------------
+_modules = {}   # imported once; module-level sessions and caches stay warm
+
+def _resume_args(entry: dict, job: dict, now: datetime) -> list[str]:
+    """["--resume"] if the last attempt never finished and its checkpoints are still fresh."""
+    attempt, success = _parse(entry.get("last_attempt")), _parse(entry.get("last_success"))
+    if attempt and (not success or success < attempt) and now - attempt < job["max_age"]:
+        return ["--resume"]
+    return []
+
+def run_job(name: str, state: dict, serve_dir: Path) -> bool:
+    job = JOBS[name]
+    started = datetime.now(timezone.utc)
+    entry = state.setdefault(name, {})
+    argv = _resume_args(entry, job, started)
+    entry["last_attempt"] = _iso(started)
+    save_state(state)    # so a run killed midway is seen as unfinished on restart
+    print(f"\n▶ [{name}] {started.astimezone(SGT):%Y-%m-%d %H:%M} SGT{' (resuming)' if argv else ''}")
+    try:
+        mod = _modules.get(name) or _modules.setdefault(name, importlib.import_module(job["module"]))
+        reset_response_stats()
+        mod.main(argv)
+    except (Exception, SystemExit) as e:
+        entry["last_error"] = f"{type(e).__name__}: {e}"
+        print(f"❌ [{name}] failed: {entry['last_error']}")
+        traceback.print_exc()
+        save_state(state)
+        return False
+
+    entry["last_success"] = _iso(datetime.now(timezone.utc))
+    entry.pop("last_error", None)
+    publish(job["outputs"](), serve_dir)
+    save_state(state)
+    took = (datetime.now(timezone.utc) - started).total_seconds()
+    print(f"✅ [{name}] refreshed and published in {took:.0f}s")
+    return True
+
+def enabled_jobs(names):
+    out = []
+    for name in names:
+        env = JOBS[name]["env"]
+        if env and not os.getenv(env):
+            print(f"⚠️ [{name}] disabled: {env} is not set")
+            continue
+        out.append(name)
+    return out
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Refresh data on a schedule and publish it to a preview server")
+    ap.add_argument("--jobs", default=",".join(JOBS), help=f"comma-separated subset of {','.join(JOBS)}")
+    ap.add_argument("--force", action="append", default=[], choices=list(JOBS), help="run this job now")
+    ap.add_argument("--once", action="store_true", help="run whatever is due (plus --force) and exit")
+    ap.add_argument("--serve-dir", default=str(SERVE_DIR))
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8080)
+    ap.add_argument("--no-serve", action="store_true")
+    ap.add_argument("--tick", type=float, default=TICK_SEC, help="seconds between schedule checks")
+    args = ap.parse_args(argv)
+
+    names = [n.strip() for n in args.jobs.split(",") if n.strip()]
+    unknown = [n for n in names if n not in JOBS]
+    if unknown:
+        ap.error(f"unknown job(s): {unknown}")
+    names = enabled_jobs(names)
+    serve_dir = Path(args.serve_dir)
+    mirror_public(serve_dir)
+
+    srv = None
+    if not args.no_serve and not args.once:
+        srv = start_server(serve_dir, args.host, args.port)
+        print(f"🌐 Preview: http://{args.host}:{srv.server_address[1]}/  ({serve_dir})")
+
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+
+    state = load_state()
+    forced = [n for n in args.force if n in names]
+    try:
+        while not stop.is_set():
+            now = datetime.now(timezone.utc)
+            for name in names:
+                if stop.is_set():
+                    break
+                reason = "forced" if name in forced else due_reason(name, state, now)
+                if not reason:
+                    continue
+                print(f"⏰ [{name}] due: {reason}")
+                run_job(name, state, serve_dir)
+            forced = []
+            if args.once:
+                break
+            stop.wait(args.tick)
+    finally:
+        if srv:
+            srv.shutdown()
+            srv.server_close()
+    print("👋 Refresher stopped")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# tests/test_event_windows.py  (parse_when on SerpAPI "when" strings)
+#
+#   python -m unittest discover tests      (or: python -m pytest tests)
+import sys
+import unittest
+from pathlib import Path
+from datetime import datetime
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from event_windows import parse_when, TZ
+
+NOW = datetime(2025, 10, 5, 12, 0, tzinfo=TZ)
+
+def sgt(*args) -> datetime:
+    return datetime(*args, tzinfo=TZ)
+
+class ParseWhenTest(unittest.TestCase):
+    def check(self, start, when, begin, end):
+        self.assertEqual(parse_when(start, when, NOW), (begin, end))
+
+    def test_bare_hour_takes_pm_from_right(self):
+        self.check("Oct 10", "Fri, 10 Oct, 7 – 10 pm", sgt(2025, 10, 10, 19), sgt(2025, 10, 10, 22))
+
+    def test_bare_hour_without_date(self):
+        self.check("Oct 10", "8 – 11 pm", sgt(2025, 10, 10, 20), sgt(2025, 10, 10, 23))
+
+    def test_bare_hour_am(self):
+        self.check("Oct 4", "Sat, 4 Oct, 10 – 11 am", sgt(2025, 10, 4, 10), sgt(2025, 10, 4, 11))
+
+    def test_bare_hour_next_year(self):
+        self.check("Jan 5", "Mon, 5 Jan, 7 – 9 pm", sgt(2026, 1, 5, 19), sgt(2026, 1, 5, 21))
+
+    def test_clock_range(self):
+        self.check("Oct 4", "Sat, 4 Oct, 5:00 – 8:00 pm", sgt(2025, 10, 4, 17), sgt(2025, 10, 4, 20))
+
+    def test_overnight(self):
+        self.check("Oct 4", "Sat, 4 Oct, 10 pm – 2 am", sgt(2025, 10, 4, 22), sgt(2025, 10, 5, 2))
+
+    def test_date_range_is_all_day(self):
+        self.check("Oct 4", "Sat, 4 Oct – Sun, 5 Oct", sgt(2025, 10, 4), sgt(2025, 10, 5, 23, 59))
+
+if __name__ == "__main__":
+    unittest.main()
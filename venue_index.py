@@ -0,0 +1,289 @@
+# venue_index.py  (event venue -> coordinates, from data we already have)
+#
+# SerpAPI events only carry free-text venue/address. This resolves them to
+# lat/lng without geocoding every event:
+#   1) a local index of places.json + featured_attractions.json (+ every
+#      venue resolved before, persisted in .cache/venue_cache.json)
+#   2) bulk fuzzy matching against it: exact normalized name, building
+#      postal code, then a token inverted index to shortlist candidates
+#      scored with difflib
+#   3) only the venues still unmatched go to Places Text Search, deduped,
+#      capped per run and fetched concurrently; results (and misses) are
+#      cached so each venue is paid for once.
+#
+#   python venue_index.py public/data/events.json     # dry run, prints matches
+import os
+import re
+import json
+import math
+import difflib
+import functools
+import threading
+import unicodedata
+from pathlib import Path
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+from coverage_planner import distance_m
+from field_masks import field_mask, api_session, meter
+
+DATA_DIR = Path("public/data")
+CACHE_PATH = Path(os.getenv("VENUE_CACHE", ".cache/venue_cache.json"))
+MATCH_THRESHOLD = float(os.getenv("VENUE_MATCH_THRESHOLD", "0.86"))
+GEOCODE_MAX = int(os.getenv("VENUE_GEOCODE_MAX", "25"))   # paid lookups per run
+GEOCODE_WORKERS = 6
+MISS_TTL = timedelta(days=14)    # retry venues Places couldn't find after this
+SHORTLIST = 20
+
+STOPWORDS = {
+    "the", "at", "of", "and", "by", "in", "on", "sg", "singapore", "pte", "ltd", "co", "inc",
+    "level", "lvl", "unit", "no", "rd", "road", "st", "street", "ave", "avenue",
+}
+POSTAL_RE = re.compile(r"\b(\d{6})\b")
+
+GEOCODE_SCHEMA = {"name": ["displayName"], "lat": ["location"], "lng": ["location"], "address": ["formattedAddress"]}
+
+@functools.cache
+def geocode_mask() -> str:
+    # on first use, not at import: a bad PLACES_MAX_SKU_TIER then only fails
+    # the geocode calls (venues stay unresolved), not the events pipeline
+    return field_mask(GEOCODE_SCHEMA, endpoint="searchText", required=("location",))
+
+_cache_lock = threading.Lock()
+
+def normalize_name(s) -> str:
+    s = unicodedata.normalize("NFKD", str(s or "")).encode("ascii", "ignore").decode()
+    s = re.sub(r"[^a-z0-9]+", " ", s.lower())
+    return " ".join(t for t in s.split() if t not in STOPWORDS)
+
+def postal_code(s) -> str | None:
+    m = POSTAL_RE.search(str(s or ""))
+    return m.group(1) if m else None
+
+# ---------------- Index ----------------
+class VenueIndex:
+    def __init__(self):
+        self.entries = []                    # {"key", "name", "lat", "lng", "source"}
+        self.exact = {}                      # normalized name -> entry
+        self.by_postal = {}                  # postal code -> entry
+        self.by_token = defaultdict(list)    # token -> [entry index]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, name, lat, lng, source: str, address=None, key=None):
+        key = key or normalize_name(name)
+        if not key or lat is None or lng is None or key in self.exact:
+            return
+        entry = {"key": key, "name": name, "lat": lat, "lng": lng, "source": source}
+        self.exact[key] = entry
+        code = postal_code(address)
+        if code:
+            self.by_postal.setdefault(code, entry)
+        i = len(self.entries)
+        self.entries.append(entry)
+        for t in set(key.split()):
+            self.by_token[t].append(i)
+
+    def _shortlist(self, key: str):
+        # rarer shared tokens count more (IDF-style), so "esplanade" beats "hall"
+        n = len(self.entries) or 1
+        scores = defaultdict(float)
+        for t in set(key.split()):
+            hits = self.by_token.get(t)
+            if hits:
+                w = math.log(1 + n / len(hits))
+                for i in hits:
+                    scores[i] += w
+        return sorted(scores, key=scores.get, reverse=True)[:SHORTLIST]
+
+    def match(self, venue, address=None):
+        """(entry, score, how) for the best match above threshold, else None."""
+        keys = [k for k in dict.fromkeys((normalize_name(venue), normalize_name(address))) if k]
+        for k in keys:
+            hit = self.exact.get(k)
+            if hit:
+                return hit, 1.0, "exact"
+        code = postal_code(address) or postal_code(venue)
+        if code and code in self.by_postal:
+            return self.by_postal[code], 1.0, "postal"
+
+        best = None
+        for k in keys:
+            sm = difflib.SequenceMatcher(None, k, autojunk=False)
+            for i in self._shortlist(k):
+                e = self.entries[i]
+                sm.set_seq1(e["key"])
+                if sm.real_quick_ratio() < MATCH_THRESHOLD - 0.2:
+                    continue
+                score = sm.ratio()
+                # "esplanade concert hall" vs "esplanade theatres on the bay concert hall"
+                short, long_ = sorted((k, e["key"]), key=len)
+                if len(short) >= 8 and short in long_:
+                    score = max(score, 0.9)
+                if best is None or score > best[1]:
+                    best = (e, score, "fuzzy")
+        return best if best and best[1] >= MATCH_THRESHOLD else None
+
+def _records(path: Path, key: str) -> list[dict]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return []
+    return data.get(key, []) if isinstance(data, dict) else data
+
+def load_cache(path: Path = CACHE_PATH) -> dict:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return {"venues": data.get("venues", {}), "misses": data.get("misses", {})}
+    except (OSError, ValueError):
+        return {"venues": {}, "misses": {}}
+
+def save_cache(cache: dict, path: Path = CACHE_PATH):
+    """Merge `cache` into the file on disk and write it back atomically.
+    City harvests resolve on threads, each from its own loaded copy: merging
+    under the lock keeps one city's save from dropping another's entries."""
+    with _cache_lock:
+        merged = load_cache(path)
+        for k in ("venues", "misses"):
+            merged[k].update(cache[k])
+        for k in merged["venues"]:
+            merged["misses"].pop(k, None)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(merged, ensure_ascii=False, indent=1), encoding="utf-8")
+        os.replace(tmp, path)
+
+def build_index(cache: dict, data_dir: Path = DATA_DIR) -> VenueIndex:
+    idx = VenueIndex()
+    for p in _records(data_dir / "places.json", "places"):
+        idx.add(p.get("name"), p.get("lat"), p.get("lng"), "places", p.get("address"))
+    for a in _records(data_dir / "featured_attractions.json", "attractions"):
+        idx.add(a.get("title"), a.get("lat"), a.get("lng"), "attractions", a.get("address"))
+    for key, v in cache["venues"].items():
+        idx.add(v.get("name"), v.get("lat"), v.get("lng"), v.get("source", "cache"), v.get("address"), key=key)
+    return idx
+
+# ---------------- Geocoding (unmatched only) ----------------
+def geocode(text: str, origin: dict, region: str):
+    body = {
+        "textQuery": text,
+        "regionCode": region,
+        "locationBias": {"circle": {"center": {"latitude": origin["lat"], "longitude": origin["lng"]},
+                                    "radius": 30000}},
+        "pageSize": 1,
+    }
+    headers = {"X-Goog-Api-Key": os.getenv("GOOGLE_API_KEY"), "X-Goog-FieldMask": geocode_mask()}
+    r = api_session().post("https://places.googleapis.com/v1/places:searchText",
+                           json=body, headers=headers, timeout=30)
+    r.raise_for_status()
+    places = meter("places:searchText(venues)", r).json().get("places") or []
+    if not places:
+        return None
+    p = places[0]
+    loc = p.get("location") or {}
+    return {
+        "name": (p.get("displayName") or {}).get("text") or text,
+        "lat": loc.get("latitude"),
+        "lng": loc.get("longitude"),
+        "address": p.get("formattedAddress"),
+    }
+
+def geocode_many(queries: dict, origin: dict, region: str) -> dict:
+    """{key: text} -> {key: result or None}; failed calls are left out (retried next run)."""
+    out = {}
+    def one(item):
+        key, text = item
+        try:
+            return key, geocode(text, origin, region), True
+        except Exception as e:     # network / quota: keep the venue unresolved, not a miss
+            print(f"  ⚠️ Venue geocode failed for {text!r}: {e}")
+            return key, None, False
+    with ThreadPoolExecutor(max_workers=GEOCODE_WORKERS) as ex:
+        for key, res, ok in ex.map(one, queries.items()):
+            if ok:
+                out[key] = res
+    return out
+
+# ---------------- Events ----------------
+def _venue_key(e: dict) -> str:
+    return normalize_name(e.get("venue")) or normalize_name(e.get("address"))
+
+def resolve_events(events: list[dict], origin: dict, region: str = "SG",
+                   data_dir: Path = DATA_DIR, cache_path: Path = CACHE_PATH, geocode_missing: bool = True) -> dict:
+    """Adds lat / lng / distance_m (from `origin`) to events in place. Returns stats."""
+    cache = load_cache(cache_path)
+    idx = build_index(cache, data_dir)
+    stats = {"events": len(events), "index": len(idx), "exact": 0, "postal": 0, "fuzzy": 0,
+             "geocoded": 0, "unresolved": 0}
+
+    # one lookup per distinct venue, however many events share it
+    groups = defaultdict(list)
+    for e in events:
+        groups[_venue_key(e)].append(e)
+    groups.pop("", None)
+
+    resolved, pending = {}, {}
+    for key, evs in groups.items():
+        m = idx.match(evs[0].get("venue"), evs[0].get("address"))
+        if m:
+            entry, score, how = m
+            resolved[key] = entry
+            stats[how] += len(evs)
+            if how != "exact" and key not in cache["venues"]:
+                # remember the alias so next run is an exact hit
+                cache["venues"][key] = {"name": entry["name"], "lat": entry["lat"], "lng": entry["lng"],
+                                        "source": f"alias:{entry['source']}", "score": round(score, 3)}
+        else:
+            pending[key] = evs
+
+    now = datetime.now(timezone.utc)
+    can_geocode = geocode_missing and bool(os.getenv("GOOGLE_API_KEY"))
+    if can_geocode and pending:
+        try:
+            geocode_mask()
+        except ValueError as e:
+            print(f"⚠️ Venue geocoding skipped: {e}")
+            can_geocode = False
+    if pending and can_geocode:
+        fresh = {
+            k: f"{evs[0].get('venue') or ''} {evs[0].get('address') or ''}".strip()
+            for k, evs in pending.items()
+            if not (cache["misses"].get(k) and now - datetime.fromisoformat(cache["misses"][k]) < MISS_TTL)
+        }
+        batch = dict(list(fresh.items())[:GEOCODE_MAX])
+        for key, res in geocode_many(batch, origin, region).items():
+            if res and res.get("lat") is not None:
+                cache["venues"][key] = {**res, "source": "geocode", "at": now.isoformat()}
+                resolved[key] = cache["venues"][key]
+                stats["geocoded"] += len(pending[key])
+            else:
+                cache["misses"][key] = now.isoformat()
+
+    for key, evs in groups.items():
+        hit = resolved.get(key)
+        for e in evs:
+            if hit:
+                e["lat"], e["lng"] = hit["lat"], hit["lng"]
+                e["distance_m"] = round(distance_m(origin["lat"], origin["lng"], hit["lat"], hit["lng"]))
+            else:
+                e.setdefault("lat", None)
+                e.setdefault("lng", None)
+                e.setdefault("distance_m", None)
+    stats["unresolved"] = sum(1 for e in events if e.get("lat") is None)
+    save_cache(cache, cache_path)
+    print(f"📍 Venues: {stats}" + ("" if can_geocode else " (geocoding off: no GOOGLE_API_KEY)"))
+    return stats
+
+if __name__ == "__main__":
+    import sys
+    path = Path(sys.argv[1] if len(sys.argv) > 1 else DATA_DIR / "events.json")
+    events = _records(path, "events")
+    cache = load_cache()
+    idx = build_index(cache)
+    print(f"Index: {len(idx)} venues")
+    for e in events:
+        m = idx.match(e.get("venue"), e.get("address"))
+        where = f"{m[0]['name']} ({m[2]} {m[1]:.2f})" if m else "—"
+        print(f"{(e.get('venue') or '')[:40]:<40} → {where}")